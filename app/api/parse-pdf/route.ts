@@ -5,6 +5,7 @@ import { writeFile, unlink } from 'fs/promises'
 import path from 'path'
 import { tmpdir } from 'os'
 import { getRunners } from '@/lib/db/database'
+import { parseWithWorker } from '@/lib/pdf/parse-worker-client'
 
 export async function POST(request: NextRequest) {
   let tempFilePath: string | null = null
@@ -27,6 +28,18 @@ export async function POST(request: NextRequest) {
     const bytes = await file.arrayBuffer()
     const buffer = Buffer.from(bytes)
 
+    // Prefer the warm parse worker; spawn the parser script when it isn't running
+    const workerResult = await parseWithWorker(buffer)
+    if (workerResult) {
+      const runners = await getRunners()
+      return NextResponse.json({
+        success: true,
+        runners,
+        count: runners.length,
+        log: `Parsed ${workerResult.count} runners with parse worker in ${workerResult.seconds}s`,
+      })
+    }
+
     tempFilePath = path.join(tmpdir(), `entry-list-${Date.now()}.pdf`)
     await writeFile(tempFilePath, buffer)
 
@@ -0,0 +1,17 @@
+-- Migration: Indexes for the leaderboard, team ranking and runner history queries
+-- Found by scripts/benchmark-queries.py; each query used to scan its table
+
+-- Team top three per nationality and gender; replaces the (nationality, gender) index
+CREATE INDEX IF NOT EXISTS idx_runners_nationality_gender_pb ON runners(nationality, gender, personal_best_all_time);
+DROP INDEX IF EXISTS idx_runners_nationality_gender;
+
+-- Top-N PBs per gender
+CREATE INDEX IF NOT EXISTS idx_runners_gender_pb_all_time ON runners(gender, personal_best_all_time);
+CREATE INDEX IF NOT EXISTS idx_runners_gender_pb_last_2_years ON runners(gender, personal_best_last_2_years);
+
+-- getTeams: WHERE metric = $1 AND gender = $2 ORDER BY rank
+CREATE INDEX IF NOT EXISTS idx_teams_metric_gender_rank ON teams(metric, gender, rank);
+
+-- Runner history in date order; replaces the runner_id-only index
+CREATE INDEX IF NOT EXISTS idx_performances_runner_date ON performances(runner_id, event_date);
+DROP INDEX IF EXISTS idx_performances_runner_id;
@@ -0,0 +1,27 @@
+-- Migration: Per-discipline PBs and typed performance results from scripts/fetch-performances.py
+-- Loaded by export-supabase.py --load and sync-changes.py --apply; without it their runner_pbs and performances upserts fail
+
+CREATE TABLE IF NOT EXISTS runner_pbs (
+    runner_id INTEGER NOT NULL,
+    event_type TEXT NOT NULL,  -- '24h', '100km', etc.
+    pb_all_time REAL,
+    pb_all_time_year INTEGER,
+    pb_last_2_years REAL,  -- Best inside the PB window (3 years before race date)
+    pb_last_2_years_year INTEGER,
+    season_best REAL,
+    season_best_year INTEGER,
+    unit TEXT,  -- 'km' for timed events, 's' (seconds) for fixed-distance events
+    race_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    PRIMARY KEY (runner_id, event_type),
+    FOREIGN KEY (runner_id) REFERENCES runners(id) ON DELETE CASCADE
+);
+
+-- Discipline leaderboards
+CREATE INDEX IF NOT EXISTS idx_runner_pbs_event_type ON runner_pbs(event_type, pb_all_time);
+
+-- Typed DUV results (performances.distance stays as the legacy value)
+ALTER TABLE performances ADD COLUMN IF NOT EXISTS distance_km REAL;  -- Result for timed events, event length for fixed-distance events
+ALTER TABLE performances ADD COLUMN IF NOT EXISTS duration_sec INTEGER;  -- Result for fixed-distance events, event length for timed events
+ALTER TABLE performances ADD COLUMN IF NOT EXISTS performance_text TEXT;  -- Raw DUV result, e.g. '245.123 km' or '7:12:33 h'
@@ -0,0 +1,544 @@
+#!/usr/bin/env python3
+"""
+Shared pieces for syncing the local SQLite database to Supabase Postgres.
+
+- SYNC_TABLES: the Postgres tables we sync (lib/db/schema-postgres.sql), in
+  foreign-key order, with their conflict keys and boolean columns
+- encoders for Postgres COPY text format and CSV (NULL stays distinct from '')
+- staging-table loads: each chunk is COPYed into a temp table and merged into
+  the target with one INSERT ... ON CONFLICT DO UPDATE, in its own transaction,
+  and recorded in sync_loaded_chunks by checksum so a rerun resumes
+- change capture: rows whose updated_at passed the per-table watermark in
+  sync_watermarks plus keys recorded in sync_tombstones, collected into a delta
+  batch and applied in one transaction (recorded in sync_delta_batches)
+
+Postgres holds one race (the web app's championship), while SQLite keeps
+several: every table is read through its SyncTable.source, which selects the
+rows of the published race (:race_id) in the Postgres layout. Performances
+are stored per athlete locally and exported once, under the race's runner
+with that DUV id. Watermarks belong to the race they were taken for;
+publishing a different race starts from no watermark, and Postgres needs a
+fresh load (truncate the synced tables first) since the old race's rows
+would otherwise stay.
+
+psycopg (the postgres extra: pip install -e ".[postgres]") is only needed to load into Postgres;
+exporting needs nothing beyond the standard library.
+"""
+
+import os
+import gzip
+import json
+import hashlib
+import sqlite3
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+
+class SyncTable(NamedTuple):
+    name: str
+    key: Tuple[str, ...]  # ON CONFLICT target
+    columns: Tuple[str, ...]  # Postgres columns, exported when the SQLite table has them
+    booleans: Tuple[str, ...] = ()  # SQLite 0/1 -> Postgres BOOLEAN
+    serial: bool = True  # Has an id sequence to bump after loading
+    source: str = ''  # Local SELECT of the published race's rows (:race_id)
+
+
+SYNC_TABLES = (
+    SyncTable('runners', ('id',), (
+        'id', 'entry_id', 'firstname', 'lastname', 'nationality', 'gender', 'dns',
+        'duv_id', 'match_status', 'match_confidence',
+        'personal_best_all_time', 'personal_best_all_time_year',
+        'personal_best_last_2_years', 'personal_best_last_2_years_year',
+        'date_of_birth', 'age', 'created_at', 'updated_at',
+    ), booleans=('dns',), source="SELECT * FROM runners WHERE race_id = :race_id"),
+    # One copy of an athlete's history, owned by the race's (last) entry with that DUV id.
+    # Correlated lookups on idx_runners_duv_race, so a delta walks the updated_at index
+    # instead of grouping the whole field first
+    SyncTable('performances', ('id',), (
+        'id', 'runner_id', 'event_id', 'event_name', 'event_date', 'distance', 'rank',
+        'event_type', 'distance_km', 'duration_sec', 'performance_text', 'created_at',
+    ), source="""
+        SELECT p.*, (
+            SELECT MAX(r.id) FROM runners r WHERE r.duv_id = p.duv_id AND r.race_id = :race_id
+        ) AS runner_id
+        FROM performances p
+        WHERE EXISTS (SELECT 1 FROM runners r WHERE r.duv_id = p.duv_id AND r.race_id = :race_id)
+    """),
+    SyncTable('runner_pbs', ('runner_id', 'event_type'), (
+        'runner_id', 'event_type', 'pb_all_time', 'pb_all_time_year', 'pb_last_2_years',
+        'pb_last_2_years_year', 'season_best', 'season_best_year', 'unit', 'race_count', 'updated_at',
+    ), serial=False, source="""
+        SELECT pb.* FROM runner_pbs pb JOIN runners r ON r.id = pb.runner_id WHERE r.race_id = :race_id
+    """),
+    SyncTable('match_candidates', ('id',), (
+        'id', 'runner_id', 'duv_person_id', 'lastname', 'firstname', 'year_of_birth',
+        'nation', 'sex', 'personal_best', 'confidence', 'created_at',
+    ), source="""
+        SELECT mc.* FROM match_candidates mc JOIN runners r ON r.id = mc.runner_id WHERE r.race_id = :race_id
+    """),
+    # Teams are recalculated with new ids locally; (nationality, gender, metric) is the identity
+    SyncTable('teams', ('nationality', 'gender', 'metric'), (
+        'nationality', 'gender', 'metric', 'team_total', 'rank',
+        'runner1_id', 'runner2_id', 'runner3_id', 'created_at', 'updated_at',
+    ), serial=False, source="SELECT * FROM teams WHERE race_id = :race_id"),
+)
+TABLES_BY_NAME = {table.name: table for table in SYNC_TABLES}
+
+FORMATS = ('copy', 'csv.gz')
+# Bookkeeping columns: a row differing only in these is not rewritten
+TIMESTAMP_COLUMNS = ('created_at', 'updated_at')
+# Watermarks never pass "now minus this": a writer can commit rows stamped a
+# little before the snapshot was read, so the most recent rows are sent again
+# next time (unchanged rows cost nothing in Postgres) instead of being missed
+SETTLE_SECONDS = 60
+LOADED_CHUNKS_DDL = """
+    CREATE TABLE IF NOT EXISTS sync_loaded_chunks (
+        sha256 TEXT PRIMARY KEY,
+        table_name TEXT NOT NULL,
+        file TEXT NOT NULL,
+        row_count INTEGER NOT NULL,
+        loaded_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    )
+"""
+DELTA_BATCHES_DDL = """
+    CREATE TABLE IF NOT EXISTS sync_delta_batches (
+        batch_id TEXT PRIMARY KEY,
+        created_at TIMESTAMPTZ NOT NULL,
+        upserts INTEGER NOT NULL,
+        deletes INTEGER NOT NULL,
+        applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    )
+"""
+
+def require_psycopg():
+    """psycopg, imported on first use: building exports and deltas never needs it"""
+    try:
+        import psycopg
+    except ImportError:
+        raise RuntimeError('psycopg not installed. Install with: pip install -e ".[postgres]"')
+    return psycopg
+
+
+def export_columns(conn: sqlite3.Connection, table: SyncTable) -> List[str]:
+    """Postgres columns the local source actually has (older databases lack some)"""
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table.name,)).fetchone():
+        return []
+    cursor = conn.execute(f"SELECT * FROM ({table.source}) LIMIT 0", {'race_id': None})
+    existing = {column[0] for column in cursor.description}
+    return [c for c in table.columns if c in existing]
+
+
+def export_rows(conn: sqlite3.Connection, table: SyncTable, columns: Sequence[str], race_id: int) -> sqlite3.Cursor:
+    """The published race's rows of a table, in key order"""
+    return conn.execute(
+        f"SELECT {', '.join(columns)} FROM ({table.source}) ORDER BY {', '.join(table.key)}",
+        {'race_id': race_id},
+    )
+
+
+# --- Encoding -----------------------------------------------------------------
+
+_COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+def _plain(value: Any, is_bool: bool) -> Optional[str]:
+    if value is None:
+        return None
+    if is_bool:
+        return 't' if value else 'f'
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+def copy_line(row: Sequence[Any], bool_flags: Sequence[bool]) -> str:
+    """One row in COPY text format (tab-separated, \\N for NULL)"""
+    fields = []
+    for value, is_bool in zip(row, bool_flags):
+        text = _plain(value, is_bool)
+        fields.append('\\N' if text is None else text.translate(_COPY_ESCAPES))
+    return '\t'.join(fields) + '\n'
+
+
+def csv_line(row: Sequence[Any], bool_flags: Sequence[bool]) -> str:
+    """One CSV row for COPY ... (FORMAT csv): unquoted empty is NULL, "" is an empty string"""
+    fields = []
+    for value, is_bool in zip(row, bool_flags):
+        text = _plain(value, is_bool)
+        if text is None:
+            fields.append('')
+        elif isinstance(value, (int, float)) and not is_bool:
+            fields.append(text)
+        else:
+            fields.append('"' + text.replace('"', '""') + '"')
+    return ','.join(fields) + '\n'
+
+
+def sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ChunkWriter:
+    """Streams encoded rows into numbered chunk files of bounded rows and bytes"""
+
+    def __init__(self, out_dir: str, prefix: str, columns: Sequence[str], fmt: str,
+                 chunk_rows: int, chunk_bytes: int):
+        self.out_dir = out_dir
+        self.prefix = prefix
+        self.columns = list(columns)
+        self.fmt = fmt
+        self.chunk_rows = chunk_rows
+        self.chunk_bytes = chunk_bytes
+        self.chunks: List[Dict[str, Any]] = []
+        self._file = None
+        self._raw = None
+        self._path = None
+        self._rows = 0
+        self._bytes = 0
+
+    def _open(self):
+        name = f"{self.prefix}.{len(self.chunks) + 1:04d}.{'copy' if self.fmt == 'copy' else 'csv.gz'}"
+        self._path = os.path.join(self.out_dir, name)
+        raw = open(self._path + '.part', 'wb')
+        # mtime=0 keeps gzip output (and its checksum) identical for identical rows
+        self._file = gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) if self.fmt == 'csv.gz' else raw
+        self._raw = raw
+        self._rows = 0
+        self._bytes = 0
+        if self.fmt == 'csv.gz':
+            self._write(','.join(self.columns) + '\n')
+
+    def _write(self, text: str):
+        data = text.encode('utf-8')
+        self._file.write(data)
+        self._bytes += len(data)
+
+    def write(self, line: str):
+        if self._file is None:
+            self._open()
+        self._write(line)
+        self._rows += 1
+        if self._rows >= self.chunk_rows or self._bytes >= self.chunk_bytes:
+            self.close()
+
+    def close(self):
+        if self._file is None:
+            return
+        self._file.close()
+        if self._raw is not self._file:
+            self._raw.close()
+        os.replace(self._path + '.part', self._path)
+        self.chunks.append({
+            'file': os.path.basename(self._path),
+            'rows': self._rows,
+            'bytes': os.path.getsize(self._path),
+            'sha256': sha256_file(self._path),
+        })
+        self._file = None
+
+
+def write_chunks(rows: Iterable[Sequence[Any]], out_dir: str, prefix: str, columns: Sequence[str],
+                 booleans: Sequence[str], fmt: str, chunk_rows: int, chunk_bytes: int) -> List[Dict[str, Any]]:
+    """Encode rows into chunk files and return their manifest entries"""
+    bool_flags = [c in booleans for c in columns]
+    encode = copy_line if fmt == 'copy' else csv_line
+    writer = ChunkWriter(out_dir, prefix, columns, fmt, chunk_rows, chunk_bytes)
+    try:
+        for row in rows:
+            writer.write(encode(row, bool_flags))
+    finally:
+        writer.close()
+    return writer.chunks
+
+
+# --- Loading ------------------------------------------------------------------
+
+def upsert_sql(table: SyncTable, columns: Sequence[str], source: str) -> str:
+    """Set-based merge from a staging table; rows whose data didn't change are not rewritten"""
+    cols = ', '.join(columns)
+    updates = [c for c in columns if c not in table.key]
+    compared = [c for c in updates if c not in TIMESTAMP_COLUMNS] or updates
+    sql = f"INSERT INTO {table.name} ({cols}) SELECT {cols} FROM {source} ON CONFLICT ({', '.join(table.key)}) "
+    if not updates:
+        return sql + "DO NOTHING"
+    assignments = ', '.join(f"{c} = EXCLUDED.{c}" for c in updates)
+    current = ', '.join(f"{table.name}.{c}" for c in compared)
+    incoming = ', '.join(f"EXCLUDED.{c}" for c in compared)
+    return sql + f"DO UPDATE SET {assignments} WHERE ({current}) IS DISTINCT FROM ({incoming})"
+
+
+def copy_options(fmt: str) -> str:
+    return " WITH (FORMAT csv, HEADER true)" if fmt == 'csv.gz' else ''
+
+
+def open_chunk(path: str, fmt: str):
+    return gzip.open(path, 'rb') if fmt == 'csv.gz' else open(path, 'rb')
+
+
+def stage_chunk(cur, table: SyncTable, columns: Sequence[str], path: str, fmt: str) -> str:
+    """COPY one chunk file into a temp staging table (dropped at commit); returns its name"""
+    stage = f"stage_{table.name}"
+    cur.execute(f"CREATE TEMP TABLE {stage} ON COMMIT DROP AS "
+                f"SELECT {', '.join(columns)} FROM {table.name} WITH NO DATA")
+    with cur.copy(f"COPY {stage} ({', '.join(columns)}) FROM STDIN{copy_options(fmt)}") as copy:
+        with open_chunk(path, fmt) as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                copy.write(block)
+    return stage
+
+
+def connect_postgres(database_url: str):
+    """Autocommit connection: every load_chunk() is its own transaction"""
+    return require_psycopg().connect(database_url, autocommit=True)
+
+
+def loaded_chunks(pg) -> set:
+    """Checksums of chunks already merged by an earlier (possibly interrupted) load"""
+    with pg.cursor() as cur:
+        cur.execute(LOADED_CHUNKS_DDL)
+        cur.execute("SELECT sha256 FROM sync_loaded_chunks")
+        return {row[0] for row in cur.fetchall()}
+
+
+def load_chunk(pg, table: SyncTable, columns: Sequence[str], path: str, fmt: str, chunk: Dict[str, Any]) -> int:
+    """Stage and merge one chunk in its own transaction; returns rows inserted or changed"""
+    with pg.transaction():
+        with pg.cursor() as cur:
+            stage = stage_chunk(cur, table, columns, path, fmt)
+            cur.execute(upsert_sql(table, columns, stage))
+            changed = cur.rowcount
+            cur.execute(
+                "INSERT INTO sync_loaded_chunks (sha256, table_name, file, row_count) VALUES (%s, %s, %s, %s) "
+                "ON CONFLICT (sha256) DO UPDATE SET loaded_at = now()",
+                (chunk['sha256'], table.name, chunk['file'], chunk['rows']),
+            )
+    return changed
+
+
+def bump_sequences(pg, tables: Iterable[SyncTable]):
+    """Move id sequences past the loaded ids so app inserts don't collide"""
+    with pg.transaction():
+        with pg.cursor() as cur:
+            for table in tables:
+                if table.serial:
+                    cur.execute(f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                                f"GREATEST((SELECT MAX(id) FROM {table.name}), 1))")
+
+
+# --- Change capture -----------------------------------------------------------
+
+def read_watermarks(conn: sqlite3.Connection, race_id: int) -> Dict[str, Dict[str, Optional[str]]]:
+    """Per-table changed_at/deleted_at of the race already applied to Postgres"""
+    return {
+        row[0]: {'changed_at': row[1], 'deleted_at': row[2]}
+        for row in conn.execute(
+            "SELECT table_name, changed_at, deleted_at FROM sync_watermarks WHERE race_id = ?", (race_id,))
+    }
+
+
+def _since(watermark: Optional[str]) -> Tuple[str, Dict[str, Any]]:
+    """SQL bound for rows stamped after the watermark"""
+    if watermark is None:
+        return '', {}
+    return " > :since", {'since': watermark}
+
+
+def _settled(newest: Optional[str], watermark: Optional[str], horizon: str) -> Optional[str]:
+    """Next watermark: the newest stamp seen, but not past the settle horizon"""
+    if newest is not None and newest > horizon:
+        newest = horizon
+    if newest is None or (watermark is not None and newest < watermark):
+        return watermark
+    return newest
+
+
+def changed_rows(conn: sqlite3.Connection, table: SyncTable, columns: Sequence[str], race_id: int,
+                 watermark: Optional[str]) -> Tuple[List[List[Any]], Optional[str]]:
+    """The race's rows updated after the watermark and the newest updated_at among them"""
+    bound, params = _since(watermark)
+    where = f" WHERE updated_at{bound}" if bound else ''
+    bool_flags = [c in table.booleans for c in columns]
+    rows = []
+    newest = None
+    # No ORDER BY: sorting by key makes SQLite scan the table in key order instead
+    # of using the updated_at index (scripts/benchmark-queries.py changed_performances)
+    for row in conn.execute(f"SELECT updated_at, {', '.join(columns)} FROM ({table.source}){where}",
+                            {'race_id': race_id, **params}):
+        rows.append([bool(v) if is_bool and v is not None else v for v, is_bool in zip(row[1:], bool_flags)])
+        if row[0] is not None and (newest is None or row[0] > newest):
+            newest = row[0]
+    return rows, newest
+
+
+def deleted_keys(conn: sqlite3.Connection, table: SyncTable, race_id: int,
+                 watermark: Optional[str]) -> Tuple[List[List[Any]], Optional[str]]:
+    """
+    Keys deleted since the watermark that the race doesn't have locally any more,
+    and the newest deleted_at seen. A key that was deleted and inserted again
+    (runner_pbs and teams are rebuilt that way) is an upsert, not a delete.
+    Tombstones of other races' rows are sent too; Postgres doesn't have them,
+    so deleting them is a no-op.
+    """
+    bound, params = _since(watermark)
+    params = {'table_name': table.name, 'race_id': race_id, **params}
+    match = ' AND '.join(f"t.{c} = json_extract(s.row_key, '$[{i}]')" for i, c in enumerate(table.key))
+    newest = conn.execute(
+        f"SELECT MAX(deleted_at) FROM sync_tombstones "
+        f"WHERE table_name = :table_name{' AND deleted_at' + bound if bound else ''}",
+        params,
+    ).fetchone()[0]
+    keys = [
+        json.loads(row[0]) for row in conn.execute(
+            f"SELECT DISTINCT s.row_key FROM sync_tombstones s "
+            f"WHERE s.table_name = :table_name{' AND s.deleted_at' + bound if bound else ''} "
+            f"AND NOT EXISTS (SELECT 1 FROM ({table.source}) t WHERE {match})",
+            params,
+        )
+    ]
+    return keys, newest
+
+
+def build_delta(conn: sqlite3.Connection, tables: Sequence[SyncTable], race_id: int,
+                full: bool = False) -> Dict[str, Any]:
+    """
+    Collect the race's changed and deleted rows per table from one read snapshot.
+
+    'until' holds the watermarks to store once the batch is applied; full=True
+    ignores the stored watermarks (every row, every recorded delete).
+    """
+    import uuid  # Pulls in platform; only needed here, not at every export/sync start
+    watermarks = {} if full else read_watermarks(conn, race_id)
+    batch = {
+        'batch_id': uuid.uuid4().hex,
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
+        'race_id': race_id,
+        'since': {},
+        'until': {},
+        'tables': [],
+    }
+    conn.execute("BEGIN")
+    try:
+        horizon = conn.execute(f"SELECT datetime('now', '-{SETTLE_SECONDS} seconds')").fetchone()[0]
+        for table in tables:
+            columns = export_columns(conn, table)
+            if not columns:
+                continue
+            mark = watermarks.get(table.name, {})
+            upserts, changed_at = changed_rows(conn, table, columns, race_id, mark.get('changed_at'))
+            deletes, deleted_at = deleted_keys(conn, table, race_id, mark.get('deleted_at'))
+            batch['since'][table.name] = mark
+            batch['until'][table.name] = {
+                'changed_at': _settled(changed_at, mark.get('changed_at'), horizon),
+                'deleted_at': _settled(deleted_at, mark.get('deleted_at'), horizon),
+            }
+            if upserts or deletes:
+                batch['tables'].append({'name': table.name, 'key': list(table.key), 'columns': columns,
+                                        'upserts': upserts, 'deletes': deletes})
+    finally:
+        conn.rollback()
+    return batch
+
+
+def write_delta(batch: Dict[str, Any], path: str):
+    """Gzipped JSON lines: the batch header, then one line per changed table"""
+    header = {k: v for k, v in batch.items() if k != 'tables'}
+    with gzip.open(path + '.part', 'wt', encoding='utf-8') as f:
+        f.write(json.dumps(header, separators=(',', ':')) + '\n')
+        for entry in batch['tables']:
+            f.write(json.dumps(entry, separators=(',', ':'), ensure_ascii=False) + '\n')
+    os.replace(path + '.part', path)
+
+
+def read_delta(path: str) -> Dict[str, Any]:
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        batch = json.loads(f.readline())
+        batch['tables'] = [json.loads(line) for line in f if line.strip()]
+    return batch
+
+
+def _stage_rows(cur, table: SyncTable, columns: Sequence[str], rows: Iterable[Sequence[Any]], stage: str):
+    cur.execute(f"CREATE TEMP TABLE {stage} ON COMMIT DROP AS "
+                f"SELECT {', '.join(columns)} FROM {table.name} WITH NO DATA")
+    with cur.copy(f"COPY {stage} ({', '.join(columns)}) FROM STDIN") as copy:
+        for row in rows:
+            copy.write_row(row)
+
+
+def apply_delta(pg, batch: Dict[str, Any], force: bool = False) -> Optional[Dict[str, Dict[str, int]]]:
+    """
+    Apply a delta batch in one transaction; returns per-table upsert/delete counts,
+    or None when this batch was already applied.
+
+    Deletes run first, children before parents, then upserts in foreign-key order.
+    Applying the same batch twice is a no-op; a batch older than one already
+    applied is refused (it would undo newer changes) unless force=True.
+    """
+    with pg.transaction():
+        with pg.cursor() as cur:
+            cur.execute(DELTA_BATCHES_DDL)
+            cur.execute("LOCK TABLE sync_delta_batches IN EXCLUSIVE MODE")
+            if not force:
+                cur.execute("SELECT 1 FROM sync_delta_batches WHERE batch_id = %s", (batch['batch_id'],))
+                if cur.fetchone():
+                    return None
+                cur.execute("SELECT MAX(created_at) FROM sync_delta_batches")
+                newest = cur.fetchone()[0]
+                if newest is not None and newest > datetime.fromisoformat(batch['created_at']):
+                    raise ValueError(f"A newer batch (from {newest.isoformat()}) was already applied; "
+                                     f"build a new batch instead")
+
+            entries = {entry['name']: entry for entry in batch['tables']}
+            ordered = [TABLES_BY_NAME[t.name] for t in SYNC_TABLES if t.name in entries]
+
+            counts = {table.name: {'changed': 0, 'deleted': 0} for table in ordered}
+
+            for table in reversed(ordered):
+                keys = entries[table.name]['deletes']
+                if keys:
+                    stage = f"gone_{table.name}"
+                    _stage_rows(cur, table, table.key, keys, stage)
+                    match = ' AND '.join(f"{table.name}.{c} = {stage}.{c}" for c in table.key)
+                    cur.execute(f"DELETE FROM {table.name} USING {stage} WHERE {match}")
+                    counts[table.name]['deleted'] = cur.rowcount
+
+            for table in ordered:
+                entry = entries[table.name]
+                if entry['upserts']:
+                    stage = f"stage_{table.name}"
+                    _stage_rows(cur, table, entry['columns'], entry['upserts'], stage)
+                    cur.execute(upsert_sql(table, entry['columns'], stage))
+                    counts[table.name]['changed'] = cur.rowcount
+
+            cur.execute(
+                "INSERT INTO sync_delta_batches (batch_id, created_at, upserts, deletes) VALUES (%s, %s, %s, %s) "
+                "ON CONFLICT (batch_id) DO UPDATE SET applied_at = now()",
+                (batch['batch_id'], batch['created_at'],
+                 sum(len(e['upserts']) for e in batch['tables']), sum(len(e['deletes']) for e in batch['tables'])),
+            )
+        bump_sequences(pg, ordered)
+    return counts
+
+
+def advance_watermarks(conn: sqlite3.Connection, batch: Dict[str, Any]):
+    """
+    Record an applied batch's watermarks for its race (never moving one back;
+    another race's watermark is replaced) and drop tombstones it has synced
+    """
+    race_id = batch.get('race_id')
+    current = read_watermarks(conn, race_id)
+    for name, mark in batch['until'].items():
+        stored = current.get(name, {})
+        changed_at = max(filter(None, (stored.get('changed_at'), mark['changed_at'])), default=None)
+        deleted_at = max(filter(None, (stored.get('deleted_at'), mark['deleted_at'])), default=None)
+        conn.execute(
+            "INSERT OR REPLACE INTO sync_watermarks (table_name, race_id, changed_at, deleted_at, synced_at) "
+            "VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)",
+            (name, race_id, changed_at, deleted_at),
+        )
+        if deleted_at:
+            conn.execute("DELETE FROM sync_tombstones WHERE table_name = ? AND deleted_at <= ?", (name, deleted_at))
+    conn.commit()
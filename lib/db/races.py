@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Championships (races) in the local database.
+
+Each entry list belongs to one race (runners.race_id), so several fields
+(2023, 2024, 2025, ...) live side by side in one database; entry ids are only
+unique within a race. DUV performance history is stored once per athlete
+(performances.duv_id) and shared by every race the athlete entered; PB
+windows and season bests count back from each race's race_date.
+
+The Python tools take --race: a race id or name, defaulting to the race with
+the latest race_date. Entry list imports create the race if --race names a
+new one (with --race-date), or the default championship below on an empty
+database.
+
+Usage:
+    from races import resolve_race
+
+    race = resolve_race(conn, args.race)  # {'id': 1, 'name': ..., 'race_date': '2025-10-17'}
+"""
+
+import re
+import sqlite3
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+# The championship every database had before races existed (see sqlite_db.migrate_races)
+DEFAULT_RACE_NAME = 'IAU 24H World Championships 2025'
+DEFAULT_RACE_DATE = '2025-10-17'
+
+ISO_DATE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
+
+def _row(cursor: sqlite3.Cursor) -> Optional[Dict[str, Any]]:
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    return {'id': row[0], 'name': row[1], 'race_date': row[2]}
+
+
+def race_year(race: Dict[str, Any]) -> int:
+    return int(race['race_date'][:4])
+
+
+def list_races(conn: sqlite3.Connection) -> List[Dict[str, Any]]:
+    """Every race with its runner count, newest first"""
+    rows = conn.execute("""
+        SELECT ra.id, ra.name, ra.race_date,
+               (SELECT COUNT(*) FROM runners r WHERE r.race_id = ra.id) AS runners
+        FROM races ra
+        ORDER BY ra.race_date DESC, ra.id DESC
+    """).fetchall()
+    return [{'id': r[0], 'name': r[1], 'race_date': r[2], 'runners': r[3]} for r in rows]
+
+
+def check_date(race_date: str) -> str:
+    if not ISO_DATE.match(race_date or ''):
+        raise ValueError(f"Race date must be YYYY-MM-DD, got {race_date!r}")
+    try:
+        date.fromisoformat(race_date)
+    except ValueError as e:  # 2025-02-30
+        raise ValueError(f"Invalid race date {race_date!r}: {e}")
+    return race_date
+
+
+def create_race(conn: sqlite3.Connection, name: str, race_date: str) -> Dict[str, Any]:
+    check_date(race_date)
+    cursor = conn.execute("INSERT INTO races (name, race_date) VALUES (?, ?)", (name, race_date))
+    return {'id': cursor.lastrowid, 'name': name, 'race_date': race_date}
+
+
+def resolve_race(conn: sqlite3.Connection, race: Optional[str] = None, race_date: Optional[str] = None,
+                 create: bool = False) -> Dict[str, Any]:
+    """
+    Look up a --race argument (id or name, case-insensitive; None = latest race).
+
+    With create=True (entry list imports) a new name is created with race_date,
+    an empty database gets the default championship, and race_date corrects the
+    date of an existing race. Raises ValueError for unknown races.
+    """
+    if race is None:
+        found = _row(conn.execute("SELECT id, name, race_date FROM races ORDER BY race_date DESC, id DESC LIMIT 1"))
+        if found is None:
+            if not create:
+                raise ValueError("No races in the database yet; import an entry list first")
+            return create_race(conn, DEFAULT_RACE_NAME, race_date or DEFAULT_RACE_DATE)
+    elif race.strip().isdigit():
+        found = _row(conn.execute("SELECT id, name, race_date FROM races WHERE id = ?", (int(race),)))
+        if found is None:
+            raise ValueError(f"No race with id {race}")
+    else:
+        found = _row(conn.execute("SELECT id, name, race_date FROM races WHERE name = ? COLLATE NOCASE",
+                                  (race.strip(),)))
+        if found is None:
+            if create and race_date:
+                return create_race(conn, race.strip(), race_date)
+            known = ', '.join(f"{r['id']}: {r['name']}" for r in list_races(conn)) or 'none'
+            hint = "; pass --race-date to create it" if create else ""
+            raise ValueError(f"Unknown race {race!r} (known races: {known}){hint}")
+
+    if create and race_date and check_date(race_date) != found['race_date']:
+        conn.execute("UPDATE races SET race_date = ? WHERE id = ?", (race_date, found['id']))
+        found['race_date'] = race_date
+    return found
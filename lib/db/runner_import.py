@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Shared runner import for the entry list parse scripts.
+
+Every import targets one race (lib/db/races.py); other races' fields are
+never touched. A full import wipes the race's runners and everything derived
+from them (match candidates, PBs, teams); DUV performance history belongs to
+the athlete and is kept for the next match. An incremental import diffs the
+parsed entry list against the race's existing runners instead, so a revised
+list with a few withdrawals or promoted reserves keeps DUV matches:
+
+- existing runners are matched by entry_id + name, then by name/nationality
+  (entry ids shift when an earlier runner withdraws), then by entry_id alone
+  when only one name part was corrected, then by a unique surname/country/gender
+- new runners are inserted as 'unmatched'
+- changed runners are updated in place (duv_id, candidates, performances kept)
+- runners missing from the new list are soft-deleted with dns = 1, and
+  reinstated if they reappear in a later list
+
+Teams are left as they are; recalculate them after an incremental import.
+
+Usage:
+    from runner_import import import_runners
+
+    summary = import_runners(conn, runners, race_id, incremental=True)
+
+    # In an import script: --incremental/--race/--race-date, then save
+    from runner_import import add_import_args, save_runners
+
+    add_import_args(parser)
+    save_runners(runners, db_path, incremental=args.incremental, race=args.race, race_date=args.race_date)
+"""
+
+import sys
+import sqlite3
+from typing import Any, Dict, List, Optional, Tuple
+
+from races import resolve_race
+from sqlite_db import ensure_columns, get_connection
+
+RUNNER_FIELDS = ('entry_id', 'firstname', 'lastname', 'nationality', 'gender')
+
+
+def name_key(runner: Dict[str, Any]) -> Tuple[str, str, str]:
+    """Fallback identity: case-insensitive name + nationality"""
+    return (
+        ' '.join(runner['firstname'].lower().split()),
+        ' '.join(runner['lastname'].lower().split()),
+        runner['nationality'].upper(),
+    )
+
+
+def _is_name_correction(old: Dict[str, Any], new: Dict[str, Any]) -> bool:
+    """Same entry_id, country and gender with one name part unchanged"""
+    if old['nationality'] != new['nationality'] or old['gender'] != new['gender']:
+        return False
+    old_first, old_last, _ = name_key(old)
+    new_first, new_last, _ = name_key(new)
+    return old_first == new_first or old_last == new_last
+
+
+def diff_runners(existing: List[Dict[str, Any]], parsed: List[Dict[str, Any]]) -> Dict[str, list]:
+    """
+    Diff parsed runners against existing rows (dicts with id, dns and RUNNER_FIELDS).
+
+    Returns inserts (parsed runners), updates ((existing row, parsed runner) pairs
+    whose fields changed or that must be reinstated), unchanged (existing rows)
+    and withdrawn (existing active rows missing from the parsed list).
+    """
+    matched: Dict[int, Dict[str, Any]] = {}  # parsed index -> existing row
+    used = set()
+
+    def match(candidates: Dict[Any, List[Dict[str, Any]]], key_of, accept=None):
+        for idx, runner in enumerate(parsed):
+            if idx in matched:
+                continue
+            for row in candidates.get(key_of(runner), []):
+                if row['id'] not in used and (accept is None or accept(row, runner)):
+                    matched[idx] = row
+                    used.add(row['id'])
+                    break
+
+    by_entry: Dict[Any, List[Dict[str, Any]]] = {}
+    by_name: Dict[Any, List[Dict[str, Any]]] = {}
+    # Active rows first so a reappearing name prefers the runner still on the list
+    for row in sorted(existing, key=lambda r: (bool(r['dns']), r['id'])):
+        by_entry.setdefault(row['entry_id'], []).append(row)
+        by_name.setdefault(name_key(row), []).append(row)
+
+    match(by_entry, lambda r: r['entry_id'], lambda row, r: name_key(row) == name_key(r))
+    match(by_name, name_key)
+    match(by_entry, lambda r: r['entry_id'], _is_name_correction)
+
+    # Firstname corrected on a runner whose entry_id also moved: accept a surname
+    # match only when it is unambiguous on both sides
+    def surname_key(r):
+        return name_key(r)[1], r['nationality'].upper(), r['gender']
+
+    open_rows: Dict[Any, List[Dict[str, Any]]] = {}
+    for row in existing:
+        if row['id'] not in used:
+            open_rows.setdefault(surname_key(row), []).append(row)
+    open_parsed: Dict[Any, List[int]] = {}
+    for idx, runner in enumerate(parsed):
+        if idx not in matched:
+            open_parsed.setdefault(surname_key(runner), []).append(idx)
+    for key, indexes in open_parsed.items():
+        rows = open_rows.get(key, [])
+        if len(indexes) == 1 and len(rows) == 1:
+            matched[indexes[0]] = rows[0]
+            used.add(rows[0]['id'])
+
+    inserts, updates, unchanged = [], [], []
+    for idx, runner in enumerate(parsed):
+        row = matched.get(idx)
+        if row is None:
+            inserts.append(runner)
+        elif row['dns'] or any(row[f] != runner[f] for f in RUNNER_FIELDS):
+            updates.append((row, runner))
+        else:
+            unchanged.append(row)
+
+    withdrawn = [row for row in existing if row['id'] not in used and not row['dns']]
+
+    return {'inserts': inserts, 'updates': updates, 'unchanged': unchanged, 'withdrawn': withdrawn}
+
+
+def replace_runners(conn: sqlite3.Connection, runners: List[Dict[str, Any]], race_id: int) -> Dict[str, int]:
+    """Full import: clear the race's runners and derived data, then insert every runner"""
+    cursor = conn.cursor()
+
+    in_race = "runner_id IN (SELECT id FROM runners WHERE race_id = ?)"
+    cursor.execute(f"DELETE FROM match_candidates WHERE {in_race}", (race_id,))
+    cursor.execute(f"DELETE FROM runner_pbs WHERE {in_race}", (race_id,))
+    cursor.execute(f"DELETE FROM fetch_failures WHERE {in_race}", (race_id,))
+    cursor.execute("DELETE FROM teams WHERE race_id = ?", (race_id,))
+    cursor.execute("DELETE FROM runners WHERE race_id = ?", (race_id,))
+
+    cursor.executemany("""
+        INSERT INTO runners (race_id, entry_id, firstname, lastname, nationality, gender, match_status)
+        VALUES (?, ?, ?, ?, ?, ?, 'unmatched')
+    """, [(race_id, *(r[f] for f in RUNNER_FIELDS)) for r in runners])
+
+    return {'inserted': len(runners), 'updated': 0, 'unchanged': 0, 'withdrawn': 0}
+
+
+def apply_incremental(conn: sqlite3.Connection, runners: List[Dict[str, Any]], race_id: int) -> Dict[str, int]:
+    """Incremental import: insert, update and soft-delete only what changed in the race"""
+    ensure_columns(conn)  # runners.dns on databases older than schema.sql
+    cursor = conn.cursor()
+    cursor.row_factory = sqlite3.Row
+    existing = [dict(row) for row in cursor.execute(
+        f"SELECT id, dns, {', '.join(RUNNER_FIELDS)} FROM runners WHERE race_id = ?", (race_id,)
+    )]
+    cursor = conn.cursor()
+
+    diff = diff_runners(existing, runners)
+
+    # entry_id is UNIQUE within the race: park every id that moves (or that a withdrawn row still
+    # holds but the new list reuses) before writing final values
+    claimed = {r['entry_id'] for r in runners}
+    parked = [row['id'] for row, runner in diff['updates'] if row['entry_id'] != runner['entry_id']]
+    parked += [row['id'] for row in existing
+               if row['id'] not in {r['id'] for r, _ in diff['updates']}
+               and row['id'] not in {r['id'] for r in diff['unchanged']}
+               and row['entry_id'] in claimed]
+    cursor.executemany(
+        "UPDATE runners SET entry_id = 'dns-' || id WHERE id = ?",
+        [(row_id,) for row_id in parked]
+    )
+
+    cursor.executemany("""
+        UPDATE runners
+        SET entry_id = ?, firstname = ?, lastname = ?, nationality = ?, gender = ?,
+            dns = 0, updated_at = CURRENT_TIMESTAMP
+        WHERE id = ?
+    """, [(*(runner[f] for f in RUNNER_FIELDS), row['id']) for row, runner in diff['updates']])
+
+    cursor.executemany("""
+        UPDATE runners SET dns = 1, updated_at = CURRENT_TIMESTAMP WHERE id = ?
+    """, [(row['id'],) for row in diff['withdrawn']])
+
+    cursor.executemany("""
+        INSERT INTO runners (race_id, entry_id, firstname, lastname, nationality, gender, match_status)
+        VALUES (?, ?, ?, ?, ?, ?, 'unmatched')
+    """, [(race_id, *(r[f] for f in RUNNER_FIELDS)) for r in diff['inserts']])
+
+    return {
+        'inserted': len(diff['inserts']),
+        'updated': len(diff['updates']),
+        'unchanged': len(diff['unchanged']),
+        'withdrawn': len(diff['withdrawn']),
+    }
+
+
+def import_runners(conn: sqlite3.Connection, runners: List[Dict[str, Any]], race_id: int,
+                   incremental: bool = False) -> Dict[str, int]:
+    """Import parsed runners into a race in one transaction and return counts per action"""
+    try:
+        if incremental:
+            summary = apply_incremental(conn, runners, race_id)
+        else:
+            summary = replace_runners(conn, runners, race_id)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return summary
+
+
+def format_summary(summary: Dict[str, int]) -> str:
+    return (f"{summary['inserted']} inserted, {summary['updated']} updated, "
+            f"{summary['unchanged']} unchanged, {summary['withdrawn']} marked DNS")
+
+
+def save_runners(runners: List[Dict[str, Any]], db_path: str, incremental: bool = False,
+                 race: Optional[str] = None, race_date: Optional[str] = None) -> Dict[str, int]:
+    """
+    Import runners into a race of the database at db_path and print the summary.
+
+    The race is resolved like --race/--race-date (races.resolve_race), creating
+    it when a new name comes with a date; raises ValueError otherwise.
+    """
+    conn = get_connection(db_path)
+    race_row = resolve_race(conn, race, race_date, create=True)
+    print(f"Saving {len(runners)} runners to {race_row['name']} in database: {db_path}", file=sys.stderr)
+    summary = import_runners(conn, runners, race_row['id'], incremental=incremental)
+    print(f"✓ Saved runners ({format_summary(summary)})", file=sys.stderr)
+    return summary
+
+
+def add_import_args(parser) -> None:
+    """The --incremental, --race and --race-date options of every entry list import script"""
+    parser.add_argument('--incremental', action='store_true',
+                        help='Diff against existing runners (keep matches/performances, mark withdrawals DNS) instead of wiping')
+    parser.add_argument('--race', help='Race id or name to import into (default: the latest race; a new name needs --race-date)')
+    parser.add_argument('--race-date', help='Race date (YYYY-MM-DD) of a new race, or a correction for an existing one')
@@ -38,14 +38,35 @@ CREATE TABLE IF NOT EXISTS performances (
     event_id INTEGER NOT NULL,
     event_name TEXT NOT NULL,
     event_date TEXT NOT NULL,  -- ISO date
-    distance REAL NOT NULL,  -- km for 24h races
+    distance REAL NOT NULL,  -- Legacy: km for timed events, first number of the time otherwise; use distance_km/duration_sec
     rank INTEGER,
     event_type TEXT NOT NULL,  -- '24h', '100km', etc.
+    distance_km REAL,  -- Result for timed events, event length for fixed-distance events
+    duration_sec INTEGER,  -- Result for fixed-distance events, event length for timed events
+    performance_text TEXT,  -- Raw DUV result, e.g. '245.123 km' or '7:12:33 h'
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
 
     FOREIGN KEY (runner_id) REFERENCES runners(id) ON DELETE CASCADE
 );
 
+-- Discipline PBs: Materialized per runner and event type from performances
+CREATE TABLE IF NOT EXISTS runner_pbs (
+    runner_id INTEGER NOT NULL,
+    event_type TEXT NOT NULL,  -- '24h', '100km', etc.
+    pb_all_time REAL,
+    pb_all_time_year INTEGER,
+    pb_last_2_years REAL,  -- Best inside the PB window (3 years before race date)
+    pb_last_2_years_year INTEGER,
+    season_best REAL,
+    season_best_year INTEGER,
+    unit TEXT,  -- 'km' for timed events, 's' (seconds) for fixed-distance events
+    race_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    PRIMARY KEY (runner_id, event_type),
+    FOREIGN KEY (runner_id) REFERENCES runners(id) ON DELETE CASCADE
+);
+
 -- DUV match candidates: For manual review
 CREATE TABLE IF NOT EXISTS match_candidates (
     id SERIAL PRIMARY KEY,
@@ -112,13 +133,17 @@ CREATE TABLE IF NOT EXISTS runner_notes (
 );
 
 -- Indexes for performance
-CREATE INDEX IF NOT EXISTS idx_runners_nationality_gender ON runners(nationality, gender);
+CREATE INDEX IF NOT EXISTS idx_runners_nationality_gender_pb ON runners(nationality, gender, personal_best_all_time);
 CREATE INDEX IF NOT EXISTS idx_runners_duv_id ON runners(duv_id);
 CREATE INDEX IF NOT EXISTS idx_runners_match_status ON runners(match_status);
-CREATE INDEX IF NOT EXISTS idx_performances_runner_id ON performances(runner_id);
+CREATE INDEX IF NOT EXISTS idx_runners_gender_pb_all_time ON runners(gender, personal_best_all_time);
+CREATE INDEX IF NOT EXISTS idx_runners_gender_pb_last_2_years ON runners(gender, personal_best_last_2_years);
+CREATE INDEX IF NOT EXISTS idx_performances_runner_date ON performances(runner_id, event_date);
 CREATE INDEX IF NOT EXISTS idx_performances_event_date ON performances(event_date);
+CREATE INDEX IF NOT EXISTS idx_runner_pbs_event_type ON runner_pbs(event_type, pb_all_time);
 CREATE INDEX IF NOT EXISTS idx_match_candidates_runner_id ON match_candidates(runner_id);
 CREATE INDEX IF NOT EXISTS idx_teams_nationality_gender ON teams(nationality, gender);
+CREATE INDEX IF NOT EXISTS idx_teams_metric_gender_rank ON teams(metric, gender, rank);
 CREATE INDEX IF NOT EXISTS idx_runner_notes_runner_id ON runner_notes(runner_id);
 CREATE INDEX IF NOT EXISTS idx_runner_notes_news_id ON runner_notes(news_id);
 
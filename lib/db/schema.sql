@@ -1,9 +1,18 @@
 -- SQLite Schema for IAU 24h World Championships Runner Analytics
 
--- Runners table: Core runner data from entry list + DUV matching
+-- Races: One row per championship; every entry list belongs to one race
+CREATE TABLE IF NOT EXISTS races (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT UNIQUE NOT NULL,
+    race_date TEXT NOT NULL,  -- ISO date; PB windows and season bests count back from it
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Runners table: Core runner data from entry list + DUV matching (one row per race entered)
 CREATE TABLE IF NOT EXISTS runners (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
-    entry_id TEXT UNIQUE NOT NULL,
+    race_id INTEGER NOT NULL,
+    entry_id TEXT NOT NULL,  -- Unique within the race
     firstname TEXT NOT NULL,
     lastname TEXT NOT NULL,
     nationality TEXT NOT NULL,  -- ISO 3166-1 alpha-3
@@ -22,23 +31,51 @@ CREATE TABLE IF NOT EXISTS runners (
     personal_best_last_2_years_year INTEGER,  -- Year when last-2-years PB was set
     date_of_birth TEXT,  -- ISO date
     age INTEGER,
+    duv_fetched_at TIMESTAMP,  -- Last successful DUV profile fetch (refresh staleness)
+    dns INTEGER NOT NULL DEFAULT 0,  -- Did Not Start: withdrawn from the latest entry list
+    search_name TEXT,  -- Accent/case-folded "lastname firstname", filled by view-runners.py (NULL = stale)
 
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    UNIQUE(race_id, entry_id),
+    FOREIGN KEY (race_id) REFERENCES races(id) ON DELETE CASCADE
 );
 
--- Performance history: Individual race results from DUV
+-- Performance history: Individual race results from DUV, stored once per athlete and
+-- shared by every race the athlete entered (runners.duv_id)
 CREATE TABLE IF NOT EXISTS performances (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
-    runner_id INTEGER NOT NULL,
+    duv_id INTEGER NOT NULL,
     event_id INTEGER NOT NULL,
     event_name TEXT NOT NULL,
     event_date TEXT NOT NULL,  -- ISO date
-    distance REAL NOT NULL,  -- km for 24h races
+    distance REAL NOT NULL,  -- Legacy: km for timed events, first number of the time otherwise; use distance_km/duration_sec
     rank INTEGER,
     event_type TEXT NOT NULL,  -- '24h', '100km', etc.
+    distance_km REAL,  -- Result for timed events, event length for fixed-distance events
+    duration_sec INTEGER,  -- Result for fixed-distance events, event length for timed events
+    performance_text TEXT,  -- Raw DUV result, e.g. '245.123 km' or '7:12:33 h'
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Discipline PBs: Materialized per runner and event type from the athlete's performances
+-- before the runner's race date
+CREATE TABLE IF NOT EXISTS runner_pbs (
+    runner_id INTEGER NOT NULL,
+    event_type TEXT NOT NULL,  -- '24h', '100km', etc.
+    pb_all_time REAL,
+    pb_all_time_year INTEGER,
+    pb_last_2_years REAL,  -- Best inside the PB window (3 years before the race date)
+    pb_last_2_years_year INTEGER,
+    season_best REAL,
+    season_best_year INTEGER,
+    unit TEXT,  -- 'km' for timed events, 's' (seconds) for fixed-distance events
+    race_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
 
+    PRIMARY KEY (runner_id, event_type),
     FOREIGN KEY (runner_id) REFERENCES runners(id) ON DELETE CASCADE
 );
 
@@ -55,13 +92,27 @@ CREATE TABLE IF NOT EXISTS match_candidates (
     personal_best TEXT,  -- Raw DUV PB string
     confidence REAL NOT NULL,  -- 0.0 to 1.0
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
 
     FOREIGN KEY (runner_id) REFERENCES runners(id) ON DELETE CASCADE
 );
 
--- Teams: Calculated team rankings (materialized view)
+-- Failed DUV profile fetches: Retry queue (attempts >= 5 are dead letters)
+CREATE TABLE IF NOT EXISTS fetch_failures (
+    duv_id INTEGER PRIMARY KEY,
+    runner_id INTEGER NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    last_attempt_at TIMESTAMP,
+    next_attempt_at TIMESTAMP,  -- Exponential backoff from last attempt
+
+    FOREIGN KEY (runner_id) REFERENCES runners(id) ON DELETE CASCADE
+);
+
+-- Teams: Calculated team rankings per race (materialized view)
 CREATE TABLE IF NOT EXISTS teams (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
+    race_id INTEGER NOT NULL,
     nationality TEXT NOT NULL,
     gender TEXT NOT NULL CHECK(gender IN ('M', 'W')),
     metric TEXT NOT NULL CHECK(metric IN ('all-time', 'last-2-years')),
@@ -75,30 +126,180 @@ CREATE TABLE IF NOT EXISTS teams (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
 
-    UNIQUE(nationality, gender, metric),
+    UNIQUE(race_id, nationality, gender, metric),
+    FOREIGN KEY (race_id) REFERENCES races(id) ON DELETE CASCADE,
     FOREIGN KEY (runner1_id) REFERENCES runners(id),
     FOREIGN KEY (runner2_id) REFERENCES runners(id),
     FOREIGN KEY (runner3_id) REFERENCES runners(id)
 );
 
+-- Change capture for scripts/sync-changes.py: keys of deleted rows (JSON array in
+-- lib/db/pg_sync.py SyncTable key order), pruned once synced
+CREATE TABLE IF NOT EXISTS sync_tombstones (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    table_name TEXT NOT NULL,
+    row_key TEXT NOT NULL,
+    deleted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Newest updated_at / deleted_at already applied to Postgres, per table
+CREATE TABLE IF NOT EXISTS sync_watermarks (
+    table_name TEXT PRIMARY KEY,
+    race_id INTEGER,  -- The race synced to Postgres; another race starts over without a watermark
+    changed_at TIMESTAMP,
+    deleted_at TIMESTAMP,
+    synced_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Last successful run of each scripts/run-pipeline.py stage per race, with the
+-- fingerprint of its inputs at the time; a stage whose inputs still match is skipped
+CREATE TABLE IF NOT EXISTS pipeline_runs (
+    race_id INTEGER NOT NULL,
+    stage TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    duration_sec REAL,
+    finished_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (race_id, stage),
+    FOREIGN KEY (race_id) REFERENCES races(id) ON DELETE CASCADE
+);
+
 -- Indexes for performance
-CREATE INDEX IF NOT EXISTS idx_runners_nationality_gender ON runners(nationality, gender);
-CREATE INDEX IF NOT EXISTS idx_runners_duv_id ON runners(duv_id);
-CREATE INDEX IF NOT EXISTS idx_runners_match_status ON runners(match_status);
-CREATE INDEX IF NOT EXISTS idx_performances_runner_id ON performances(runner_id);
+-- Runner lookups are scoped to one race, so race_id leads the runners indexes
+-- (race_id, nationality, gender, PB): a squad's top three is read straight off the index
+CREATE INDEX IF NOT EXISTS idx_runners_race_nationality_gender_pb ON runners(race_id, nationality, gender, personal_best_all_time);
+-- (duv_id, race_id) replaces the duv_id-only index (dropped by migrate_races' rebuild)
+CREATE INDEX IF NOT EXISTS idx_runners_duv_race ON runners(duv_id, race_id);
+CREATE INDEX IF NOT EXISTS idx_runners_race_match_status ON runners(race_id, match_status);
+-- view-runners --nationality pages come off this in entry_id order; with race_id alone the
+-- planner prefers walking (race_id, entry_id) for the order and filtering the nationality
+CREATE INDEX IF NOT EXISTS idx_runners_race_nationality_entry ON runners(race_id, nationality, entry_id);
+CREATE INDEX IF NOT EXISTS idx_runners_race_search_name ON runners(race_id, search_name);
+CREATE INDEX IF NOT EXISTS idx_runners_race_gender_pb_all_time ON runners(race_id, gender, personal_best_all_time);
+CREATE INDEX IF NOT EXISTS idx_runners_race_gender_pb_last_2_years ON runners(race_id, gender, personal_best_last_2_years);
+-- (duv_id, event_date): an athlete's history comes out in date order, and the PB
+-- materialization and refresh queue read only the results before a race date
+CREATE INDEX IF NOT EXISTS idx_performances_duv_date ON performances(duv_id, event_date);
 CREATE INDEX IF NOT EXISTS idx_performances_event_date ON performances(event_date);
+CREATE INDEX IF NOT EXISTS idx_runner_pbs_event_type ON runner_pbs(event_type, pb_all_time);
 CREATE INDEX IF NOT EXISTS idx_match_candidates_runner_id ON match_candidates(runner_id);
-CREATE INDEX IF NOT EXISTS idx_teams_nationality_gender ON teams(nationality, gender);
+CREATE INDEX IF NOT EXISTS idx_teams_race_metric_gender_rank ON teams(race_id, metric, gender, rank);
+CREATE INDEX IF NOT EXISTS idx_fetch_failures_next_attempt ON fetch_failures(next_attempt_at);
+CREATE INDEX IF NOT EXISTS idx_runners_updated_at ON runners(updated_at);
+CREATE INDEX IF NOT EXISTS idx_performances_updated_at ON performances(updated_at);
+CREATE INDEX IF NOT EXISTS idx_runner_pbs_updated_at ON runner_pbs(updated_at);
+CREATE INDEX IF NOT EXISTS idx_match_candidates_updated_at ON match_candidates(updated_at);
+CREATE INDEX IF NOT EXISTS idx_teams_updated_at ON teams(updated_at);
+CREATE INDEX IF NOT EXISTS idx_sync_tombstones_table ON sync_tombstones(table_name, deleted_at);
 
 -- Trigger to update updated_at timestamp
-CREATE TRIGGER IF NOT EXISTS update_runners_timestamp
+-- Only changes to synced columns stamp updated_at: a refetch that just moves
+-- duv_fetched_at, or a recomputed search_name, is not sent by sync-changes.py.
+-- Dropped first because older databases have a trigger that stamps every update
+DROP TRIGGER IF EXISTS update_runners_timestamp;
+CREATE TRIGGER update_runners_timestamp
 AFTER UPDATE ON runners
+WHEN NEW.updated_at IS OLD.updated_at
+AND (NEW.race_id, NEW.entry_id, NEW.firstname, NEW.lastname, NEW.nationality, NEW.gender, NEW.dns,
+     NEW.duv_id, NEW.match_status, NEW.match_confidence,
+     NEW.personal_best_all_time, NEW.personal_best_all_time_year,
+     NEW.personal_best_last_2_years, NEW.personal_best_last_2_years_year, NEW.date_of_birth, NEW.age)
+    IS NOT
+    (OLD.race_id, OLD.entry_id, OLD.firstname, OLD.lastname, OLD.nationality, OLD.gender, OLD.dns,
+     OLD.duv_id, OLD.match_status, OLD.match_confidence,
+     OLD.personal_best_all_time, OLD.personal_best_all_time_year,
+     OLD.personal_best_last_2_years, OLD.personal_best_last_2_years_year, OLD.date_of_birth, OLD.age)
 BEGIN
     UPDATE runners SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
 END;
 
+-- A runner matched to an athlete whose history is already stored (fetched for another
+-- race) shares it without a refetch; touch it so the next sync sends it for this runner
+CREATE TRIGGER IF NOT EXISTS share_performances_on_match
+AFTER UPDATE OF duv_id ON runners
+WHEN NEW.duv_id IS NOT NULL AND NEW.duv_id IS NOT OLD.duv_id
+BEGIN
+    UPDATE performances SET updated_at = CURRENT_TIMESTAMP WHERE duv_id = NEW.duv_id;
+END;
+
+-- A runner matched to another athlete hasn't had that profile fetched yet
+-- (fetch-performances.py --new-only picks it up)
+CREATE TRIGGER IF NOT EXISTS reset_runners_duv_fetched_at
+AFTER UPDATE OF duv_id ON runners
+WHEN NEW.duv_id IS NOT OLD.duv_id
+BEGIN
+    UPDATE runners SET duv_fetched_at = NULL WHERE id = NEW.id;
+END;
+
+-- Renamed runners need a new search_name; NULL marks it for recomputation
+CREATE TRIGGER IF NOT EXISTS reset_runners_search_name
+AFTER UPDATE OF firstname, lastname ON runners
+BEGIN
+    UPDATE runners SET search_name = NULL WHERE id = NEW.id;
+END;
+
 CREATE TRIGGER IF NOT EXISTS update_teams_timestamp
 AFTER UPDATE ON teams
 BEGIN
     UPDATE teams SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
 END;
+
+-- Only stamp updates that didn't set updated_at themselves (so the insert stamp below doesn't fire twice)
+CREATE TRIGGER IF NOT EXISTS update_performances_timestamp
+AFTER UPDATE ON performances
+WHEN NEW.updated_at IS OLD.updated_at
+BEGIN
+    UPDATE performances SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS update_match_candidates_timestamp
+AFTER UPDATE ON match_candidates
+WHEN NEW.updated_at IS OLD.updated_at
+BEGIN
+    UPDATE match_candidates SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+END;
+
+-- Databases that got updated_at via ALTER TABLE have no column default
+CREATE TRIGGER IF NOT EXISTS stamp_performances_insert
+AFTER INSERT ON performances
+WHEN NEW.updated_at IS NULL
+BEGIN
+    UPDATE performances SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS stamp_match_candidates_insert
+AFTER INSERT ON match_candidates
+WHEN NEW.updated_at IS NULL
+BEGIN
+    UPDATE match_candidates SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+END;
+
+-- Deleted rows for the next incremental sync
+CREATE TRIGGER IF NOT EXISTS record_runners_delete
+AFTER DELETE ON runners
+BEGIN
+    INSERT INTO sync_tombstones (table_name, row_key) VALUES ('runners', json_array(OLD.id));
+END;
+
+CREATE TRIGGER IF NOT EXISTS record_performances_delete
+AFTER DELETE ON performances
+BEGIN
+    INSERT INTO sync_tombstones (table_name, row_key) VALUES ('performances', json_array(OLD.id));
+END;
+
+CREATE TRIGGER IF NOT EXISTS record_runner_pbs_delete
+AFTER DELETE ON runner_pbs
+BEGIN
+    INSERT INTO sync_tombstones (table_name, row_key) VALUES ('runner_pbs', json_array(OLD.runner_id, OLD.event_type));
+END;
+
+CREATE TRIGGER IF NOT EXISTS record_match_candidates_delete
+AFTER DELETE ON match_candidates
+BEGIN
+    INSERT INTO sync_tombstones (table_name, row_key) VALUES ('match_candidates', json_array(OLD.id));
+END;
+
+CREATE TRIGGER IF NOT EXISTS record_teams_delete
+AFTER DELETE ON teams
+BEGIN
+    INSERT INTO sync_tombstones (table_name, row_key) VALUES ('teams', json_array(OLD.nationality, OLD.gender, OLD.metric));
+END;
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Shared SQLite access for the Python CLI tools.
+
+Every script gets its connections from here so they all run with the same
+settings and schema:
+
+- WAL journal with synchronous=NORMAL: readers never block the writer, so
+  match-runners, fetch-performances and view-runners can run side by side
+- busy_timeout: a writer waits for another writer's commit instead of
+  failing with "database is locked"
+- a 64 MB page cache, 256 MB mmap and in-memory temp tables
+- lib/db/schema.sql (plus columns added since a database was created, and
+  the move of single-championship databases to races) is applied once per
+  database per process
+
+Usage:
+    from sqlite_db import resolve_db_path, get_connection
+
+    conn = get_connection(resolve_db_path('data/iau24hwc.db'))
+"""
+
+import os
+import atexit
+import sqlite3
+import threading
+from typing import Dict, Iterator, Set
+
+from races import DEFAULT_RACE_DATE, DEFAULT_RACE_NAME
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+SCHEMA_PATH = os.path.join(REPO_ROOT, 'lib', 'db', 'schema.sql')
+DEFAULT_DB_PATH = 'data/iau24hwc.db'
+
+BUSY_TIMEOUT_MS = 10000
+PRAGMAS = (
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    ('busy_timeout', BUSY_TIMEOUT_MS),
+    ('cache_size', -64000),  # KiB (negative = size, not pages)
+    ('mmap_size', 256 * 1024 * 1024),
+    ('temp_store', 'MEMORY'),
+)
+
+# Columns added after the original schema, applied to existing databases on demand:
+# (name, declaration[, backfill expression for existing rows])
+ADDED_COLUMNS = {
+    'performances': [
+        ('distance_km', 'REAL'),
+        ('duration_sec', 'INTEGER'),
+        ('performance_text', 'TEXT'),
+        # ALTER TABLE can't add a CURRENT_TIMESTAMP default; schema.sql stamps new rows by trigger
+        ('updated_at', 'TIMESTAMP', 'created_at'),
+    ],
+    'runner_pbs': [
+        ('unit', 'TEXT'),
+    ],
+    'runners': [
+        ('duv_fetched_at', 'TIMESTAMP'),
+        ('dns', 'INTEGER NOT NULL DEFAULT 0'),
+        ('search_name', 'TEXT'),
+    ],
+    'match_candidates': [
+        ('updated_at', 'TIMESTAMP', 'created_at'),
+    ],
+    'sync_watermarks': [
+        ('race_id', 'INTEGER'),  # Set to the default race by migrate_races()
+    ],
+}
+
+_schema_applied: Set[str] = set()
+_schema_lock = threading.Lock()
+_local = threading.local()
+_open: Dict[int, sqlite3.Connection] = {}
+
+
+def resolve_db_path(db_path: str = DEFAULT_DB_PATH) -> str:
+    """Resolve a --db-path argument relative to the project root"""
+    if os.path.isabs(db_path):
+        return db_path
+    return os.path.join(REPO_ROOT, db_path)
+
+
+def ensure_columns(conn: sqlite3.Connection):
+    """Add columns introduced after the original schema to an existing database"""
+    for table, columns in ADDED_COLUMNS.items():
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        if not existing:
+            continue
+        for name, decl, *backfill in columns:
+            if name not in existing:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {decl}")
+                if backfill:
+                    conn.execute(f"UPDATE {table} SET {name} = {backfill[0]}")
+
+
+def schema_statements() -> Iterator[str]:
+    """The statements of schema.sql, without comment lines"""
+    with open(SCHEMA_PATH, encoding='utf-8') as f:
+        schema = f.read()
+    statement = ''
+    for line in schema.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            yield '\n'.join(l for l in statement.splitlines() if not l.lstrip().startswith('--')).strip()
+            statement = ''
+
+
+def table_sql(table: str) -> str:
+    """schema.sql's CREATE TABLE statement for table"""
+    head = f"CREATE TABLE IF NOT EXISTS {table} ("
+    for code in schema_statements():
+        if code.startswith(head):
+            return code
+    raise KeyError(table)
+
+
+def create_tables(conn: sqlite3.Connection):
+    """
+    Only the CREATE TABLE statements of schema.sql, for bulk loads: inserting
+    into unindexed tables and running ensure_schema() afterwards (which builds
+    each index in one sorted pass) is several times faster than maintaining
+    the indexes row by row
+    """
+    for code in schema_statements():
+        if code.upper().startswith('CREATE TABLE'):
+            conn.execute(code)
+
+
+def _rebuild_table(conn: sqlite3.Connection, table: str, extra: Dict[str, str], source: str):
+    """
+    Recreate table from schema.sql (ids kept). Columns it shares with the old
+    table are copied; extra maps new columns to expressions. source is the FROM
+    clause, with the old table as "old". Rows left behind get sync tombstones.
+    """
+    old_columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    conn.execute(table_sql(table).replace(f"CREATE TABLE IF NOT EXISTS {table} (", f"CREATE TABLE {table}_new (", 1))
+    new_columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table}_new)")]
+    columns = [c for c in new_columns if c in extra or c in old_columns]
+    values = [extra.get(c, f"old.{c}") for c in columns]
+    conn.execute(f"INSERT INTO {table}_new ({', '.join(columns)}) SELECT {', '.join(values)} FROM {source}")
+    if 'id' in new_columns and conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sync_tombstones'").fetchone():
+        conn.execute(f"""
+            INSERT INTO sync_tombstones (table_name, row_key)
+            SELECT '{table}', json_array(id) FROM {table} WHERE id NOT IN (SELECT id FROM {table}_new)
+        """)
+    conn.execute(f"DROP TABLE {table}")
+    conn.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+
+
+def migrate_races(conn: sqlite3.Connection):
+    """
+    Move a single-championship database to the race-scoped layout.
+
+    Runners and teams join the default race (lib/db/races.py), and entry_id
+    becomes unique per race, which SQLite can only do by rebuilding the table.
+    Performances move from the runner to the athlete (duv_id); when two
+    entries were matched to the same athlete one copy of the history is kept,
+    and history of runners without a duv_id (unmatched since) is dropped.
+    Indexes and triggers come back from schema.sql afterwards.
+    """
+    def columns(table):
+        return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+    runners, performances, teams = columns('runners'), columns('performances'), columns('teams')
+    rebuild_runners = bool(runners) and 'race_id' not in runners
+    rebuild_performances = 'runner_id' in performances
+    rebuild_teams = bool(teams) and 'race_id' not in teams
+    if not (rebuild_runners or rebuild_performances or rebuild_teams):
+        return
+
+    conn.execute("BEGIN")
+    try:
+        conn.execute(table_sql('races'))
+        row = conn.execute("SELECT id FROM races WHERE name = ?", (DEFAULT_RACE_NAME,)).fetchone()
+        race_id = row[0] if row else conn.execute(
+            "INSERT INTO races (name, race_date) VALUES (?, ?)", (DEFAULT_RACE_NAME, DEFAULT_RACE_DATE)
+        ).lastrowid
+
+        if rebuild_performances:
+            # Needs runners.duv_id; runner ids survive the runners rebuild either way
+            _rebuild_table(conn, 'performances', {'duv_id': 'owner.duv_id'}, """
+                performances old
+                JOIN (
+                    SELECT duv_id, MAX(id) AS runner_id
+                    FROM runners
+                    WHERE duv_id IS NOT NULL AND id IN (SELECT runner_id FROM performances)
+                    GROUP BY duv_id
+                ) owner ON owner.runner_id = old.runner_id
+            """)
+        if rebuild_runners:
+            _rebuild_table(conn, 'runners', {'race_id': str(race_id)}, "runners old")
+        if rebuild_teams:
+            _rebuild_table(conn, 'teams', {'race_id': str(race_id)}, "teams old")
+        if 'race_id' in columns('sync_watermarks'):
+            # What was synced so far was this race
+            conn.execute("UPDATE sync_watermarks SET race_id = ? WHERE race_id IS NULL", (race_id,))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def ensure_schema(conn: sqlite3.Connection):
+    """Bring a database up to schema.sql: missing columns and the races layout first, then tables, indexes and triggers"""
+    ensure_columns(conn)
+    conn.commit()
+    migrate_races(conn)
+    with open(SCHEMA_PATH, encoding='utf-8') as f:
+        conn.executescript(f.read())
+
+
+def configure(conn: sqlite3.Connection):
+    """Apply the shared connection pragmas"""
+    for name, value in PRAGMAS:
+        conn.execute(f"PRAGMA {name} = {value}")
+
+
+def connect(db_path: str, apply_schema: bool = True) -> sqlite3.Connection:
+    """Open a new tuned connection (the caller closes it)"""
+    directory = os.path.dirname(db_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT_MS / 1000)
+    configure(conn)
+
+    if apply_schema:
+        key = os.path.realpath(db_path)
+        with _schema_lock:
+            if key not in _schema_applied:
+                ensure_schema(conn)
+                _schema_applied.add(key)
+    return conn
+
+
+def get_connection(db_path: str) -> sqlite3.Connection:
+    """
+    Reusable connection (sqlite3.Row rows) for this thread and database.
+
+    Repeated calls return the same connection, so loops and helpers can call
+    this instead of reconnecting. Connections are closed at exit (or with
+    close_connections()); don't close them yourself.
+    """
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+
+    key = os.path.realpath(db_path)
+    conn = connections.get(key)
+    if conn is None:
+        conn = connections[key] = connect(db_path)
+        conn.row_factory = sqlite3.Row
+        _open[id(conn)] = conn
+    return conn
+
+
+def close_connections():
+    """Close every connection handed out by get_connection(); uncommitted work is rolled back"""
+    for conn in list(_open.values()):
+        try:
+            conn.close()
+        except sqlite3.ProgrammingError:
+            pass  # Owned by another thread; SQLite closes it at process exit
+    _open.clear()
+    connections = getattr(_local, 'connections', None)
+    if connections:
+        connections.clear()
+
+
+atexit.register(close_connections)
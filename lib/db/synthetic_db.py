@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Synthetic championship databases for query benchmarks.
+
+Fills an empty database (lib/db/schema.sql) with three championships, each
+with a field scaled from today's: about 400 runners per race, half of them
+returning from the previous race (same athlete, same DUV id), ~36 DUV results
+per matched athlete stored once, a few match candidates per runner,
+materialized PBs per discipline and team rows per race and nationality. Names
+are built from syllables, so search_name keeps the selectivity of real names
+even at 100x the field. Output is deterministic for a given scale and seed.
+
+Usage:
+    from synthetic_db import populate
+
+    counts = populate(conn, scale=10, seed=1)
+"""
+
+import random
+import sqlite3
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterator, List, Tuple
+
+BASE_RUNNERS = 400  # per race
+RACES = (
+    ('IAU 24H World Championships 2023', '2023-12-02'),
+    ('IAU 24H World Championships 2024', '2024-12-07'),
+    ('IAU 24H World Championships 2025', '2025-10-17'),
+)
+RETURNING = 0.5  # share of a field that also entered the previous race
+BASE_NATIONS = 60
+BASE_EVENTS = 3000  # distinct DUV events the results are drawn from
+STAMP_POOL = 20000  # created_at/updated_at values, drawn from the last 30 days
+RESULTS_PER_RUNNER = (10, 62)  # uniform range, mean ~36 as in the real data
+CANDIDATES_PER_RUNNER = {'unmatched': (2, 8), 'no-match': (0, 0), 'auto-matched': (1, 2), 'manually-matched': (1, 5)}
+MATCH_STATUSES = (('auto-matched', 0.70), ('manually-matched', 0.10), ('unmatched', 0.12), ('no-match', 0.08))
+
+SYLLABLES = ('an', 'ber', 'ca', 'dor', 'el', 'fi', 'gra', 'hol', 'ik', 'jo', 'ka', 'lin', 'mar',
+             'nes', 'or', 'pe', 'quin', 'ros', 'sen', 'ta', 'ul', 'van', 'wes', 'yo', 'zen')
+# (event_type, timed, event length: hours for timed events, km otherwise, typical result)
+EVENTS = (
+    ('24h', True, 24, 220.0), ('24h', True, 24, 200.0), ('24h', True, 24, 240.0),
+    ('12h', True, 12, 120.0), ('6h', True, 6, 70.0), ('48h', True, 48, 340.0),
+    ('100km', False, 100, 8.5 * 3600), ('50km', False, 50, 3.8 * 3600), ('100mi', False, 160.9, 16 * 3600),
+)
+NOW = datetime(2025, 10, 10, 12, 0, 0)
+
+
+def _name(rng: random.Random, parts: Tuple[int, int]) -> str:
+    return ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(*parts))).capitalize()
+
+
+def _stamp(rng: random.Random, days_back: int) -> str:
+    return (NOW - timedelta(seconds=rng.randint(0, days_back * 86400))).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def nation_codes(count: int) -> List[str]:
+    """Distinct three-letter codes, AAA, AAB, ..."""
+    letters = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+    return [letters[i // 676 % 26] + letters[i // 26 % 26] + letters[i % 26] for i in range(count)]
+
+
+def _athletes(rng: random.Random, first: int, count: int, nations: List[str]) -> List[Tuple[Any, ...]]:
+    """(firstname, lastname, nationality, gender, year of birth, duv_id, match_status) per athlete"""
+    statuses, weights = zip(*MATCH_STATUSES)
+    athletes = []
+    for number in range(first, first + count):
+        status = rng.choices(statuses, weights)[0]
+        matched = status in ('auto-matched', 'manually-matched')
+        athletes.append((_name(rng, (2, 3)), _name(rng, (2, 4)), rng.choice(nations),
+                         'M' if rng.random() < 0.6 else 'W', rng.randint(1955, 2002),
+                         1000000 + number if matched else None, status))
+    return athletes
+
+
+def _runners(rng: random.Random, count: int, nations: List[str]) -> Iterator[Tuple[Any, ...]]:
+    """Each race's field; runner tuples end with race_id"""
+    runner_id = 0
+    athletes = 0
+    previous: List[Tuple[Any, ...]] = []
+    for race_id, (_, race_date) in enumerate(RACES, 1):
+        season = int(race_date[:4])
+        returning = rng.sample(previous, min(len(previous), int(count * RETURNING)))
+        field = returning + _athletes(rng, athletes + 1, count - len(returning), nations)
+        athletes += count - len(returning)
+        rng.shuffle(field)
+        for entry, (firstname, lastname, nationality, gender, born, duv_id, status) in enumerate(field, 1):
+            runner_id += 1
+            matched = duv_id is not None
+            pb = round(rng.uniform(150, 300), 3) if matched and rng.random() < 0.9 else None
+            recent = round(pb * rng.uniform(0.85, 1.0), 3) if pb and rng.random() < 0.7 else None
+            created = _stamp(rng, 40)
+            yield (
+                runner_id, str(entry), firstname, lastname, nationality, gender,
+                1 if rng.random() < 0.03 else 0, duv_id, status,
+                round(rng.uniform(0.8, 1.0), 2) if matched else None,
+                pb, rng.randint(2005, season) if pb else None, recent,
+                rng.randint(season - 2, season) if recent else None,
+                f"{born}-01-01" if matched else None, season - born if matched else None,
+                f"{lastname} {firstname}".lower(), created, max(created, _stamp(rng, 10)), race_id,
+            )
+        previous = field
+
+
+def _events(rng: random.Random, count: int) -> List[Tuple[Any, ...]]:
+    """(event_id, name, date, event_type, timed, length, typical result) per event"""
+    events = []
+    for event_id in range(1, count + 1):
+        event_type, timed, length, typical = rng.choice(EVENTS)
+        event_date = date(1995, 1, 1) + timedelta(days=rng.randint(0, 30 * 365))
+        events.append((event_id, f"{_name(rng, (2, 3))} {event_type}", event_date.isoformat(),
+                       event_type, timed, length, typical))
+    return events
+
+
+def _performances(rng: random.Random, runners: List[Tuple[Any, ...]], events: List[Tuple[Any, ...]],
+                  stamps: List[str]) -> Iterator[Tuple[Any, ...]]:
+    """One history per athlete (DUV id), however many races they entered"""
+    # Plain random() arithmetic: randint() dominates the build time at 100x
+    random_ = rng.random
+    low, high = RESULTS_PER_RUNNER
+    perf_id = 0
+    for duv_id in dict.fromkeys(runner[7] for runner in runners if runner[7] is not None):
+        for _ in range(low + int(random_() * (high - low + 1))):
+            perf_id += 1
+            event_id, name, event_date, event_type, timed, length, typical = events[int(random_() * len(events))]
+            result = typical * (0.6 + 0.65 * random_())
+            if timed:
+                distance_km, duration_sec, text = round(result, 3), int(length * 3600), f"{result:.3f} km"
+            else:
+                seconds = int(result)
+                distance_km, duration_sec = float(length), seconds
+                text = f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d} h"
+            stamp = stamps[int(random_() * len(stamps))]
+            yield (
+                perf_id, duv_id, event_id, name, event_date, round(distance_km if timed else result, 3),
+                1 + int(random_() * 400), event_type, distance_km, duration_sec, text, stamp, stamp,
+            )
+
+
+def _runner_pbs(rng: random.Random, runners: List[Tuple[Any, ...]]) -> Iterator[Tuple[Any, ...]]:
+    for runner in runners:
+        if runner[7] is None:
+            continue
+        for event_type, timed, _, typical in {e[0]: e for e in EVENTS}.values():
+            if rng.random() < 0.5:
+                continue
+            best = typical * rng.uniform(0.9, 1.2 if timed else 1.0)
+            yield (
+                runner[0], event_type, round(best, 3), rng.randint(2000, 2025),
+                round(best * 0.95, 3) if rng.random() < 0.6 else None, 2024,
+                round(best * 0.9, 3) if rng.random() < 0.4 else None, 2025,
+                'km' if timed else 's', rng.randint(1, 20), _stamp(rng, 30),
+            )
+
+
+def _candidates(rng: random.Random, runners: List[Tuple[Any, ...]]) -> Iterator[Tuple[Any, ...]]:
+    candidate_id = 0
+    for runner in runners:
+        for _ in range(rng.randint(*CANDIDATES_PER_RUNNER[runner[8]])):
+            candidate_id += 1
+            stamp = _stamp(rng, 40)
+            yield (
+                candidate_id, runner[0], rng.randint(1, 2000000), runner[3], runner[2],
+                rng.randint(1955, 2002), runner[4], runner[5], f"{rng.uniform(150, 300):.3f} km",
+                round(rng.uniform(0.3, 1.0), 2), stamp, stamp,
+            )
+
+
+def _teams(runners: List[Tuple[Any, ...]]) -> Iterator[Tuple[Any, ...]]:
+    """Top-three totals per race, nationality, gender and metric, like calculateAndSaveTeams()"""
+    squads: Dict[Tuple[int, str, str], List[Tuple[Any, ...]]] = {}
+    for runner in runners:
+        if not runner[6]:
+            squads.setdefault((runner[19], runner[4], runner[5]), []).append(runner)
+    for race_id in range(1, len(RACES) + 1):
+        for metric, column in (('all-time', 10), ('last-2-years', 12)):
+            for gender in ('M', 'W'):
+                totals = []
+                for (squad_race, nationality, squad_gender), squad in squads.items():
+                    if squad_race != race_id or squad_gender != gender:
+                        continue
+                    top = sorted(squad, key=lambda r: r[column] or 0, reverse=True)[:3]
+                    ids = [r[0] for r in top] + [None] * (3 - len(top))
+                    totals.append((sum(r[column] or 0 for r in top), nationality, ids))
+                totals.sort(key=lambda t: -t[0])
+                for rank, (total, nationality, ids) in enumerate(totals, 1):
+                    yield (race_id, nationality, gender, metric, round(total, 3), rank, *ids)
+
+
+def populate(conn: sqlite3.Connection, scale: float = 1, seed: int = 0) -> Dict[str, int]:
+    """Insert len(RACES) synthetic fields of scale x BASE_RUNNERS runners; returns rows per table"""
+    rng = random.Random(seed)
+    nations = nation_codes(max(BASE_NATIONS, int(BASE_NATIONS * scale ** 0.5)))
+    runners = list(_runners(rng, max(1, int(BASE_RUNNERS * scale)), nations))
+    events = _events(rng, int(BASE_EVENTS * max(1.0, scale ** 0.5)))
+    stamps = [_stamp(rng, 30) for _ in range(STAMP_POOL)]
+
+    # The latest entry of each athlete owns their fetch failure (one row per DUV id)
+    latest_entries = {r[7]: r for r in runners if r[7] is not None}
+
+    inserts = (
+        ('races', "INSERT INTO races (id, name, race_date) VALUES (?, ?, ?)",
+         ((race_id, name, race_date) for race_id, (name, race_date) in enumerate(RACES, 1))),
+        ('runners', """INSERT INTO runners (id, entry_id, firstname, lastname, nationality, gender, dns,
+            duv_id, match_status, match_confidence, personal_best_all_time, personal_best_all_time_year,
+            personal_best_last_2_years, personal_best_last_2_years_year, date_of_birth, age, search_name,
+            created_at, updated_at, race_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+         iter(runners)),
+        ('performances', """INSERT INTO performances (id, duv_id, event_id, event_name, event_date, distance,
+            rank, event_type, distance_km, duration_sec, performance_text, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+         _performances(rng, runners, events, stamps)),
+        ('runner_pbs', """INSERT INTO runner_pbs (runner_id, event_type, pb_all_time, pb_all_time_year,
+            pb_last_2_years, pb_last_2_years_year, season_best, season_best_year, unit, race_count, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+         _runner_pbs(rng, runners)),
+        ('match_candidates', """INSERT INTO match_candidates (id, runner_id, duv_person_id, lastname, firstname,
+            year_of_birth, nation, sex, personal_best, confidence, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+         _candidates(rng, runners)),
+        ('teams', """INSERT INTO teams (race_id, nationality, gender, metric, team_total, rank, runner1_id,
+            runner2_id, runner3_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+         _teams(runners)),
+        ('fetch_failures', """INSERT INTO fetch_failures (duv_id, runner_id, attempts, last_error,
+            last_attempt_at, next_attempt_at) VALUES (?, ?, ?, 'HTTP 503', ?, ?)""",
+         ((r[7], r[0], rng.randint(1, 6), _stamp(rng, 5), _stamp(rng, 2))
+          for r in latest_entries.values() if rng.random() < 0.01)),
+    )
+
+    counts = {table: conn.executemany(sql, rows).rowcount for table, sql, rows in inserts}
+    conn.commit()
+    return counts
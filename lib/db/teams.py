@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Team rankings of one race, the Python side of calculateAndSaveTeams()
+(lib/db/database.ts).
+
+A team is a race's runners of one nationality and gender; its total is the
+sum of its best three PBs for the metric, and teams are ranked per race,
+metric and gender by total. DNS runners (withdrawn from the latest entry
+list) don't count. Teams are upserted on (race_id, nationality, gender,
+metric) and only rewritten when a total, rank or runner changed, so an
+unchanged field leaves teams.updated_at (and the next sync) alone.
+
+Usage:
+    from teams import calculate_teams
+
+    summary = calculate_teams(conn, race_id)  # {'teams': 174, 'changed': 12, 'removed': 0}
+"""
+
+import sqlite3
+from typing import Any, Dict, List, Optional, Tuple
+
+# teams.metric -> runners column it sums
+METRICS = {
+    'all-time': 'personal_best_all_time',
+    'last-2-years': 'personal_best_last_2_years',
+}
+TEAM_SIZE = 3
+
+
+def rank_teams(runners: List[sqlite3.Row], column: str) -> List[Tuple[Any, ...]]:
+    """(nationality, gender, team_total, rank, runner1_id, runner2_id, runner3_id) per team"""
+    squads: Dict[Tuple[str, str], List[sqlite3.Row]] = {}
+    for runner in runners:
+        squads.setdefault((runner['nationality'], runner['gender']), []).append(runner)
+
+    teams = []
+    for gender in ('M', 'W'):
+        totals = []
+        for (nationality, squad_gender), squad in squads.items():
+            if squad_gender != gender:
+                continue
+            top = sorted(squad, key=lambda r: (-(r[column] or 0), r['id']))[:TEAM_SIZE]
+            ids: List[Optional[int]] = [r['id'] for r in top] + [None] * (TEAM_SIZE - len(top))
+            totals.append((round(sum(r[column] or 0 for r in top), 3), nationality, ids))
+        totals.sort(key=lambda t: (-t[0], t[1]))
+        for rank, (total, nationality, ids) in enumerate(totals, 1):
+            teams.append((nationality, gender, total, rank, *ids))
+    return teams
+
+
+def calculate_teams(conn: sqlite3.Connection, race_id: int) -> Dict[str, int]:
+    """Recalculate the race's teams for every metric (the caller commits)"""
+    conn.row_factory, row_factory = sqlite3.Row, conn.row_factory
+    try:
+        runners = conn.execute(f"""
+            SELECT id, nationality, gender, {', '.join(METRICS.values())}
+            FROM runners
+            WHERE race_id = ? AND dns = 0
+        """, (race_id,)).fetchall()
+    finally:
+        conn.row_factory = row_factory
+
+    summary = {'teams': 0, 'changed': 0, 'removed': 0}
+    for metric, column in METRICS.items():
+        teams = rank_teams(runners, column)
+        cursor = conn.executemany("""
+            INSERT INTO teams (race_id, metric, nationality, gender, team_total, rank,
+                               runner1_id, runner2_id, runner3_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(race_id, nationality, gender, metric) DO UPDATE SET
+                team_total = excluded.team_total,
+                rank = excluded.rank,
+                runner1_id = excluded.runner1_id,
+                runner2_id = excluded.runner2_id,
+                runner3_id = excluded.runner3_id
+            WHERE team_total IS NOT excluded.team_total
+               OR rank IS NOT excluded.rank
+               OR runner1_id IS NOT excluded.runner1_id
+               OR runner2_id IS NOT excluded.runner2_id
+               OR runner3_id IS NOT excluded.runner3_id
+        """, [(race_id, metric, *team) for team in teams])
+        # Inserted plus updated rows; unchanged teams fail the WHERE and don't count
+        summary['changed'] += cursor.rowcount
+
+        # Nations with no starters left
+        current = {(team[0], team[1]) for team in teams}
+        stale = [
+            (team_id,) for team_id, nationality, gender in conn.execute(
+                "SELECT id, nationality, gender FROM teams WHERE race_id = ? AND metric = ?", (race_id, metric))
+            if (nationality, gender) not in current
+        ]
+        conn.executemany("DELETE FROM teams WHERE id = ?", stale)
+        summary['teams'] += len(teams)
+        summary['removed'] += len(stale)
+    return summary
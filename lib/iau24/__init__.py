@@ -0,0 +1,8 @@
+"""
+iau24 - the Python data tools (entry list parsing, DUV matching, performance
+fetching, review, Supabase export) behind one command.
+
+The tools themselves stay in scripts/ and lib/db, lib/pdf; see iau24.cli.
+"""
+
+__version__ = '0.1.0'
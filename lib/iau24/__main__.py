@@ -0,0 +1,3 @@
+from iau24.cli import main
+
+main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+One entry point for the Python data tools.
+
+Usage:
+    iau24 parse downloads/iau-2025-entry-list.pdf
+    iau24 match --race 2
+    iau24 fetch --retry-failed
+    iau24 pipeline run --pdf downloads/iau-2025-entry-list.pdf
+    iau24 view --filter SWE
+    iau24 <command> --help
+
+Each command runs the tool's script in scripts/ with the remaining arguments,
+so options and output are the same as `python scripts/<script>`. Only that
+script is loaded, and the scripts import their heavy dependencies (Docling,
+requests, psycopg) in the functions that use them, so light commands and
+--help start in well under 100 ms (scripts/benchmark-startup.py checks this).
+
+Install from a checkout with `pip install -e .`: the scripts, schema files
+and data/ stay in the repository.
+"""
+
+import os
+import sys
+import argparse
+import importlib.util
+from types import ModuleType
+from typing import List, NamedTuple, Optional
+
+from iau24 import __version__
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+SCRIPTS_DIR = os.path.join(ROOT, 'scripts')
+
+
+class Command(NamedTuple):
+    script: str
+    summary: str
+
+
+COMMANDS = {
+    'parse': Command('parse-pdf-backend.py', 'Parse an entry list PDF (Docling) into the runners table'),
+    'import': Command('import-entry-list.py', 'Import an entry list from CSV or XLSX'),
+    'match': Command('match-runners.py', 'Match runners to DUV profiles'),
+    'fetch': Command('fetch-performances.py', 'Fetch DUV performance history and compute PBs'),
+    'teams': Command('calculate-teams.py', 'Recalculate team rankings from runner PBs'),
+    'pipeline': Command('run-pipeline.py', 'Run parse, match, fetch and teams, skipping up-to-date stages'),
+    'review': Command('manual-match.py', 'List unmatched runners, or pick their DUV match (--interactive)'),
+    'view': Command('view-runners.py', 'View, search and edit runners'),
+    'export': Command('export-supabase.py', 'Export the database for Supabase, or load an export (--load)'),
+    'sync': Command('sync-changes.py', 'Send the rows changed since the last sync to Supabase'),
+    'load-dump': Command('load-supabase-dump.py', 'Build a dev database from the committed Supabase dump'),
+    'worker': Command('pdf-parse-worker.py', 'Serve PDF parsing to the web app with a warm Docling converter'),
+}
+
+
+def load_tool(command: str) -> ModuleType:
+    """Import a command's script as a module (hyphenated file names can't be imported by name)"""
+    script = COMMANDS[command].script
+    path = os.path.join(SCRIPTS_DIR, script)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"{path} not found; iau24 runs from a checkout (pip install -e .)")
+    spec = importlib.util.spec_from_file_location(os.path.splitext(script)[0].replace('-', '_'), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def run_tool(command: str, argv: List[str]):
+    """Run a command's script with argv, as `python scripts/<script> argv...` would"""
+    try:
+        module = load_tool(command)
+    except FileNotFoundError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+    # argparse names the program after argv[0]: usage lines read "iau24 view ..."
+    sys.argv = [f"iau24 {command}", *argv]
+    module.main()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='iau24',
+        description='IAU 24h World Championships data tools',
+        epilog='Run "iau24 <command> --help" for the options of a command.',
+    )
+    parser.add_argument('--version', action='version', version=f'%(prog)s {__version__}')
+    subparsers = parser.add_subparsers(dest='command', metavar='<command>')
+    for name, command in COMMANDS.items():
+        # No options of its own: everything after the command goes to the script
+        subparsers.add_parser(name, help=command.summary, add_help=False)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = build_parser()
+    args, rest = parser.parse_known_args(argv)
+    if args.command is None:
+        parser.print_help()
+        sys.exit(1)
+    run_tool(args.command, rest)
+
+
+if __name__ == '__main__':
+    main()
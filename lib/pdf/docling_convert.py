@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Cached Docling conversion for entry list PDFs.
+
+Docling conversion is the slowest step of the parse pipeline, and the same
+entry list is re-parsed many times while tuning row heuristics. The converted
+document (plus its markdown export) is cached as gzipped JSON keyed by the
+SHA-256 of the PDF bytes and the installed Docling version, so a re-parse of an
+unchanged PDF never imports or runs Docling.
+
+Usage:
+    from docling_convert import convert_pdf
+
+    result = convert_pdf(pdf_path)
+    for table in result.document.tables:
+        ...
+    text = result.markdown
+
+Cache location: data/.docling-cache (override with DOCLING_CACHE_DIR)
+
+Conversion profiles:
+    accurate  Docling defaults (OCR, accurate TableFormer)
+    fast      No OCR or picture processing, fast TableFormer mode; for PDFs
+              with an embedded text layer, like the IAU entry lists
+    auto      fast when the PDF has a text layer, otherwise accurate
+"""
+
+import sys
+import os
+import gzip
+import json
+import time
+import hashlib
+from typing import Dict, Optional, Tuple
+
+CACHE_FORMAT = 1
+PROFILES = ('auto', 'fast', 'accurate')
+TEXT_LAYER_MIN_CHARS = 50  # per sampled page
+TEXT_LAYER_SAMPLE_PAGES = 3
+DOCLING_MISSING = 'Docling not installed. Install with: pip install -e ".[pdf]"'
+DEFAULT_CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'data', '.docling-cache'
+)
+
+
+class Conversion:
+    """Converted document with its markdown export (mirrors ConversionResult.document)"""
+
+    def __init__(self, document, markdown: str, from_cache: bool,
+                 profile: str = 'accurate', seconds: Optional[float] = None):
+        self.document = document
+        self.markdown = markdown
+        self.from_cache = from_cache
+        self.profile = profile
+        self.seconds = seconds  # Docling conversion time (from the original run when cached)
+
+    @property
+    def pages(self) -> int:
+        return len(getattr(self.document, 'pages', None) or {})
+
+    @property
+    def seconds_per_page(self) -> Optional[float]:
+        if self.seconds is None or not self.pages:
+            return None
+        return self.seconds / self.pages
+
+
+def pdf_sha256(pdf_path: str) -> str:
+    """SHA-256 of the PDF bytes"""
+    digest = hashlib.sha256()
+    with open(pdf_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def docling_version() -> str:
+    """Installed Docling version, read from package metadata without importing Docling"""
+    from importlib import metadata
+    try:
+        return metadata.version('docling')
+    except metadata.PackageNotFoundError:
+        return 'none'
+
+
+def has_text_layer(pdf_path: str) -> bool:
+    """True if the first pages of the PDF carry embedded text (checked with pypdfium2)"""
+    try:
+        import pypdfium2
+    except ImportError:
+        return False
+
+    try:
+        pdf = pypdfium2.PdfDocument(pdf_path)
+    except Exception:
+        return False  # Let Docling report the unreadable PDF
+
+    try:
+        sample = range(min(len(pdf), TEXT_LAYER_SAMPLE_PAGES))
+        if not sample:
+            return False
+        for idx in sample:
+            textpage = pdf[idx].get_textpage()
+            if textpage.count_chars() < TEXT_LAYER_MIN_CHARS:
+                return False
+        return True
+    finally:
+        pdf.close()
+
+
+def count_pages(pdf_path: str) -> int:
+    """Page count via pypdfium2 (installed with Docling), without a full conversion"""
+    import pypdfium2
+
+    pdf = pypdfium2.PdfDocument(pdf_path)
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+
+def add_profile_arg(parser) -> None:
+    """The --profile option of the scripts that convert PDFs"""
+    parser.add_argument('--profile', choices=PROFILES, default='auto',
+                        help='Docling pipeline: fast (no OCR, fast tables), accurate, or auto-detect from the text layer')
+
+
+def resolve_profile(pdf_path: str, profile: str = 'auto') -> str:
+    """Resolve 'auto' to 'fast' or 'accurate' for this PDF"""
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown Docling profile: {profile}")
+    if profile != 'auto':
+        return profile
+    return 'fast' if has_text_layer(pdf_path) else 'accurate'
+
+
+def cache_path(pdf_path: str, page_range: Optional[Tuple[int, int]] = None,
+               cache_dir: Optional[str] = None, profile: str = 'accurate') -> str:
+    """Cache file for a PDF (and optional 1-based inclusive page range) under a resolved profile"""
+    cache_dir = cache_dir or os.environ.get('DOCLING_CACHE_DIR') or DEFAULT_CACHE_DIR
+    key = f"{pdf_sha256(pdf_path)}-docling{docling_version()}-v{CACHE_FORMAT}"
+    if profile != 'accurate':
+        key += f"-{profile}"  # accurate keeps the pre-profile key (Docling defaults)
+    if page_range:
+        key += f"-p{page_range[0]}-{page_range[1]}"
+    return os.path.join(cache_dir, f"{key}.json.gz")
+
+
+def load_cached(path: str) -> Optional[Conversion]:
+    """Load a cached conversion, or None if missing or unreadable"""
+    if not os.path.exists(path):
+        return None
+
+    try:
+        from docling_core.types.doc import DoclingDocument
+
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            payload = json.load(f)
+        document = DoclingDocument.model_validate(payload['document'])
+        return Conversion(document, payload['markdown'], from_cache=True,
+                          profile=payload.get('profile', 'accurate'), seconds=payload.get('seconds'))
+    except Exception as e:
+        print(f"Ignoring unreadable Docling cache {path}: {e}", file=sys.stderr)
+        return None
+
+
+def save_cached(path: str, conversion: Conversion):
+    """Write a conversion to the cache atomically"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    payload = {
+        'document': conversion.document.export_to_dict(),
+        'markdown': conversion.markdown,
+        'profile': conversion.profile,
+        'seconds': conversion.seconds,
+    }
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def require_docling():
+    """Fail early, without importing Docling, when it is not installed"""
+    if docling_version() == 'none':
+        raise RuntimeError(DOCLING_MISSING)
+
+
+def new_converter(profile: str = 'accurate'):
+    """
+    Create a Docling DocumentConverter for a resolved profile (imports Docling on first use).
+
+    Raises RuntimeError when Docling is not installed.
+    """
+    try:
+        from docling.document_converter import DocumentConverter, PdfFormatOption
+        from docling.datamodel.base_models import InputFormat
+        from docling.datamodel.pipeline_options import PdfPipelineOptions, TableFormerMode
+    except ImportError:
+        raise RuntimeError(DOCLING_MISSING)
+
+    if profile != 'fast':
+        return DocumentConverter()
+
+    options = PdfPipelineOptions()
+    options.do_ocr = False
+    options.do_table_structure = True
+    options.table_structure_options.mode = TableFormerMode.FAST
+    for flag in ('do_picture_classification', 'do_picture_description',
+                 'generate_picture_images', 'generate_page_images'):
+        if hasattr(options, flag):
+            setattr(options, flag, False)
+
+    return DocumentConverter(format_options={InputFormat.PDF: PdfFormatOption(pipeline_options=options)})
+
+
+_converters: Dict[str, object] = {}
+
+
+def get_converter(profile: str):
+    """Shared converter per resolved profile, created on first use and kept loaded"""
+    if profile not in _converters:
+        _converters[profile] = new_converter(profile)
+    return _converters[profile]
+
+
+def report(conversion: Conversion, label: str = 'Docling'):
+    """Print conversion time per page for a conversion"""
+    if conversion.seconds_per_page is None:
+        return
+    source = 'cached, originally' if conversion.from_cache else 'converted'
+    print(f"{label} ({conversion.profile}): {conversion.pages} pages {source} in "
+          f"{conversion.seconds:.2f}s ({conversion.seconds_per_page:.2f}s/page)", file=sys.stderr)
+
+
+def convert_pdf(pdf_path: str, converter=None, page_range: Optional[Tuple[int, int]] = None,
+                use_cache: bool = True, profile: str = 'auto') -> Conversion:
+    """
+    Convert a PDF with Docling, reusing a cached result for identical PDF bytes.
+
+    Args:
+        pdf_path: Path to the PDF file
+        converter: Existing DocumentConverter to reuse; must match the resolved profile
+                   (defaults to the shared converter for that profile)
+        page_range: Optional 1-based inclusive (first, last) page range
+        use_cache: Set False to always run Docling (the result is still cached)
+        profile: 'auto', 'fast' or 'accurate' (see module docstring)
+    """
+    profile = resolve_profile(pdf_path, profile)
+    path = cache_path(pdf_path, page_range, profile=profile)
+
+    if use_cache:
+        cached = load_cached(path)
+        if cached is not None:
+            print(f"Using cached Docling conversion: {os.path.basename(path)}", file=sys.stderr)
+            report(cached)
+            return cached
+
+    converter = converter or get_converter(profile)
+    started = time.monotonic()
+    if page_range:
+        result = converter.convert(pdf_path, page_range=page_range)
+    else:
+        result = converter.convert(pdf_path)
+
+    conversion = Conversion(result.document, result.document.export_to_markdown(), from_cache=False,
+                            profile=profile, seconds=round(time.monotonic() - started, 3))
+    report(conversion)
+
+    try:
+        save_cached(path, conversion)
+    except OSError as e:
+        print(f"Could not write Docling cache {path}: {e}", file=sys.stderr)
+
+    return conversion
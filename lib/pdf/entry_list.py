@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Shared row heuristics for IAU entry list parsers.
+
+IAU entry lists are laid out as "XXX MEN" / "XXX WOMEN" section headers, each
+followed by rows of "<number> <SURNAME(S)> <Firstname(s)>" (reserves use 'R'
+instead of a number). These helpers are used both for layout text
+(pdfplumber) and for Docling table grids.
+
+Spreadsheet-style tables with a header row (Docling tables with named
+columns, CSV/XLSX entry lists) share the field normalizers and the header
+vocabulary in COLUMN_ROLES.
+"""
+
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+SECTION_HEADER_RE = re.compile(r'\b([A-Z]{3})\s+(MEN|WOMEN|Men|Women)\b')
+LAYOUT_ROW_RE = re.compile(r'^(\d+|R)\s+(.+)$')
+COLUMN_GAP_RE = re.compile(r'\s{2,}')  # 2+ spaces = column boundary in layout text
+
+# Page furniture in the IAU entry list that never contains runner rows
+SKIP_LINE_MARKERS = ['Entry List', 'IAU 24H', '2025', 'October', 'Albi', 'France', 'Surname', 'First name']
+
+
+def parse_section_header(line: str) -> Optional[Tuple[str, str]]:
+    """Return (country, gender) for a "XXX MEN" / "XXX WOMEN" header line"""
+    match = SECTION_HEADER_RE.search(line)
+    if not match:
+        return None
+    gender = 'M' if match.group(2).upper() == 'MEN' else 'W'
+    return match.group(1), gender
+
+
+def parse_layout_line(line: str) -> Optional[Tuple[str, str, str, bool]]:
+    """
+    Parse a layout-preserved text line into (number, lastname, firstname, split_by_columns).
+
+    split_by_columns is False when the surname/firstname boundary had to be
+    guessed (no column gap), which callers treat as a low-confidence row.
+    """
+    match = LAYOUT_ROW_RE.match(line)
+    if not match:
+        return None
+
+    number, rest = match.group(1), match.group(2)
+    parts = COLUMN_GAP_RE.split(rest.strip())
+
+    if len(parts) >= 2:
+        # First part = surname column, second part = firstname column
+        return number, parts[0].strip().title(), parts[1].strip().title(), True
+
+    # Fallback: single column, assume last word is firstname
+    words = rest.split()
+    if len(words) < 2:
+        return None
+    return number, ' '.join(words[:-1]).title(), words[-1].title(), False
+
+
+def _cell(value: Any) -> str:
+    return str(value).strip() if value and str(value) != 'nan' else ""
+
+
+def parse_table_row(row: List[Any]) -> Optional[Tuple[str, str, str]]:
+    """
+    Parse a Docling table row into (number, lastname, firstname).
+
+    Handles the 3-column layout [Number, Surname, Firstname], 4-column rows with a
+    split firstname, and wider rows where the middle columns form the surname.
+    """
+    if not row or len(row) < 3:
+        return None
+
+    num = _cell(row[0])
+
+    if len(row) == 3:
+        lastname = _cell(row[1]).title()
+        firstname = _cell(row[2]).title()
+    elif len(row) == 4:
+        # [Number, Surname, Firstname_Part1, Firstname_Part2]
+        # This matches "Eriksen | Bouchra | Lundgren" pattern
+        lastname = _cell(row[1]).title()
+        firstname = f"{_cell(row[2])} {_cell(row[3])}".strip().title()
+    else:
+        # More than 4 columns - concatenate middle columns as surname
+        lastname = ' '.join(_cell(row[i]) for i in range(1, len(row) - 1) if _cell(row[i])).title()
+        firstname = _cell(row[-1]).title()
+
+    # Skip if not a valid entry (number must be digit or 'R' for reserve)
+    if not (num.isdigit() or num == 'R'):
+        return None
+
+    if len(lastname) >= 2 and len(firstname) >= 2:
+        return num, lastname, firstname
+    return None
+
+
+def normalize_name(name: str) -> str:
+    """Normalize name by stripping whitespace and titlecasing"""
+    return name.strip().title() if name else ""
+
+
+def normalize_gender(gender: str) -> Optional[str]:
+    """Normalize gender to 'M' or 'W'"""
+    gender = gender.strip().upper()
+    if gender in ['M', 'MALE', 'MEN', 'MAN', 'H', 'HOMME', 'HOMMES', 'HERREN']:
+        return 'M'
+    elif gender in ['W', 'F', 'FEMALE', 'WOMEN', 'WOMAN', 'FEMME', 'FEMMES', 'DAMEN']:
+        return 'W'
+    return None
+
+
+def normalize_nationality(nationality: str) -> str:
+    """
+    Normalize nationality to ISO 3166-1 alpha-3 code.
+    Handles common variations and formats.
+    """
+    nationality = nationality.strip().upper()
+
+    # Already ISO 3166-1 alpha-3 (3 letters)
+    if len(nationality) == 3 and nationality.isalpha():
+        return nationality
+
+    # Common country code mappings (extend as needed)
+    country_map = {
+        'US': 'USA',
+        'UK': 'GBR',
+        'GB': 'GBR',
+        'DE': 'DEU',
+        'FR': 'FRA',
+        'IT': 'ITA',
+        'ES': 'ESP',
+        'NL': 'NLD',
+        'BE': 'BEL',
+        'CH': 'CHE',
+        'AT': 'AUT',
+        'PL': 'POL',
+        'CZ': 'CZE',
+        'JP': 'JPN',
+        'CN': 'CHN',
+        'KR': 'KOR',
+        'AU': 'AUS',
+        'NZ': 'NZL',
+        'CA': 'CAN',
+        'BR': 'BRA',
+        'MX': 'MEX',
+        'AR': 'ARG',
+        'ZA': 'ZAF',
+        'RU': 'RUS',
+        'IN': 'IND',
+    }
+
+    if nationality in country_map:
+        return country_map[nationality]
+
+    return nationality
+
+
+# Column roles and the header keywords that identify them (multilingual), matched
+# as substrings of the lowercased header. Each column fills at most one role, and
+# roles claim columns in this order: the specific name roles first, so 'Prénom'
+# is a first name before the lastname keyword 'nom' can take it, and the entry id
+# (whose 'id' and 'nr' occur inside many words) last. When several columns match
+# a role, the first non-empty one in a row wins.
+COLUMN_ROLES = (
+    ('firstname', ('first', 'given', 'vorname', 'prénom')),
+    ('lastname', ('last', 'family', 'surname', 'nachname', 'nom')),
+    ('gender', ('gender', 'sex', 'geschlecht', 'sexe', 'm/w', 'm/f')),
+    ('nationality', ('nat', 'country', 'nation', 'land', 'pays')),
+    ('entryId', ('id', 'number', 'nr', 'bib', 'entry', '#', 'dossard', 'nummer')),
+)
+
+EMPTY_CELLS = ['', 'nan', 'None']
+
+
+@lru_cache(maxsize=256)
+def infer_table_schema(columns: Tuple[str, ...]) -> Dict[str, Tuple[int, ...]]:
+    """
+    Classify a table's columns once per header layout.
+
+    Returns role -> positions of the matching columns, in column order. Entry
+    lists repeat the same header on every page, so the cache makes this a
+    lookup after the first table.
+    """
+    schema = {}
+    claimed = set()
+    for role, keywords in COLUMN_ROLES:
+        positions = tuple(i for i, name in enumerate(columns)
+                          if i not in claimed and any(k in name.lower() for k in keywords))
+        if positions:
+            schema[role] = positions
+            claimed.update(positions)
+    return schema
@@ -6,154 +6,91 @@ Parses entry list PDFs using Dockling to extract runner information.
 Outputs JSON array matching the Runner type structure.
 
 Usage:
-    python parse-entry-list.py <path-to-pdf>
+    python parse-entry-list.py <path-to-pdf> [--ndjson]
 
 Output:
     JSON array of runners with: entryId, firstname, lastname, nationality, gender
+
+    With --ndjson, one JSON record per line, flushed as soon as it is known.
+    The PDF is converted a few pages at a time (--pages-per-range), so the
+    first runners arrive after the first pages are converted:
+        {"type": "section", "title": "...", "table": N}   section header / table start
+        {"type": "runner", "entryId": ..., ...}            one per runner
+        {"type": "stats", "runners": N, ...}               always the last line
+
+Docling conversions are cached by PDF content hash and page range (see
+docling_convert.py), so re-parsing an unchanged PDF skips Docling entirely.
 """
 
 import sys
 import json
 import re
-from typing import List, Dict, Optional
+import time
+import argparse
+from typing import Any, Dict, Iterator, List, Tuple, TYPE_CHECKING
 from pathlib import Path
 
-try:
-    from docling.document_converter import DocumentConverter
-    from docling.datamodel.base_models import Table
-except ImportError:
-    print("Error: docling library not found. Install with: pip install -r requirements.txt", file=sys.stderr)
-    sys.exit(1)
-
-
-def normalize_name(name: str) -> str:
-    """Normalize name by stripping whitespace and titlecasing"""
-    return name.strip().title() if name else ""
-
-
-def normalize_gender(gender: str) -> Optional[str]:
-    """Normalize gender to 'M' or 'W'"""
-    gender = gender.strip().upper()
-    if gender in ['M', 'MALE', 'MEN', 'MAN']:
-        return 'M'
-    elif gender in ['W', 'F', 'FEMALE', 'WOMEN', 'WOMAN']:
-        return 'W'
-    return None
-
-
-def normalize_nationality(nationality: str) -> str:
-    """
-    Normalize nationality to ISO 3166-1 alpha-3 code.
-    Handles common variations and formats.
-    """
-    nationality = nationality.strip().upper()
-
-    # Already ISO 3166-1 alpha-3 (3 letters)
-    if len(nationality) == 3 and nationality.isalpha():
-        return nationality
-
-    # Common country code mappings (extend as needed)
-    country_map = {
-        'US': 'USA',
-        'UK': 'GBR',
-        'GB': 'GBR',
-        'DE': 'DEU',
-        'FR': 'FRA',
-        'IT': 'ITA',
-        'ES': 'ESP',
-        'NL': 'NLD',
-        'BE': 'BEL',
-        'CH': 'CHE',
-        'AT': 'AUT',
-        'PL': 'POL',
-        'CZ': 'CZE',
-        'JP': 'JPN',
-        'CN': 'CHN',
-        'KR': 'KOR',
-        'AU': 'AUS',
-        'NZ': 'NZL',
-        'CA': 'CAN',
-        'BR': 'BRA',
-        'MX': 'MEX',
-        'AR': 'ARG',
-        'ZA': 'ZAF',
-        'RU': 'RUS',
-        'IN': 'IND',
-    }
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from docling_convert import add_profile_arg, convert_pdf, count_pages, resolve_profile
+from entry_list import (
+    EMPTY_CELLS, infer_table_schema,
+    normalize_name, normalize_gender, normalize_nationality
+)
 
-    if nationality in country_map:
-        return country_map[nationality]
+if TYPE_CHECKING:
+    from docling_core.types.doc import TableItem
 
-    return nationality
+DEFAULT_PAGES_PER_RANGE = 4
 
 
-def extract_from_table(table: Table) -> List[Dict]:
+def extract_from_table(table: 'TableItem') -> List[Dict]:
     """
     Extract runner data from a Dockling Table object.
     Handles various table formats and layouts.
-    """
-    runners = []
 
-    # Convert table to data structure
-    # Table structure varies, but typically has headers and rows
+    Column roles are inferred once per table and every field is extracted
+    column-wise, so cost grows linearly with table size.
+    """
     table_data = table.export_to_dataframe()
-
-    for idx, row in table_data.iterrows():
-        try:
-            # Try to find relevant columns (flexible column matching)
-            entry_id = None
-            firstname = None
-            lastname = None
-            nationality = None
-            gender = None
-
-            # Search through columns for data
-            for col_name, value in row.items():
-                col_lower = str(col_name).lower()
-                val_str = str(value).strip()
-
-                if not val_str or val_str in ['nan', 'None', '']:
-                    continue
-
-                # Entry ID (number, bib, start number, etc.)
-                if entry_id is None and any(x in col_lower for x in ['id', 'number', 'nr', 'bib', 'entry', '#']):
-                    entry_id = val_str
-
-                # First name
-                if firstname is None and any(x in col_lower for x in ['first', 'given', 'vorname', 'prénom']):
-                    firstname = normalize_name(val_str)
-
-                # Last name
-                if lastname is None and any(x in col_lower for x in ['last', 'family', 'surname', 'nachname', 'nom']):
-                    lastname = normalize_name(val_str)
-
-                # Nationality
-                if nationality is None and any(x in col_lower for x in ['nat', 'country', 'nation', 'land', 'pays']):
-                    nationality = normalize_nationality(val_str)
-
-                # Gender/Sex
-                if gender is None and any(x in col_lower for x in ['gender', 'sex', 'geschlecht', 'sexe', 'm/w', 'm/f']):
-                    gender = normalize_gender(val_str)
-
-            # Validate we have minimum required fields
-            if firstname and lastname and nationality and gender:
-                # Generate entry ID if missing
-                if not entry_id:
-                    entry_id = str(len(runners) + 1)
-
-                runners.append({
-                    'entryId': entry_id,
-                    'firstname': firstname,
-                    'lastname': lastname,
-                    'nationality': nationality,
-                    'gender': gender,
-                })
-        except Exception as e:
-            # Skip problematic rows
-            print(f"Warning: Error processing row {idx}: {e}", file=sys.stderr)
-            continue
-
-    return runners
+    if table_data.empty:
+        return []
+
+    schema = infer_table_schema(tuple(str(col) for col in table_data.columns))
+    if not all(role in schema for role in ('firstname', 'lastname', 'nationality', 'gender')):
+        return []
+
+    cells = table_data.astype(str).apply(lambda col: col.str.strip())
+    cells = cells.mask(cells.isin(EMPTY_CELLS))
+
+    def first_filled(positions: Tuple[int, ...]):
+        values = cells.iloc[:, positions[0]]
+        for position in positions[1:]:
+            values = values.fillna(cells.iloc[:, position])
+        return values
+
+    fields = {role: first_filled(positions) for role, positions in schema.items()}
+
+    # Normalizers run once per distinct value, not once per row
+    for role, normalize in (('firstname', normalize_name), ('lastname', normalize_name),
+                            ('nationality', normalize_nationality), ('gender', normalize_gender)):
+        values = fields[role]
+        fields[role] = values.map({v: normalize(v) for v in values.dropna().unique()})
+
+    valid = (fields['firstname'].notna() & fields['lastname'].notna()
+             & fields['nationality'].notna() & fields['gender'].notna())
+
+    # Generated entry IDs number the valid rows of this table from 1
+    generated = valid.cumsum().astype(str)
+    entry_ids = fields['entryId'].fillna(generated) if 'entryId' in fields else generated
+
+    runners = {
+        'entryId': entry_ids[valid],
+        'firstname': fields['firstname'][valid],
+        'lastname': fields['lastname'][valid],
+        'nationality': fields['nationality'][valid],
+        'gender': fields['gender'][valid],
+    }
+    return [dict(zip(runners, row)) for row in zip(*runners.values())]
 
 
 def extract_from_text(text: str) -> List[Dict]:
@@ -183,61 +120,129 @@ def extract_from_text(text: str) -> List[Dict]:
     return runners
 
 
-def parse_entry_list(pdf_path: str) -> List[Dict]:
-    """
-    Parse IAU 24h entry list PDF and extract runner data.
+def page_ranges(total_pages: int, pages_per_range: int) -> List[Tuple[int, int]]:
+    """1-based inclusive (first, last) ranges covering the document; one range when pages_per_range is 0"""
+    if not pages_per_range or total_pages <= pages_per_range:
+        return [(1, total_pages)]
+    return [(first, min(first + pages_per_range - 1, total_pages))
+            for first in range(1, total_pages + 1, pages_per_range)]
 
-    Args:
-        pdf_path: Path to the PDF file
 
-    Returns:
-        List of runner dictionaries
+def iter_entry_list(pdf_path: str, profile: str = 'auto',
+                    pages_per_range: int = DEFAULT_PAGES_PER_RANGE) -> Iterator[Dict[str, Any]]:
     """
-    # Initialize Dockling converter
-    converter = DocumentConverter()
+    Parse an entry list PDF, yielding records as each page range is converted.
 
-    # Convert PDF
-    result = converter.convert(pdf_path)
+    The PDF is converted pages_per_range pages at a time (0 = the whole
+    document in one conversion), so the first runners are yielded after the
+    first range instead of after the whole document. Each range is cached on
+    its own. Yields 'section' records for section headers and tables,
+    'runner' records (duplicates by entryId dropped) and a final 'stats' record.
+    """
+    from docling_core.types.doc import TableItem
 
-    runners = []
+    started = time.monotonic()
+    profile = resolve_profile(pdf_path, profile)  # once for the document, not per range
+    ranges = page_ranges(count_pages(pdf_path), pages_per_range)
 
-    # Extract from tables (preferred method)
-    if hasattr(result, 'document') and hasattr(result.document, 'tables'):
-        for table in result.document.tables:
-            table_runners = extract_from_table(table)
-            runners.extend(table_runners)
+    seen_ids = set()
+    tables = 0
+    duplicates = 0
+    source = 'tables'
+    conversions = []
+
+    def unique(runners: List[Dict]) -> Iterator[Dict[str, Any]]:
+        nonlocal duplicates
+        for runner in runners:
+            if runner['entryId'] in seen_ids:
+                duplicates += 1
+                continue
+            seen_ids.add(runner['entryId'])
+            yield {'type': 'runner', **runner}
+
+    for page_range in ranges:
+        # Convert the range (cached by content hash and page range)
+        result = convert_pdf(pdf_path, page_range=None if len(ranges) == 1 else page_range, profile=profile)
+        conversions.append(result)
+
+        # Extract from tables in reading order (preferred method)
+        for item, _level in result.document.iterate_items():
+            if isinstance(item, TableItem):
+                tables += 1
+                yield {'type': 'section', 'title': None, 'table': tables}
+                yield from unique(extract_from_table(item))
+            elif getattr(item, 'label', None) in ('section_header', 'title'):
+                yield {'type': 'section', 'title': item.text, 'table': None}
 
     # Fallback: Extract from text if no tables found or insufficient data
-    if len(runners) == 0:
-        text = result.document.export_to_markdown() if hasattr(result.document, 'export_to_markdown') else ""
-        if text:
-            runners = extract_from_text(text)
+    markdown = '\n'.join(result.markdown for result in conversions if result.markdown)
+    if not seen_ids and markdown:
+        source = 'text'
+        yield from unique(extract_from_text(markdown))
+
+    pages = sum(result.pages for result in conversions)
+    converted = [result.seconds for result in conversions if result.seconds is not None]
+    yield {
+        'type': 'stats',
+        'runners': len(seen_ids),
+        'tables': tables,
+        'duplicates': duplicates,
+        'source': source,
+        'from_cache': all(result.from_cache for result in conversions),
+        'profile': profile,
+        'pages': pages,
+        'ranges': len(ranges),
+        'seconds_per_page': round(sum(converted) / pages, 3) if converted and pages else None,
+        'seconds': round(time.monotonic() - started, 3),
+    }
 
-    # Remove duplicates (by entryId)
-    seen_ids = set()
-    unique_runners = []
-    for runner in runners:
-        if runner['entryId'] not in seen_ids:
-            seen_ids.add(runner['entryId'])
-            unique_runners.append(runner)
 
-    return unique_runners
+def parse_entry_list(pdf_path: str, profile: str = 'auto',
+                     pages_per_range: int = DEFAULT_PAGES_PER_RANGE) -> List[Dict]:
+    """
+    Parse IAU 24h entry list PDF and extract runner data.
+
+    Args:
+        pdf_path: Path to the PDF file
+        profile: Docling profile ('auto', 'fast' or 'accurate')
+        pages_per_range: Pages per Docling conversion (0 = whole document)
+
+    Returns:
+        List of runner dictionaries
+    """
+    runners = []
+    for record in iter_entry_list(pdf_path, profile, pages_per_range):
+        if record.pop('type') == 'runner':
+            runners.append(record)
+    return runners
 
 
 def main():
     """Main entry point"""
-    if len(sys.argv) != 2:
-        print("Usage: python parse-entry-list.py <path-to-pdf>", file=sys.stderr)
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description='Parse an IAU 24h entry list PDF to JSON')
+    parser.add_argument('pdf_path', help='Path to PDF file')
+    parser.add_argument('--ndjson', action='store_true',
+                        help='Stream one JSON record per line (sections, runners, final stats)')
+    parser.add_argument('--pages-per-range', type=int, default=DEFAULT_PAGES_PER_RANGE,
+                        help=f'Pages per Docling conversion (default {DEFAULT_PAGES_PER_RANGE}; 0 = whole document at once)')
+    add_profile_arg(parser)
+    args = parser.parse_args()
 
-    pdf_path = sys.argv[1]
+    pdf_path = args.pdf_path
 
     if not Path(pdf_path).exists():
         print(f"Error: File not found: {pdf_path}", file=sys.stderr)
         sys.exit(1)
 
     try:
-        runners = parse_entry_list(pdf_path)
+        if args.ndjson:
+            for record in iter_entry_list(pdf_path, args.profile, args.pages_per_range):
+                sys.stdout.write(json.dumps(record, ensure_ascii=False) + '\n')
+                sys.stdout.flush()
+            print(f"Extracted {record['runners']} runners from {pdf_path}", file=sys.stderr)
+            return
+
+        runners = parse_entry_list(pdf_path, args.profile, args.pages_per_range)
 
         # Output JSON to stdout
         print(json.dumps(runners, indent=2, ensure_ascii=False))
@@ -0,0 +1,62 @@
+// lib/pdf/parse-worker-client.ts - Client for the warm PDF parse worker (scripts/pdf-parse-worker.py)
+
+const DEFAULT_WORKER_URL = 'http://127.0.0.1:8765'
+const HEALTH_TIMEOUT_MS = 500
+// The worker's JOB_TIMEOUT plus a margin: its 504 (which cancels the job) arrives first
+const PARSE_TIMEOUT_MS = 10 * 60 * 1000 + 30 * 1000
+
+export interface WorkerParseResult {
+  runners: Array<{
+    entry_id: string
+    firstname: string
+    lastname: string
+    nationality: string
+    gender: string
+  }>
+  count: number
+  saved: boolean
+  seconds: number
+}
+
+function workerUrl(): string {
+  return process.env.PDF_WORKER_URL || DEFAULT_WORKER_URL
+}
+
+/**
+ * Parse a PDF with the long-lived worker and save the runners to its database.
+ *
+ * Returns null when no worker is running (or its queue is full) so callers can
+ * fall back to spawning the parser script. Parse errors reported by a healthy
+ * worker are thrown.
+ */
+export async function parseWithWorker(pdf: Buffer): Promise<WorkerParseResult | null> {
+  const baseUrl = workerUrl()
+
+  try {
+    const health = await fetch(`${baseUrl}/health`, { signal: AbortSignal.timeout(HEALTH_TIMEOUT_MS) })
+    if (!health.ok || (await health.json()).status !== 'ok') {
+      return null
+    }
+  } catch {
+    return null
+  }
+
+  const response = await fetch(`${baseUrl}/parse?save=1`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/pdf' },
+    body: new Uint8Array(pdf),
+    signal: AbortSignal.timeout(PARSE_TIMEOUT_MS),
+  })
+
+  if (response.status === 503) {
+    console.warn('PDF parse worker queue full, falling back to script')
+    return null
+  }
+
+  const payload = await response.json()
+  if (!response.ok) {
+    throw new Error(payload.details || payload.error || `Parse worker returned ${response.status}`)
+  }
+
+  return payload as WorkerParseResult
+}
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Synthetic IAU-style entry list PDFs with known ground truth.
+
+Generates text-native PDFs laid out like the IAU 24H entry list: a page
+header, "XXX MEN" / "XXX WOMEN" section headers and rows of
+"<number> <SURNAME(S)> <Firstname(s)>" in fixed columns, with reserves
+numbered 'R'. Names include compound surnames, multi-part firstnames and
+accents (limited to WinAnsiEncoding). The PDF is written by hand with the
+built-in Helvetica font, so no PDF library is needed to build the corpus.
+
+Usage:
+    from synthetic_entry_list import generate_entry_list, write_entry_list_pdf
+
+    runners = generate_entry_list(500, seed=1)
+    pages = write_entry_list_pdf(runners, 'corpus/entry-list-500.pdf')
+"""
+
+import random
+from typing import Any, Dict, List
+
+COUNTRIES = [
+    'AUS', 'AUT', 'BEL', 'BRA', 'CAN', 'CZE', 'DEN', 'ESP', 'FIN', 'FRA',
+    'GBR', 'GER', 'HUN', 'IRL', 'ITA', 'JPN', 'LTU', 'NED', 'NOR', 'NZL',
+    'POL', 'POR', 'RSA', 'SLO', 'SUI', 'SVK', 'SWE', 'TPE', 'UKR', 'USA',
+]
+
+SURNAMES = [
+    'Andersen', 'Berg', 'Costa', 'Dubois', 'Eriksen', 'Fischer', 'García', 'Horváth',
+    'Ishikawa', 'Jensen', 'Kowalski', 'Lindqvist', 'Müller', 'Nakamura', 'Olsen',
+    'Petrovic', 'Quinn', 'Rossi', 'Søndergaard', 'Tanaka', 'Urbán', 'Virtanen',
+    'Walsh', 'Young', 'Zielinski', 'Brennan', 'Carvalho', 'Dvorák', 'Novak', 'Smith',
+]
+SURNAME_PARTICLES = ['De La', 'Van Der', 'Van', 'Di', 'De', 'Mac']
+
+FIRSTNAMES = [
+    'Anna', 'Bouchra', 'Camille', 'Dan', 'Elena', 'François', 'Gábor', 'Hanna',
+    'Ivan', 'Jörg', 'Kaori', 'Lars', 'Maria', 'Noémi', 'Oskar', 'Paula', 'Quentin',
+    'Rune', 'Sophie', 'Tomasz', 'Ulla', 'Viktor', 'Wiebke', 'Yuki', 'Zoé',
+]
+
+# Page geometry (points, A4)
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+TOP_Y = 780
+BOTTOM_Y = 60
+LINE_HEIGHT = 14
+COLUMN_X = (60, 110, 320)  # number, surname, firstname
+PAGE_HEADER = [
+    (16, 'IAU 24H World Championships - Entry List'),
+    (10, 'Albi, France - 18-19 October 2025'),
+]
+
+
+def _surname(rng: random.Random) -> str:
+    roll = rng.random()
+    if roll < 0.12:
+        return f"{rng.choice(SURNAME_PARTICLES)} {rng.choice(SURNAMES)}"
+    if roll < 0.2:
+        return f"{rng.choice(SURNAMES)}-{rng.choice(SURNAMES)}"
+    return rng.choice(SURNAMES)
+
+
+def _firstname(rng: random.Random) -> str:
+    if rng.random() < 0.15:
+        return f"{rng.choice(FIRSTNAMES)} {rng.choice(FIRSTNAMES)}"
+    return rng.choice(FIRSTNAMES)
+
+
+def generate_entry_list(athletes: int, seed: int = 0, reserve_rate: float = 0.08) -> List[Dict[str, Any]]:
+    """
+    Generate ground-truth runners in entry list order (country, then MEN/WOMEN).
+
+    Each runner has number (str, 'R' for reserves), lastname, firstname,
+    nationality and gender. Numbers restart at 1 in every section.
+    """
+    rng = random.Random(seed)
+    sections = [(country, gender) for country in COUNTRIES for gender in ('M', 'W')]
+
+    # Spread athletes unevenly across sections, at least one per used section
+    used = sections[:max(1, min(len(sections), athletes // 4))]
+    weights = [rng.uniform(0.5, 2.0) for _ in used]
+    counts = [1] * len(used)
+    for _ in range(athletes - len(used)):
+        counts[rng.choices(range(len(used)), weights)[0]] += 1
+
+    runners = []
+    for (country, gender), count in zip(used, counts):
+        reserves = sum(1 for _ in range(count) if rng.random() < reserve_rate)
+        for idx in range(count):
+            runners.append({
+                'number': 'R' if idx >= count - reserves else str(idx + 1),
+                'lastname': _surname(rng),
+                'firstname': _firstname(rng),
+                'nationality': country,
+                'gender': gender,
+            })
+    return runners
+
+
+def _pdf_string(text: str) -> bytes:
+    encoded = text.encode('cp1252', errors='replace')
+    return b'(' + encoded.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+def _layout_pages(runners: List[Dict[str, Any]]) -> List[List[tuple]]:
+    """Lay runners out as pages of (x, y, size, text) items"""
+    pages = []
+    items = None
+    y = 0
+    section = None
+
+    def new_page():
+        nonlocal items, y
+        items = []
+        pages.append(items)
+        y = TOP_Y
+        for size, text in PAGE_HEADER:
+            items.append((COLUMN_X[0], y, size, text))
+            y -= size + 8
+        items.append((COLUMN_X[0], y, 9, 'No'))
+        items.append((COLUMN_X[1], y, 9, 'Surname'))
+        items.append((COLUMN_X[2], y, 9, 'First name'))
+        y -= LINE_HEIGHT + 4
+
+    new_page()
+    for runner in runners:
+        key = (runner['nationality'], runner['gender'])
+        if key != section:
+            # Keep a header with at least one of its rows
+            if y - 2 * LINE_HEIGHT - 8 < BOTTOM_Y:
+                new_page()
+            y -= 6
+            label = 'MEN' if runner['gender'] == 'M' else 'WOMEN'
+            items.append((COLUMN_X[0], y, 11, f"{runner['nationality']} {label}"))
+            y -= LINE_HEIGHT + 2
+            section = key
+        elif y - LINE_HEIGHT < BOTTOM_Y:
+            new_page()
+
+        items.append((COLUMN_X[0], y, 10, runner['number']))
+        items.append((COLUMN_X[1], y, 10, runner['lastname'].upper()))
+        items.append((COLUMN_X[2], y, 10, runner['firstname']))
+        y -= LINE_HEIGHT
+
+    return pages
+
+
+def write_entry_list_pdf(runners: List[Dict[str, Any]], path: str) -> int:
+    """Write runners as an IAU-style entry list PDF; returns the page count"""
+    pages = _layout_pages(runners)
+
+    # Objects: 1 catalog, 2 pages, 3 font, then (page, content) pairs
+    objects = {
+        1: b'<< /Type /Catalog /Pages 2 0 R >>',
+        3: b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>',
+    }
+    kids = []
+    for idx, items in enumerate(pages):
+        page_id = 4 + 2 * idx
+        content_id = page_id + 1
+        kids.append(f"{page_id} 0 R".encode())
+
+        stream = bytearray()
+        for x, y, size, text in items:
+            stream += b'BT /F1 %d Tf %d %d Td ' % (size, x, y) + _pdf_string(text) + b' Tj ET\n'
+
+        objects[page_id] = (b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] '
+                            b'/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>'
+                            % (PAGE_WIDTH, PAGE_HEIGHT, content_id))
+        objects[content_id] = b'<< /Length %d >>\nstream\n' % len(stream) + bytes(stream) + b'endstream'
+
+    objects[2] = b'<< /Type /Pages /Kids [' + b' '.join(kids) + b'] /Count %d >>' % len(pages)
+
+    out = bytearray(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+    offsets = {}
+    for obj_id in sorted(objects):
+        offsets[obj_id] = len(out)
+        out += b'%d 0 obj\n' % obj_id + objects[obj_id] + b'\nendobj\n'
+
+    xref_at = len(out)
+    size = max(objects) + 1
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % size
+    for obj_id in range(1, size):
+        out += b'%010d 00000 n \n' % offsets[obj_id]
+    out += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (size, xref_at)
+
+    with open(path, 'wb') as f:
+        f.write(out)
+
+    return len(pages)
@@ -4,19 +4,17 @@ Test script for parse-entry-list.py
 Validates the parser structure and functions without requiring a PDF
 """
 
+import os
 import sys
 import json
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
 # Test the parser functions
 def test_normalize_functions():
-    """Test normalization functions"""
-    # Import the parser module
-    sys.path.insert(0, '.')
-    from parse_entry_list import (
-        normalize_name,
-        normalize_gender,
-        normalize_nationality
-    )
+    """Test normalization functions (entry_list.py, shared by every parser; no Docling needed)"""
+    from entry_list import normalize_name, normalize_gender, normalize_nationality
 
     # Test normalize_name
     assert normalize_name("  john  ") == "John"
@@ -84,25 +82,8 @@ if __name__ == "__main__":
 
         # Try to import and test normalization if module is available
         try:
-            # Rename the module for import
-            import os
-            script_dir = os.path.dirname(os.path.abspath(__file__))
-            parser_path = os.path.join(script_dir, 'parse-entry-list.py')
-            if os.path.exists(parser_path):
-                # Read and create a temporary importable version
-                with open(parser_path, 'r') as f:
-                    code = f.read()
-
-                # Create temporary module
-                temp_path = os.path.join(script_dir, 'parse_entry_list.py')
-                with open(temp_path, 'w') as f:
-                    f.write(code)
-
-                test_normalize_functions()
-
-                # Clean up
-                os.remove(temp_path)
-        except Exception as e:
+            test_normalize_functions()
+        except ImportError as e:
             print(f"\nNote: Could not test normalization functions: {e}")
             print("This is expected if docling is not installed yet.")
 
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Entry List Parser Benchmark
+
+Usage:
+    python scripts/benchmark-parsers.py [--sizes 100,500,2000] [--backends tiered,with-columns] [--json]
+
+This script:
+1. Generates synthetic IAU-style entry list PDFs with known ground truth
+   (lib/pdf/synthetic_entry_list.py)
+2. Runs every parser backend on each PDF in its own subprocess, against a
+   throwaway database and Docling cache
+3. Reports pages/sec, peak RSS and field-level accuracy per backend and size
+
+Accuracy aligns parsed runners with the ground truth by full name (so a wrong
+surname/firstname split still aligns) and scores lastname, firstname,
+nationality and gender on the aligned pairs. Recall is aligned / expected
+runners, precision is aligned / parsed runners.
+
+Peak RSS is the backend process itself (os.wait4); process-pool workers
+started by --workers are not included.
+"""
+
+import sys
+import os
+import json
+import time
+import difflib
+import argparse
+import tempfile
+import subprocess
+from typing import Any, Dict, List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'lib', 'pdf'))
+from synthetic_entry_list import generate_entry_list, write_entry_list_pdf
+sys.path.insert(0, os.path.join(REPO_ROOT, 'lib', 'db'))
+from sqlite_db import connect, ensure_schema
+
+FIELDS = ('lastname', 'firstname', 'nationality', 'gender')
+
+# name -> (script, extra args, output): 'db' backends save to --db-path,
+# 'json' backends print a runner array to stdout
+BACKENDS = {
+    'simple': ('scripts/parse-pdf-simple.py', [], 'db'),
+    'with-columns': ('scripts/parse-pdf-with-columns.py', [], 'db'),
+    'tiered': ('scripts/parse-pdf-tiered.py', [], 'db'),
+    'iau-entrylist': ('scripts/parse-iau-entrylist.py', ['--no-cache'], 'db'),
+    'backend': ('scripts/parse-pdf-backend.py', ['--no-cache'], 'db'),
+    'entry-list': ('lib/pdf/parse-entry-list.py', [], 'json'),
+}
+
+
+def build_corpus(sizes: List[int], corpus_dir: str, seed: int) -> List[Dict[str, Any]]:
+    """Generate one PDF per size with its ground truth"""
+    corpus = []
+    for size in sizes:
+        truth = generate_entry_list(size, seed=seed + size)
+        pdf_path = os.path.join(corpus_dir, f"entry-list-{size}.pdf")
+        pages = write_entry_list_pdf(truth, pdf_path)
+        with open(os.path.join(corpus_dir, f"entry-list-{size}.json"), 'w', encoding='utf-8') as f:
+            json.dump(truth, f, ensure_ascii=False, indent=2)
+        corpus.append({'size': size, 'pdf': pdf_path, 'pages': pages, 'truth': truth})
+    return corpus
+
+
+def run_backend(name: str, pdf_path: str, work_dir: str, timeout: int) -> Dict[str, Any]:
+    """Run one backend in a subprocess and return its runners, wall time and peak RSS"""
+    script, extra_args, output = BACKENDS[name]
+    db_path = os.path.join(work_dir, f"{name}.db")
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    conn = connect(db_path, apply_schema=False)
+    ensure_schema(conn)  # Fresh file every run, so skip the once-per-process shortcut
+    conn.close()
+
+    args = [sys.executable, os.path.join(REPO_ROOT, script), pdf_path] + extra_args
+    if output == 'db':
+        args += ['--db-path', db_path]
+
+    env = dict(os.environ, DOCLING_CACHE_DIR=os.path.join(work_dir, 'docling-cache'))
+    stdout_path = os.path.join(work_dir, f"{name}.stdout")
+    stderr_path = os.path.join(work_dir, f"{name}.stderr")
+
+    started = time.monotonic()
+    timed_out = False
+    with open(stdout_path, 'wb') as out, open(stderr_path, 'wb') as err:
+        proc = subprocess.Popen(args, stdout=out, stderr=err, env=env, cwd=REPO_ROOT)
+        # Reap with wait4 (not Popen.wait) to get the child's own rusage
+        while True:
+            pid, status, usage = os.wait4(proc.pid, os.WNOHANG)
+            if pid:
+                break
+            if time.monotonic() - started > timeout:
+                proc.kill()
+                _, status, usage = os.wait4(proc.pid, 0)
+                timed_out = True
+                break
+            time.sleep(0.01)
+    elapsed = time.monotonic() - started
+    exit_code = proc.returncode = os.waitstatus_to_exitcode(status)
+
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss_mb = usage.ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+    result = {'seconds': elapsed, 'rss_mb': rss_mb, 'exit_code': exit_code, 'runners': []}
+    if timed_out:
+        result['error'] = f"timed out after {timeout}s"
+        return result
+    if exit_code != 0:
+        with open(stderr_path, encoding='utf-8', errors='replace') as f:
+            lines = [line.strip() for line in f if line.strip()]
+        errors = [line for line in lines if 'ERROR' in line or 'Error' in line]
+        result['error'] = (errors or lines or [f"exit code {exit_code}"])[-1]
+        return result
+
+    if output == 'db':
+        conn = connect(db_path, apply_schema=False)
+        cursor = conn.execute(f"SELECT {', '.join(FIELDS)} FROM runners ORDER BY id")
+        result['runners'] = [dict(zip(FIELDS, row)) for row in cursor]
+        conn.close()
+    else:
+        with open(stdout_path, encoding='utf-8') as f:
+            result['runners'] = json.load(f)
+
+    return result
+
+
+def _full_name(runner: Dict[str, Any]) -> str:
+    return ' '.join(f"{runner.get('lastname') or ''} {runner.get('firstname') or ''}".casefold().split())
+
+
+def score(truth: List[Dict[str, Any]], parsed: List[Dict[str, Any]]) -> Dict[str, float]:
+    """Field-level accuracy of parsed runners against the ground truth"""
+    matcher = difflib.SequenceMatcher(None, [_full_name(r) for r in truth],
+                                      [_full_name(r) for r in parsed], autojunk=False)
+    pairs = []
+    for tag, t1, t2, p1, p2 in matcher.get_opcodes():
+        if tag == 'equal' or (tag == 'replace' and t2 - t1 == p2 - p1):
+            pairs.extend(zip(truth[t1:t2], parsed[p1:p2]))
+
+    # 'replace' pairs are positional guesses; only count them when the name is close
+    aligned = [(t, p) for t, p in pairs
+               if difflib.SequenceMatcher(None, _full_name(t), _full_name(p)).ratio() >= 0.8]
+
+    scores = {
+        'recall': len(aligned) / len(truth) if truth else 0.0,
+        'precision': len(aligned) / len(parsed) if parsed else 0.0,
+    }
+    for field in FIELDS:
+        if field in ('lastname', 'firstname'):
+            correct = sum(1 for t, p in aligned if (p.get(field) or '').casefold() == t[field].casefold())
+        else:
+            correct = sum(1 for t, p in aligned if p.get(field) == t[field])
+        scores[field] = correct / len(truth) if truth else 0.0
+    return scores
+
+
+def format_table(rows: List[Dict[str, Any]]) -> str:
+    header = (f"{'backend':<14} {'size':>5} {'pages':>5} {'sec':>7} {'pages/s':>8} {'RSS MB':>7} "
+              f"{'recall':>6} {'prec':>6} {'last':>6} {'first':>6} {'nat':>6} {'gender':>6}")
+    lines = [header, '-' * len(header)]
+    for row in rows:
+        if row.get('error'):
+            lines.append(f"{row['backend']:<14} {row['size']:>5} {row['pages']:>5}  failed: {row['error'][:70]}")
+            continue
+        lines.append(
+            f"{row['backend']:<14} {row['size']:>5} {row['pages']:>5} {row['seconds']:>7.2f} "
+            f"{row['pages_per_sec']:>8.1f} {row['rss_mb']:>7.0f} "
+            + ' '.join(f"{row[k]:>6.1%}" for k in ('recall', 'precision', *FIELDS))
+        )
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark entry list parsers on synthetic PDFs with known ground truth')
+    parser.add_argument('--sizes', default='100,500,2000', help='Comma-separated athlete counts (default: 100,500,2000)')
+    parser.add_argument('--backends', default=','.join(BACKENDS), help=f"Comma-separated backends (default: all of {', '.join(BACKENDS)})")
+    parser.add_argument('--seed', type=int, default=24, help='Seed for the synthetic corpus')
+    parser.add_argument('--corpus-dir', help='Keep the generated PDFs and ground truth here')
+    parser.add_argument('--timeout', type=int, default=1800, help='Seconds before a backend run is killed')
+    parser.add_argument('--json', action='store_true', help='Output results as JSON to stdout')
+
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+    backends = [b.strip() for b in args.backends.split(',') if b.strip()]
+    unknown = [b for b in backends if b not in BACKENDS]
+    if unknown:
+        print(f"ERROR: Unknown backend(s): {', '.join(unknown)}", file=sys.stderr)
+        sys.exit(1)
+
+    with tempfile.TemporaryDirectory(prefix='parser-bench-') as work_dir:
+        corpus_dir = args.corpus_dir or os.path.join(work_dir, 'corpus')
+        os.makedirs(corpus_dir, exist_ok=True)
+        corpus = build_corpus(sizes, corpus_dir, args.seed)
+
+        rows = []
+        for entry in corpus:
+            print(f"\n{entry['size']} athletes, {entry['pages']} pages: {entry['pdf']}", file=sys.stderr)
+            for name in backends:
+                print(f"  {name}...", file=sys.stderr)
+                result = run_backend(name, entry['pdf'], work_dir, args.timeout)
+                row = {'backend': name, 'size': entry['size'], 'pages': entry['pages'],
+                       'seconds': round(result['seconds'], 3), 'rss_mb': round(result['rss_mb'], 1),
+                       'parsed': len(result['runners'])}
+                if 'error' in result:
+                    row['error'] = result['error']
+                else:
+                    row['pages_per_sec'] = round(entry['pages'] / result['seconds'], 2) if result['seconds'] else None
+                    row.update({k: round(v, 4) for k, v in score(entry['truth'], result['runners']).items()})
+                rows.append(row)
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print()
+        print(format_table(rows))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Query Benchmark with Query Plan Checks
+
+Usage:
+    python scripts/benchmark-queries.py [--scales 10,100] [--repeat 100] [--json]
+    python scripts/benchmark-queries.py --db-path data/iau24hwc.db    # the real database instead
+
+This script:
+1. Builds a synthetic database per scale (lib/db/synthetic_db.py), three
+   races of 10x and 100x today's field by default: tables first, indexes from
+   schema.sql after
+2. Runs each canonical query below (the access paths of the web app in
+   lib/db/database.ts and of the CLI tools, scoped to one race as the tools
+   are) with parameters sampled from the data, and reports p50/p95 latency
+3. Records EXPLAIN QUERY PLAN for each query and fails it when it scans a
+   whole table without an index, or when its p50 is over its latency budget
+
+Exits with status 1 when any query fails, so it can gate schema changes.
+Budgets are p50 milliseconds at the largest default scale on a laptop;
+--budget-factor scales them for slower machines. The check uses the median
+because a 1-3 ms p95 moves with every scheduler hiccup; p95 is reported only.
+"""
+
+import sys
+import os
+import re
+import json
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+from typing import Any, Callable, Dict, List, NamedTuple, Sequence, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'lib', 'db'))
+from sqlite_db import connect, create_tables, ensure_schema, resolve_db_path
+from synthetic_db import populate
+from pg_sync import TABLES_BY_NAME
+
+# "SCAN runners" / "SCAN TABLE runners AS r" without "USING ... INDEX" reads every row
+FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS \w+)?(?!.*\bUSING\b.*\bINDEX\b)')
+# Slow queries stop repeating after this long (but after at least MIN_RUNS runs)
+TIME_CAP_SEC = 3.0
+MIN_RUNS = 10
+
+
+class BenchQuery(NamedTuple):
+    name: str
+    source: str  # Where the app or a tool runs this query
+    sql: str
+    params: Callable[[Dict[str, List[Any]], int], Sequence[Any]]  # (samples, iteration) -> parameters
+    budget_ms: float  # p50
+    full_scan_ok: bool = False  # Batch jobs that read every matched runner by design
+
+
+def _pick(key: str, samples: Dict[str, List[Any]], i: int) -> Any:
+    values = samples[key]
+    return values[i % len(values)] if values else None
+
+
+QUERIES = (
+    BenchQuery('runner_by_entry_id', 'database.ts getRunnerByEntryId, team runner lookup',
+               "SELECT * FROM runners WHERE race_id = ? AND entry_id = ?",
+               lambda s, i: _pick('entry', s, i), 1),
+    BenchQuery('runner_by_duv_id', 'match-runners.py / fetch-performances.py',
+               "SELECT id FROM runners WHERE duv_id = ?",
+               lambda s, i: (_pick('duv_id', s, i),), 1),
+    BenchQuery('previous_match', 'match-runners.py previous_match (same athlete in another race)',
+               """SELECT r.duv_id, r.match_status, r.match_confidence, ra.name FROM runners r
+                  JOIN races ra ON ra.id = r.race_id
+                  WHERE r.race_id IN (SELECT id FROM races WHERE id != ?)
+                  AND r.match_status IN ('auto-matched', 'manually-matched') AND r.duv_id IS NOT NULL
+                  AND r.lastname = ? COLLATE NOCASE AND r.firstname = ? COLLATE NOCASE
+                  AND r.nationality = ? AND r.gender = ?
+                  ORDER BY ra.race_date DESC LIMIT 1""",
+               lambda s, i: _pick('entrant', s, i), 2),
+    BenchQuery('top_pbs_all_time', 'runners page: best all-time PBs per gender',
+               """SELECT id, entry_id, firstname, lastname, nationality, personal_best_all_time FROM runners
+                  WHERE race_id = ? AND gender = ? AND dns = 0 AND personal_best_all_time IS NOT NULL
+                  ORDER BY personal_best_all_time DESC LIMIT 50""",
+               lambda s, i: (_pick('race_id', s, i), 'MW'[i % 2]), 2),
+    BenchQuery('top_pbs_last_2_years', 'runners page: best recent PBs per gender',
+               """SELECT id, entry_id, firstname, lastname, nationality, personal_best_last_2_years FROM runners
+                  WHERE race_id = ? AND gender = ? AND dns = 0 AND personal_best_last_2_years IS NOT NULL
+                  ORDER BY personal_best_last_2_years DESC LIMIT 50""",
+               lambda s, i: (_pick('race_id', s, i), 'MW'[i % 2]), 2),
+    BenchQuery('team_top_three', 'database.ts calculateAndSaveTeams/getTeams, per nationality',
+               """SELECT id, personal_best_all_time FROM runners
+                  WHERE race_id = ? AND nationality = ? AND gender = ? AND dns = 0
+                  ORDER BY personal_best_all_time DESC LIMIT 3""",
+               lambda s, i: _pick('squad', s, i), 1),
+    BenchQuery('team_rankings', 'database.ts getTeams',
+               "SELECT * FROM teams WHERE race_id = ? AND metric = ? AND gender = ? ORDER BY rank",
+               lambda s, i: (_pick('race_id', s, i), ('all-time', 'last-2-years')[i // 2 % 2], 'MW'[i % 2]), 3),
+    BenchQuery('runner_history', 'database.ts getPerformances (runner detail), shared per athlete',
+               "SELECT * FROM performances WHERE duv_id = ? ORDER BY event_date DESC",
+               lambda s, i: (_pick('duv_id', s, i),), 2),
+    BenchQuery('runner_discipline_pbs', 'runner detail: PB per discipline',
+               "SELECT * FROM runner_pbs WHERE runner_id = ?",
+               lambda s, i: (_pick('matched_id', s, i),), 1),
+    BenchQuery('discipline_leaderboard', 'best runners of a race in one discipline (runner_pbs)',
+               """SELECT pb.runner_id, pb.pb_all_time FROM runner_pbs pb
+                  JOIN runners r ON r.id = pb.runner_id
+                  WHERE pb.event_type = ? AND pb.pb_all_time IS NOT NULL AND r.race_id = ?
+                  ORDER BY pb.pb_all_time DESC LIMIT 50""",
+               lambda s, i: (('24h', '12h', '6h', '48h')[i % 4], _pick('race_id', s, i)), 2),
+    BenchQuery('candidates_for_runner', 'database.ts getMatchCandidates, match review',
+               "SELECT * FROM match_candidates WHERE runner_id = ? ORDER BY confidence DESC",
+               lambda s, i: (_pick('runner_id', s, i),), 1),
+    BenchQuery('review_queue', 'manual-match.py load_candidates',
+               """SELECT runner_id, duv_person_id, firstname, lastname, year_of_birth, nation, sex, confidence
+                  FROM (
+                      SELECT mc.*, ROW_NUMBER() OVER (
+                          PARTITION BY mc.runner_id ORDER BY mc.confidence DESC, mc.id
+                      ) AS rank
+                      FROM match_candidates mc
+                      JOIN runners r ON r.id = mc.runner_id
+                      WHERE r.race_id = ? AND r.match_status = ?
+                  )
+                  WHERE rank <= ?
+                  ORDER BY runner_id, rank""",
+               lambda s, i: (_pick('race_id', s, i), 'unmatched', 5), 300),
+    BenchQuery('name_prefix_page', 'view-runners.py --name',
+               """SELECT entry_id, firstname, lastname, nationality, gender, match_status FROM runners
+                  WHERE race_id = ? AND search_name >= ? AND search_name < ? ORDER BY entry_id LIMIT ?""",
+               lambda s, i: (_pick('race_id', s, i), _pick('name_prefix', s, i),
+                             _pick('name_prefix', s, i) + '\U0010ffff', 500), 8),
+    BenchQuery('runner_page', 'view-runners.py keyset page',
+               """SELECT entry_id, firstname, lastname, nationality, gender, match_status FROM runners
+                  WHERE race_id = ? AND entry_id > ? ORDER BY entry_id LIMIT ?""",
+               lambda s, i: (*_pick('entry', s, i), 500), 3),
+    BenchQuery('nationality_page', 'view-runners.py --nationality',
+               """SELECT entry_id, firstname, lastname, nationality, gender, match_status FROM runners
+                  WHERE race_id = ? AND nationality = ? ORDER BY entry_id LIMIT ?""",
+               lambda s, i: (*_pick('squad', s, i)[:2], 500), 2),
+    BenchQuery('changed_performances', 'sync-changes.py delta since the watermark (pg_sync source)',
+               f"SELECT * FROM ({TABLES_BY_NAME['performances'].source}) WHERE updated_at > :since",
+               lambda s, i: {'race_id': _pick('race_id', s, i), 'since': _pick('watermark', s, i)}, 250),
+    BenchQuery('fetch_retry_queue', 'fetch-performances.py --retry-failed',
+               """SELECT r.* FROM fetch_failures f
+                  CROSS JOIN runners r ON r.duv_id = f.duv_id AND r.race_id = ?
+                  WHERE f.attempts < ? AND f.next_attempt_at <= ?
+                  ORDER BY f.next_attempt_at""",
+               lambda s, i: (_pick('race_id', s, i), 5, '2025-10-10 12:00:00'), 4),
+    BenchQuery('refresh_queue', 'fetch-performances.py --daemon build_refresh_queue',
+               """SELECT r.id, r.duv_id,
+                      CASE WHEN r.personal_best_last_2_years IS NULL THEN NULL
+                           ELSE RANK() OVER (PARTITION BY r.gender ORDER BY r.personal_best_last_2_years DESC)
+                      END AS seed_rank,
+                      (SELECT MAX(p.event_date) FROM performances p WHERE p.duv_id = r.duv_id) AS last_race
+                  FROM runners r
+                  LEFT JOIN fetch_failures f ON f.duv_id = r.duv_id
+                  WHERE r.race_id = ?
+                  AND r.match_status IN ('auto-matched', 'manually-matched')
+                  AND r.duv_id IS NOT NULL
+                  AND (f.duv_id IS NULL OR (f.attempts < ? AND f.next_attempt_at <= ?))""",
+               lambda s, i: (_pick('race_id', s, i), 5, '2025-10-10 12:00:00'), 400),
+)
+QUERIES_BY_NAME = {q.name: q for q in QUERIES}
+
+
+def sample_parameters(conn: sqlite3.Connection, count: int = 200, seed: int = 0) -> Dict[str, List[Any]]:
+    """Parameter values drawn from the data, so every lookup hits real rows"""
+    rng = random.Random(seed)
+
+    def column(sql: str) -> List[Any]:
+        values = [row[0] for row in conn.execute(sql)]
+        return rng.sample(values, min(count, len(values)))
+
+    def rows(sql: str) -> List[Tuple[Any, ...]]:
+        values = [tuple(row) for row in conn.execute(sql)]
+        return rng.sample(values, min(count, len(values)))
+
+    total = conn.execute("SELECT COUNT(*) FROM performances").fetchone()[0]
+    watermark = conn.execute("SELECT updated_at FROM performances ORDER BY updated_at DESC LIMIT 1 OFFSET ?",
+                             (total // 100,)).fetchone()  # ~1% of the history changed since
+    return {
+        'race_id': column("SELECT id FROM races"),
+        'entry': rows("SELECT race_id, entry_id FROM runners"),
+        'entrant': rows("SELECT race_id, lastname, firstname, nationality, gender FROM runners"),
+        'runner_id': column("SELECT id FROM runners"),
+        'matched_id': column("SELECT id FROM runners WHERE duv_id IS NOT NULL"),
+        'duv_id': column("SELECT duv_id FROM runners WHERE duv_id IS NOT NULL"),
+        'squad': rows("SELECT DISTINCT race_id, nationality, gender FROM runners"),
+        # search_name is empty until the runners are re-imported; '' then matches every name
+        'name_prefix': [name[:4] for name in column("SELECT search_name FROM runners WHERE search_name IS NOT NULL")]
+                       or [''],
+        'watermark': [watermark[0] if watermark else ''],
+    }
+
+
+def query_plan(conn: sqlite3.Connection, sql: str, params: Sequence[Any]) -> List[str]:
+    """EXPLAIN QUERY PLAN details, indented by depth"""
+    rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    depth = {0: 0}
+    lines = []
+    for node_id, parent, _, detail in rows:
+        depth[node_id] = depth.get(parent, 0) + 1
+        lines.append('  ' * (depth[node_id] - 1) + detail)
+    return lines
+
+
+def full_scans(plan: List[str], tables: set) -> List[str]:
+    """Tables read in full (subqueries and CTEs scanning their own results don't count)"""
+    scanned = []
+    for line in plan:
+        match = FULL_SCAN.match(line.strip())
+        if match and match.group(1) in tables:
+            scanned.append(match.group(1))
+    return scanned
+
+
+def run_query(conn: sqlite3.Connection, query: BenchQuery, samples: Dict[str, List[Any]],
+              repeat: int, budget_factor: float, tables: set) -> Dict[str, Any]:
+    plan = query_plan(conn, query.sql, query.params(samples, 0))
+    for i in range(3):  # Warm the page cache
+        conn.execute(query.sql, query.params(samples, i)).fetchall()
+
+    timings, rows = [], 0
+    deadline = time.perf_counter() + TIME_CAP_SEC
+    for i in range(repeat):
+        params = query.params(samples, i)
+        started = time.perf_counter()
+        rows += len(conn.execute(query.sql, params).fetchall())
+        timings.append((time.perf_counter() - started) * 1000)
+        if i + 1 >= MIN_RUNS and started > deadline:
+            break
+    timings.sort()
+
+    budget = query.budget_ms * budget_factor
+    result = {
+        'query': query.name,
+        'source': query.source,
+        'p50_ms': round(timings[len(timings) // 2], 3),
+        'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+        'max_ms': round(timings[-1], 3),
+        'budget_ms': budget,
+        'runs': len(timings),
+        'rows': round(rows / len(timings), 1),
+        'plan': plan,
+        'failures': [],
+    }
+    scanned = [] if query.full_scan_ok else full_scans(plan, tables)
+    if scanned:
+        result['failures'].append(f"full scan of {', '.join(scanned)}")
+    if result['p50_ms'] > budget:
+        result['failures'].append(f"p50 {result['p50_ms']:.2f} ms over budget {budget:g} ms")
+    return result
+
+
+def benchmark_database(db_path: str, queries: List[BenchQuery], repeat: int,
+                       budget_factor: float, seed: int) -> List[Dict[str, Any]]:
+    conn = connect(db_path)
+    try:
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        samples = sample_parameters(conn, seed=seed)
+        return [run_query(conn, query, samples, repeat, budget_factor, tables) for query in queries]
+    finally:
+        conn.close()
+
+
+def build_database(db_path: str, scale: float, seed: int) -> Dict[str, int]:
+    """Synthetic database: unindexed tables, bulk insert, then schema.sql's indexes and triggers"""
+    conn = connect(db_path, apply_schema=False)
+    try:
+        create_tables(conn)
+        counts = populate(conn, scale, seed)
+        ensure_schema(conn)
+    finally:
+        conn.close()
+    return counts
+
+
+def format_table(results: List[Dict[str, Any]], show_plans: bool = False) -> str:
+    header = f"{'query':<24} {'p50 ms':>8} {'p95 ms':>8} {'budget':>7} {'rows':>8}  status"
+    lines = [header, '-' * len(header)]
+    for r in results:
+        status = 'ok' if not r['failures'] else 'FAIL: ' + '; '.join(r['failures'])
+        lines.append(f"{r['query']:<24} {r['p50_ms']:>8.3f} {r['p95_ms']:>8.3f} {r['budget_ms']:>7g} "
+                     f"{r['rows']:>8g}  {status}")
+        if show_plans or r['failures']:
+            lines.extend(f"{'':<26}{line}" for line in r['plan'])
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the canonical queries on scaled synthetic databases and check their query plans')
+    parser.add_argument('--scales', default='10,100', help="Comma-separated multiples of today's field (default: 10,100)")
+    parser.add_argument('--db-path', help='Benchmark this database instead of synthetic ones')
+    parser.add_argument('--queries', default=','.join(QUERIES_BY_NAME), help='Comma-separated queries to run (default: all)')
+    parser.add_argument('--repeat', type=int, default=100, help=f'Timed runs per query, fewer for queries slower than {TIME_CAP_SEC:g}s in total (default: 100)')
+    parser.add_argument('--budget-factor', type=float, default=1.0, help='Multiply every latency budget (slow machines, CI)')
+    parser.add_argument('--seed', type=int, default=24, help='Seed for the synthetic data and parameters')
+    parser.add_argument('--keep-dir', help='Build the synthetic databases here and keep them')
+    parser.add_argument('--plans', action='store_true', help='Print every query plan, not only failing ones')
+    parser.add_argument('--json', action='store_true', help='Output results as JSON to stdout')
+
+    args = parser.parse_args()
+
+    names = [q.strip() for q in args.queries.split(',') if q.strip()]
+    unknown = [q for q in names if q not in QUERIES_BY_NAME]
+    if unknown:
+        print(f"ERROR: Unknown query(s): {', '.join(unknown)}", file=sys.stderr)
+        sys.exit(1)
+    queries = [QUERIES_BY_NAME[q] for q in names]
+    repeat = max(1, args.repeat)
+
+    runs = []
+    if args.db_path:
+        db_path = resolve_db_path(args.db_path)
+        if not os.path.exists(db_path):
+            print(f"ERROR: Database not found: {db_path}", file=sys.stderr)
+            sys.exit(1)
+        print(f"Benchmarking {db_path}...", file=sys.stderr)
+        runs.append({'database': db_path, 'results': benchmark_database(db_path, queries, repeat,
+                                                                         args.budget_factor, args.seed)})
+    else:
+        scales = [float(s) for s in args.scales.split(',') if s.strip()]
+        with tempfile.TemporaryDirectory(prefix='query-bench-') as work_dir:
+            build_dir = args.keep_dir or work_dir
+            os.makedirs(build_dir, exist_ok=True)
+            for scale in scales:
+                db_path = os.path.join(build_dir, f"synthetic-{scale:g}x.db")
+                for suffix in ('', '-wal', '-shm'):
+                    if os.path.exists(db_path + suffix):
+                        os.remove(db_path + suffix)
+                started = time.monotonic()
+                counts = build_database(db_path, scale, args.seed)
+                print(f"Built {scale:g}x database in {time.monotonic() - started:.1f}s: "
+                      + ', '.join(f"{n} {t}" for t, n in counts.items()), file=sys.stderr)
+                runs.append({'scale': scale, 'database': db_path, 'rows': counts,
+                             'results': benchmark_database(db_path, queries, repeat, args.budget_factor, args.seed)})
+
+    failed = sum(1 for run in runs for r in run['results'] if r['failures'])
+    if args.json:
+        print(json.dumps(runs, indent=2))
+    else:
+        for run in runs:
+            label = f"{run['scale']:g}x today's field" if 'scale' in run else run['database']
+            print(f"\n{label}")
+            print(format_table(run['results'], args.plans))
+
+    if failed:
+        print(f"\n✗ {failed} query check(s) failed", file=sys.stderr)
+        sys.exit(1)
+    print(f"\n✓ All {sum(len(run['results']) for run in runs)} query checks passed", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
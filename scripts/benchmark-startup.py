@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Startup Benchmark for the iau24 CLI
+
+Usage:
+    python scripts/benchmark-startup.py [--repeat 20] [--json]
+    python scripts/benchmark-startup.py --db-path data/iau24hwc.db    # the real database instead
+
+This script:
+1. Builds a small synthetic database (lib/db/synthetic_db.py, today's field)
+   for the commands that read one
+2. Starts each light command below in a fresh interpreter
+   (python -m iau24 ...) --repeat times and reports p50/p95 wall time,
+   next to the bare interpreter start (python -c pass) for reference
+3. Runs each command once more under -X importtime and fails it when it
+   imports a heavy dependency (Docling, requests, psycopg, ...) or when its
+   median start is over the budget
+
+The budget is 100 ms for the whole start on a machine where the bare
+interpreter takes 20 ms, so what is checked is the time over `python -c pass`
+(80 ms): site hooks of conda or a crowded site-packages slow every Python
+start alike and are not the tool's doing. Medians are checked because process
+start times are noisy. Exits with status 1 when any command fails;
+--budget-factor scales the budget for slower machines.
+"""
+
+import sys
+import os
+import json
+import time
+import argparse
+import subprocess
+import tempfile
+from typing import Any, Dict, List, NamedTuple, Sequence
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'lib', 'db'))
+from sqlite_db import connect, create_tables, ensure_schema, resolve_db_path
+from synthetic_db import populate
+
+BUDGET_MS = 100
+INTERPRETER_MS = 20  # python -c pass on the machine the budget is meant for
+# Imported only by the commands that need them; a light command that loads one is a regression
+HEAVY_MODULES = ('docling', 'docling_core', 'requests', 'urllib3', 'psycopg', 'pdfplumber', 'PyPDF2',
+                 'pypdfium2')
+
+
+class StartupCase(NamedTuple):
+    name: str
+    argv: Sequence[str]  # After "python -m iau24"; {db} and {nation} are filled in
+    budget_ms: float = BUDGET_MS - INTERPRETER_MS  # Over the bare interpreter start
+
+
+CASES = (
+    StartupCase('help', ['--help']),
+    StartupCase('parse --help', ['parse', '--help']),
+    StartupCase('match --help', ['match', '--help']),
+    StartupCase('fetch --help', ['fetch', '--help']),
+    StartupCase('review --help', ['review', '--help']),
+    StartupCase('view --help', ['view', '--help']),
+    StartupCase('export --help', ['export', '--help']),
+    StartupCase('sync --help', ['sync', '--help']),
+    StartupCase('pipeline --help', ['pipeline', 'run', '--help']),
+    StartupCase('view --list-races', ['view', '--db-path', '{db}', '--list-races']),
+    StartupCase('view --filter', ['view', '--db-path', '{db}', '--filter', '{nation}']),
+    StartupCase('review (list)', ['review', '--db-path', '{db}']),
+    StartupCase('fetch --list-failed', ['fetch', '--db-path', '{db}', '--list-failed']),
+    StartupCase('pipeline status', ['pipeline', 'status', '--db-path', '{db}']),
+)
+CASES_BY_NAME = {c.name: c for c in CASES}
+
+
+def command_env() -> Dict[str, str]:
+    """
+    The environment with lib/ on the path, so python -m iau24 works without
+    installing. Bytecode caching stays on as in a normal run: without it every
+    start would compile the scripts again.
+    """
+    env = dict(os.environ)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    lib_dir = os.path.join(REPO_ROOT, 'lib')
+    env['PYTHONPATH'] = os.pathsep.join(p for p in (lib_dir, env.get('PYTHONPATH')) if p)
+    return env
+
+
+def time_runs(argv: List[str], repeat: int, env: Dict[str, str]) -> List[float]:
+    """Wall time (ms) of each run, after one untimed run to warm the file cache"""
+    subprocess.run(argv, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=env, cwd=REPO_ROOT)
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run(argv, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=env, cwd=REPO_ROOT)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return timings
+
+
+def import_profile(argv: List[str], env: Dict[str, str]) -> Dict[str, Any]:
+    """Modules imported by one run (-X importtime), the slowest top-level ones and the exit status"""
+    result = subprocess.run([argv[0], '-X', 'importtime', *argv[1:]], stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE, env=env, cwd=REPO_ROOT, text=True)
+    modules, top_level = set(), []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        # "import time:  self | cumulative | name", the name indented two spaces per nesting level
+        _, cumulative, name = line.split('|')
+        modules.add(name.strip().split('.')[0])
+        if not name[1:].startswith(' '):  # Imported directly, not by another module
+            top_level.append((int(cumulative), name.strip()))
+    top_level.sort(reverse=True)
+    return {
+        'modules': modules,
+        'slowest_imports': [f"{name} {us / 1000:.1f} ms" for us, name in top_level[:3]],
+        'returncode': result.returncode,
+    }
+
+
+def run_case(case: StartupCase, fill: Dict[str, str], repeat: int, budget_factor: float,
+             env: Dict[str, str], interpreter_ms: float) -> Dict[str, Any]:
+    argv = [sys.executable, '-m', 'iau24', *(arg.format(**fill) for arg in case.argv)]
+    timings = time_runs(argv, repeat, env)
+    profile = import_profile(argv, env)
+
+    budget = case.budget_ms * budget_factor
+    result = {
+        'command': case.name,
+        'argv': argv[3:],
+        'p50_ms': round(timings[len(timings) // 2], 1),
+        'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 1),
+        'over_python_ms': round(timings[len(timings) // 2] - interpreter_ms, 1),
+        'budget_ms': budget,
+        'runs': len(timings),
+        'slowest_imports': profile['slowest_imports'],
+        'failures': [],
+    }
+    if profile['returncode'] != 0:
+        result['failures'].append(f"exit status {profile['returncode']}")
+    heavy = sorted(m for m in HEAVY_MODULES if m in profile['modules'])
+    if heavy:
+        result['failures'].append(f"imports {', '.join(heavy)}")
+    if result['over_python_ms'] > budget:
+        result['failures'].append(f"{result['over_python_ms']:.1f} ms over python -c pass, budget {budget:g} ms")
+    return result
+
+
+def build_database(db_path: str, seed: int):
+    """Today's field, as benchmark-queries.py builds it"""
+    conn = connect(db_path, apply_schema=False)
+    try:
+        create_tables(conn)
+        populate(conn, 1, seed)
+        ensure_schema(conn)
+    finally:
+        conn.close()
+
+
+def most_common_nationality(db_path: str) -> str:
+    conn = connect(db_path)
+    try:
+        row = conn.execute(
+            "SELECT nationality FROM runners GROUP BY nationality ORDER BY COUNT(*) DESC LIMIT 1"
+        ).fetchone()
+    finally:
+        conn.close()
+    return row[0] if row else 'SWE'
+
+
+def format_table(baseline: List[float], results: List[Dict[str, Any]]) -> str:
+    header = f"{'command':<22} {'p50 ms':>7} {'p95 ms':>7} {'+python':>7} {'budget':>7}  status"
+    lines = [header, '-' * len(header),
+             f"{'(python -c pass)':<22} {baseline[len(baseline) // 2]:>7.1f} "
+             f"{baseline[min(len(baseline) - 1, int(len(baseline) * 0.95))]:>7.1f}"]
+    for r in results:
+        status = 'ok' if not r['failures'] else 'FAIL: ' + '; '.join(r['failures'])
+        lines.append(f"{r['command']:<22} {r['p50_ms']:>7.1f} {r['p95_ms']:>7.1f} {r['over_python_ms']:>7.1f} "
+                     f"{r['budget_ms']:>7g}  {status}")
+        if r['failures']:
+            lines.append(f"{'':<24}slowest imports: {', '.join(r['slowest_imports'])}")
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the cold start of light iau24 commands')
+    parser.add_argument('--db-path', help='Run the database commands against this database instead of a synthetic one')
+    parser.add_argument('--commands', default=','.join(CASES_BY_NAME),
+                        help='Comma-separated commands to run (default: all)')
+    parser.add_argument('--repeat', type=int, default=20, help='Timed starts per command (default: 20)')
+    parser.add_argument('--budget-factor', type=float, default=1.0, help='Multiply every budget (slow machines, CI)')
+    parser.add_argument('--seed', type=int, default=24, help='Seed for the synthetic database')
+    parser.add_argument('--json', action='store_true', help='Output results as JSON to stdout')
+
+    args = parser.parse_args()
+
+    names = [c.strip() for c in args.commands.split(',') if c.strip()]
+    unknown = [c for c in names if c not in CASES_BY_NAME]
+    if unknown:
+        print(f"ERROR: Unknown command(s): {', '.join(unknown)}", file=sys.stderr)
+        sys.exit(1)
+    repeat = max(1, args.repeat)
+    env = command_env()
+
+    with tempfile.TemporaryDirectory(prefix='startup-bench-') as work_dir:
+        if args.db_path:
+            db_path = resolve_db_path(args.db_path)
+            if not os.path.exists(db_path):
+                print(f"ERROR: Database not found: {db_path}", file=sys.stderr)
+                sys.exit(1)
+        else:
+            db_path = os.path.join(work_dir, 'synthetic-1x.db')
+            build_database(db_path, args.seed)
+        fill = {'db': db_path, 'nation': most_common_nationality(db_path)}
+
+        baseline = time_runs([sys.executable, '-c', 'pass'], repeat, env)
+        interpreter_ms = baseline[len(baseline) // 2]
+        results = []
+        for name in names:
+            print(f"Timing iau24 {name}...", file=sys.stderr)
+            results.append(run_case(CASES_BY_NAME[name], fill, repeat, args.budget_factor, env, interpreter_ms))
+
+    failed = sum(1 for r in results if r['failures'])
+    if args.json:
+        print(json.dumps({'interpreter_p50_ms': round(interpreter_ms, 1), 'results': results},
+                         indent=2))
+    else:
+        print()
+        print(format_table(baseline, results))
+
+    if failed:
+        print(f"\n✗ {failed} startup check(s) failed", file=sys.stderr)
+        sys.exit(1)
+    print(f"\n✓ All {len(results)} startup checks passed", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+CLI Tool: Recalculate team rankings from runner PBs
+
+Usage:
+    # Teams of the latest race (or --race <id|name>)
+    python scripts/calculate-teams.py [--db-path data/iau24hwc.db]
+
+    # Print the rankings after recalculating
+    python scripts/calculate-teams.py --show
+
+Sums each nation's best three PBs per gender and metric (all-time, last 2
+years) and ranks them within the race, leaving DNS runners out. Run it after
+fetch-performances.py or an --incremental entry list import; unchanged teams
+are not rewritten (see lib/db/teams.py).
+"""
+
+import sys
+import os
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'lib', 'db'))
+from sqlite_db import get_connection, resolve_db_path
+from races import resolve_race
+from teams import METRICS, calculate_teams
+
+
+def show_teams(conn, race_id: int, top: int):
+    for metric in METRICS:
+        for gender in ('M', 'W'):
+            rows = conn.execute("""
+                SELECT rank, nationality, team_total FROM teams
+                WHERE race_id = ? AND metric = ? AND gender = ?
+                ORDER BY rank
+                LIMIT ?
+            """, (race_id, metric, gender, top)).fetchall()
+            print(f"\n{metric} ({gender})")
+            for rank, nationality, total in rows:
+                print(f"  {rank:>3}. {nationality:<4} {total:>8.3f} km")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Recalculate team rankings from runner PBs')
+    parser.add_argument('--db-path', default='data/iau24hwc.db', help='Path to SQLite database')
+    parser.add_argument('--race', help='Race id or name (default: the latest race)')
+    parser.add_argument('--show', action='store_true', help='Print the rankings afterwards')
+    parser.add_argument('--top', type=int, default=10, help='Teams shown per metric and gender with --show (default 10)')
+
+    args = parser.parse_args()
+
+    db_path = resolve_db_path(args.db_path)
+
+    if not os.path.exists(db_path):
+        print(f"ERROR: Database not found: {db_path}", file=sys.stderr)
+        sys.exit(1)
+
+    conn = get_connection(db_path)
+    try:
+        race = resolve_race(conn, args.race)
+    except ValueError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    summary = calculate_teams(conn, race['id'])
+    conn.commit()
+    print(f"✓ {summary['teams']} teams of {race['name']}: {summary['changed']} changed, "
+          f"{summary['removed']} removed", file=sys.stderr)
+
+    if args.show:
+        show_teams(conn, race['id'], args.top)
+
+
+if __name__ == '__main__':
+    main()
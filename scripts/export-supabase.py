@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+CLI Tool: Export the SQLite database for Supabase as COPY chunks and load them
+
+Usage:
+    # Export every synced table of the latest race (or --race) to data/supabase-export/
+    python scripts/export-supabase.py [--db-path data/iau24hwc.db] [--race <id|name>] [--format copy|csv.gz]
+
+    # Load an export into Postgres (needs psycopg and DATABASE_URL)
+    python scripts/export-supabase.py --load data/supabase-export [--database-url URL] [--force]
+
+This script:
+1. Streams each table (lib/db/pg_sync.py SYNC_TABLES) from one consistent
+   SQLite read snapshot into chunk files in Postgres COPY text format or
+   gzip-compressed CSV, at most --chunk-rows rows / --chunk-mb MB each.
+   Postgres holds one race, so only that race's rows are exported, with each
+   athlete's shared performance history under the race's runner
+2. Writes manifest.json with the columns, row counts and SHA-256 of every chunk,
+   plus load.sql for loading with psql instead of this script
+3. With --load, verifies each chunk, COPYs it into a temp staging table and
+   merges it with one INSERT ... ON CONFLICT DO UPDATE (unchanged rows are not
+   rewritten), one transaction per chunk. Loaded chunks are recorded in
+   sync_loaded_chunks, so rerunning after a failure resumes where it stopped.
+
+Rows deleted locally are not deleted in Postgres by a full export; use
+scripts/sync-changes.py for incremental syncs that include deletes.
+"""
+
+import sys
+import os
+import json
+import time
+import argparse
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'lib', 'db'))
+from sqlite_db import connect, resolve_db_path
+from races import resolve_race
+from pg_sync import (
+    FORMATS, SYNC_TABLES, TABLES_BY_NAME, bump_sequences, connect_postgres, copy_options,
+    export_columns, export_rows, load_chunk, loaded_chunks, sha256_file, upsert_sql, write_chunks,
+)
+
+MANIFEST = 'manifest.json'
+DEFAULT_OUT_DIR = 'data/supabase-export'
+
+
+def export_tables(db_path: str, out_dir: str, fmt: str, tables: List[str],
+                  chunk_rows: int, chunk_bytes: int, race: Optional[str] = None) -> Dict[str, Any]:
+    """Write chunk files and the manifest; returns the manifest"""
+    conn = connect(db_path)
+    try:
+        race = resolve_race(conn, race)
+    except ValueError:
+        conn.close()
+        raise
+    os.makedirs(out_dir, exist_ok=True)
+
+    manifest = {
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'source': os.path.basename(db_path),
+        'race': race,
+        'format': fmt,
+        'tables': [],
+    }
+
+    # One read transaction: every table comes from the same snapshot even if
+    # match/fetch are writing meanwhile (WAL)
+    conn.execute("BEGIN")
+    try:
+        for name in tables:
+            table = TABLES_BY_NAME[name]
+            columns = export_columns(conn, table)
+            if not columns:
+                print(f"  {name}: not in this database, skipped", file=sys.stderr)
+                continue
+            rows = export_rows(conn, table, columns, race['id'])
+            chunks = write_chunks(rows, out_dir, name, columns, table.booleans, fmt, chunk_rows, chunk_bytes)
+            count = sum(c['rows'] for c in chunks)
+            manifest['tables'].append({'name': name, 'key': list(table.key), 'columns': columns,
+                                       'rows': count, 'chunks': chunks})
+            print(f"  {name}: {count} rows in {len(chunks)} chunk(s)", file=sys.stderr)
+    finally:
+        conn.rollback()
+        conn.close()
+
+    # Drop chunk files left over from an earlier, larger export
+    current = {c['file'] for t in manifest['tables'] for c in t['chunks']}
+    for filename in os.listdir(out_dir):
+        if filename.endswith(('.copy', '.csv.gz')) and filename not in current:
+            os.remove(os.path.join(out_dir, filename))
+
+    write_psql_script(manifest, out_dir)
+    tmp_path = os.path.join(out_dir, MANIFEST + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(out_dir, MANIFEST))
+    return manifest
+
+
+def write_psql_script(manifest: Dict[str, Any], out_dir: str):
+    """load.sql: the same staging + upsert steps for `psql -f load.sql` (run from out_dir)"""
+    fmt = manifest['format']
+    lines = ['-- Generated by scripts/export-supabase.py; run from this directory:',
+             '--   psql "$DATABASE_URL" -f load.sql', '\\set ON_ERROR_STOP on', '']
+    for entry in manifest['tables']:
+        table = TABLES_BY_NAME[entry['name']]
+        columns = entry['columns']
+        stage = f"stage_{table.name}"
+        for chunk in entry['chunks']:
+            source = f"PROGRAM 'gzip -dc {chunk['file']}'" if fmt == 'csv.gz' else f"'{chunk['file']}'"
+            lines += [
+                f"-- {chunk['file']}: {chunk['rows']} rows",
+                'BEGIN;',
+                f"CREATE TEMP TABLE {stage} ON COMMIT DROP AS SELECT {', '.join(columns)} FROM {table.name} WITH NO DATA;",
+                f"\\copy {stage} ({', '.join(columns)}) FROM {source}{copy_options(fmt)}",
+                upsert_sql(table, columns, stage) + ';',
+                'COMMIT;',
+                '',
+            ]
+        if table.serial:
+            lines.append(f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                         f"GREATEST((SELECT MAX(id) FROM {table.name}), 1));")
+            lines.append('')
+    with open(os.path.join(out_dir, 'load.sql'), 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines))
+
+
+def load_export(export_dir: str, database_url: str, force: bool = False):
+    """Load an export into Postgres chunk by chunk, skipping chunks already loaded"""
+    with open(os.path.join(export_dir, MANIFEST), encoding='utf-8') as f:
+        manifest = json.load(f)
+    fmt = manifest['format']
+
+    pg = connect_postgres(database_url)
+    try:
+        done = set() if force else loaded_chunks(pg)
+        loaded_tables = []
+
+        for entry in manifest['tables']:
+            table = TABLES_BY_NAME[entry['name']]
+            started = time.monotonic()
+            changed = skipped = 0
+            for chunk in entry['chunks']:
+                if chunk['sha256'] in done:
+                    skipped += 1
+                    continue
+                path = os.path.join(export_dir, chunk['file'])
+                if sha256_file(path) != chunk['sha256']:
+                    raise ValueError(f"Checksum mismatch for {chunk['file']}; re-export before loading")
+                changed += load_chunk(pg, table, entry['columns'], path, fmt, chunk)
+            loaded_tables.append(table)
+            note = f", {skipped} chunk(s) already loaded" if skipped else ''
+            print(f"  {table.name}: {entry['rows']} rows, {changed} inserted/changed "
+                  f"in {time.monotonic() - started:.1f}s{note}", file=sys.stderr)
+
+        bump_sequences(pg, loaded_tables)
+    finally:
+        pg.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export SQLite tables as COPY/CSV chunks for Supabase, or load such an export')
+    parser.add_argument('--db-path', default='data/iau24hwc.db', help='Path to SQLite database')
+    parser.add_argument('--race', help='Race id or name to export (default: the latest race)')
+    parser.add_argument('--out-dir', default=DEFAULT_OUT_DIR, help=f'Export directory (default: {DEFAULT_OUT_DIR})')
+    parser.add_argument('--format', choices=FORMATS, default='copy', help='Chunk format: COPY text or gzip-compressed CSV')
+    parser.add_argument('--tables', default=','.join(t.name for t in SYNC_TABLES), help='Comma-separated tables to export')
+    parser.add_argument('--chunk-rows', type=int, default=50000, help='Maximum rows per chunk')
+    parser.add_argument('--chunk-mb', type=float, default=16, help='Maximum uncompressed MB per chunk')
+    parser.add_argument('--load', metavar='DIR', help='Load an export directory into Postgres instead of exporting')
+    parser.add_argument('--database-url', default=os.environ.get('DATABASE_URL'), help='Postgres URL for --load (default: $DATABASE_URL)')
+    parser.add_argument('--force', action='store_true', help='With --load, reload chunks even if already loaded')
+
+    args = parser.parse_args()
+
+    if args.load:
+        if not args.database_url:
+            print("ERROR: --load needs --database-url or DATABASE_URL", file=sys.stderr)
+            sys.exit(1)
+        export_dir = resolve_db_path(args.load)
+        print(f"Loading {export_dir}...", file=sys.stderr)
+        started = time.monotonic()
+        try:
+            load_export(export_dir, args.database_url, args.force)
+        except (RuntimeError, ValueError, FileNotFoundError) as e:
+            print(f"ERROR: {e}", file=sys.stderr)
+            sys.exit(1)
+        print(f"✓ Loaded in {time.monotonic() - started:.1f}s", file=sys.stderr)
+        return
+
+    db_path = resolve_db_path(args.db_path)
+    if not os.path.exists(db_path):
+        print(f"ERROR: Database not found: {db_path}", file=sys.stderr)
+        sys.exit(1)
+
+    tables = [t.strip() for t in args.tables.split(',') if t.strip()]
+    unknown = [t for t in tables if t not in TABLES_BY_NAME]
+    if unknown:
+        print(f"ERROR: Unknown table(s): {', '.join(unknown)}", file=sys.stderr)
+        sys.exit(1)
+    # Keep foreign-key order whatever order --tables lists them in
+    tables = [t.name for t in SYNC_TABLES if t.name in tables]
+
+    out_dir = resolve_db_path(args.out_dir)
+    print(f"Exporting {db_path} to {out_dir} ({args.format})...", file=sys.stderr)
+    started = time.monotonic()
+    try:
+        manifest = export_tables(db_path, out_dir, args.format, tables,
+                                 max(1, args.chunk_rows), max(1, int(args.chunk_mb * 1024 * 1024)), args.race)
+    except ValueError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+    total = sum(t['rows'] for t in manifest['tables'])
+    print(f"✓ Exported {total} rows of {manifest['race']['name']} in {time.monotonic() - started:.1f}s; manifest: {os.path.join(out_dir, MANIFEST)}",
+          file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -3,128 +3,363 @@
 CLI Tool: Fetch performance data from DUV for matched runners
 
 Usage:
-    python scripts/fetch-performances.py [--db-path data/iau24hwc.db]
+    python scripts/fetch-performances.py [--db-path data/iau24hwc.db] [--race <id|name>]
 
 This script:
-1. Loads matched runners from SQLite
-2. Fetches performance data from DUV API
-3. Calculates PBs (all-time, last 2 years)
-4. Saves performance history to database
+1. Loads the matched runners of one race (--race, default the latest) from SQLite
+2. Fetches performance data from DUV API, once per athlete: history fetched
+   for another race within --max-age-days is shared instead of refetched
+3. Calculates PBs (all-time, last 2 years) as of the race date
+4. Saves performance history to database (performances, keyed by DUV id)
+5. Materializes per-discipline PBs into the runner_pbs table
+
+Runners of an upcoming race take their 24h PBs from DUV's AllPBs; runners of
+past races (and athletes whose history is reused) take them from the stored
+history before their race date.
+
+Options:
+    --materialize-only    Rebuild runner_pbs from stored performances without fetching
+    --backfill-parsed     Reparse stored performances into distance_km / duration_sec
+    --retry-failed        Only retry runners whose last profile fetch failed
+    --new-only            Only runners never fetched (newly matched)
+    --stale-days N        Only runners whose profile is more than N days old
+    --list-failed         Show the failed-fetch queue (including dead-lettered runners)
+    --pbs-only            Refresh 24h PBs and age from AllPBs only (no performance history
+                          rewrite; upcoming races only)
+    --daemon              Keep refreshing the stalest / most important runners within
+                          a requests-per-hour budget (--requests-per-hour, default 120)
 """
 
 import sys
 import os
 import sqlite3
 import argparse
-import requests
 import time
 import re
-from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
-import urllib3
+import heapq
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
 
-# Suppress SSL warnings since we need to disable verification for DUV API
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'lib', 'db'))
+from sqlite_db import get_connection, resolve_db_path
+from races import race_year, resolve_race
+
+# Optional: incremental JSON parsing for --pbs-only (pip install ijson)
+try:
+    import ijson
+except ImportError:
+    ijson = None
 
 DUV_API_BASE = "https://statistik.d-u-v.org/json"
 RATE_LIMIT_DELAY = 1.0
 
+# "Last 3 years" PB window, counted back from each race's race_date
+PB_WINDOW_DAYS = 1095
+# Athlete history fetched for another race this recently is reused, not refetched
+SHARED_HISTORY_MAX_AGE_DAYS = 7
 
-def get_runner_profile(duv_id: int) -> Optional[Dict[str, Any]]:
-    """Fetch runner profile from DUV JSON API"""
-    url = f"{DUV_API_BASE}/mgetresultperson.php?runner={duv_id}&plain=1"
+# Failed profile fetches (fetch_failures, see lib/db/schema.sql) are retried with
+# exponential backoff by --retry-failed. Rows that reach MAX_FETCH_ATTEMPTS stay
+# in the table as dead letters.
+MAX_FETCH_ATTEMPTS = 5
+RETRY_BASE_DELAY = 600  # seconds, doubled per failed attempt
+RETRY_MAX_DELAY = 86400
+RETRY_ABORT_AFTER = 3  # consecutive failures before a retry run gives up (DUV still down)
+
+# Refresh daemon: priority = hours since last fetch * importance weight
+DAEMON_REQUESTS_PER_HOUR = 120
+DAEMON_MIN_REFRESH_HOURS = 6  # never refetch a profile more often than this
+DAEMON_QUEUE_REBUILD = 50  # requests between queue rebuilds (picks up new matches)
+NEVER_FETCHED_HOURS = 24 * 365
+SEED_RANK = 10  # top-N per gender by last-3-years PB count as seeded
+SEEDED_WEIGHT = 3.0
+RECENT_RACE_DAYS = 10
+RECENT_RACE_WEIGHT = 4.0
+
+MILE_KM = 1.609344
+
+# Event types: '24h', '6d', '15:38h' are timed (distance for time);
+# '100km', '100mi', '50K', '100km/3stages' are fixed distance (time for distance)
+TIMED_EVENT_RE = re.compile(r'^(?:(\d+):(\d{2})|(\d+(?:\.\d+)?))\s*([hd])$', re.IGNORECASE)
+DISTANCE_EVENT_RE = re.compile(r'^(\d+(?:\.\d+)?)\s*(km|mi|k)\b', re.IGNORECASE)
+
+# Results: '245.123 km' for timed events, '7:12:33 h' or '2d 10:04:38 h' for distance events
+DISTANCE_RESULT_RE = re.compile(r'(\d+(?:[.,]\d+)?)')
+DURATION_RESULT_RE = re.compile(r'(?:(\d+)\s*d\s*)?(\d+):(\d{2})(?::(\d{2}))?')
+
+# Event dates: "26.-27.04.2025" (two-day) or "27.04.2025"
+TWO_DAY_DATE_RE = re.compile(r'(\d{1,2})\.[-\s]*(\d{1,2})\.(\d{1,2})\.(\d{4})')
+SINGLE_DATE_RE = re.compile(r'(\d{1,2})\.(\d{1,2})\.(\d{4})')
+
+
+def classify_event(event_type: str) -> Tuple[Optional[str], Optional[float], Optional[int]]:
+    """
+    Classify a DUV event type.
+
+    Returns (kind, event_distance_km, event_duration_sec) where kind is 'timed'
+    (distance for time), 'distance' (time for distance) or None if unrecognized.
+    """
+    event_type = (event_type or '').strip()
+
+    timed = TIMED_EVENT_RE.match(event_type)
+    if timed:
+        hours, minutes, amount, unit = timed.groups()
+        if hours is not None:
+            return 'timed', None, int(hours) * 3600 + int(minutes) * 60
+        seconds = float(amount) * (86400 if unit.lower() == 'd' else 3600)
+        return 'timed', None, int(round(seconds))
+
+    distance = DISTANCE_EVENT_RE.match(event_type)
+    if distance:
+        amount, unit = distance.groups()
+        km = float(amount) * (MILE_KM if unit.lower() == 'mi' else 1.0)
+        return 'distance', round(km, 3), None
 
+    return None, None, None
+
+
+def parse_duration(text: str) -> Optional[int]:
+    """Parse a DUV time result ('7:12:33 h', '2d 10:04:38 h') to seconds"""
+    match = DURATION_RESULT_RE.search(text or '')
+    if not match:
+        return None
+    days, hours, minutes, seconds = match.groups()
+    return (int(days or 0) * 86400 + int(hours) * 3600
+            + int(minutes) * 60 + int(seconds or 0))
+
+
+def parse_performance(event_type: str, perf_text: str) -> Optional[Tuple[float, Optional[float], Optional[int]]]:
+    """
+    Parse a DUV result into typed values.
+
+    Returns (distance, distance_km, duration_sec) or None if unparseable. For timed
+    events distance_km is the result and duration_sec the event length; for fixed
+    distance events duration_sec is the result and distance_km the event length.
+    `distance` is the legacy performances.distance value, unchanged from older
+    imports: the first number of the result (km for timed events, the hours
+    of a time such as 7 for '7:12:33 h').
+    """
+    kind, event_km, event_sec = classify_event(event_type)
+
+    match = DISTANCE_RESULT_RE.search(perf_text or '')
+    if not match:
+        return None
     try:
-        # Disable SSL verification to avoid certificate revocation check issues
-        response = requests.get(url, timeout=15, verify=False)
+        legacy = float(match.group(1).replace(',', '.'))
+    except ValueError:
+        return None
+
+    if kind == 'distance':
+        duration = parse_duration(perf_text)
+        if duration is None:
+            return None
+        return legacy, event_km, duration
+    if kind == 'timed':
+        return legacy, legacy, event_sec
+    return legacy, None, None
+
+
+def parse_event_date(evt_date: str) -> Optional[str]:
+    """Parse DUV event date to ISO format, using the end date of multi-day events"""
+    date_match = TWO_DAY_DATE_RE.search(evt_date)
+    if date_match:
+        _, day, month, year = date_match.groups()
+        return f"{year}-{month.zfill(2)}-{day.zfill(2)}"
+
+    date_match = SINGLE_DATE_RE.search(evt_date)
+    if date_match:
+        day, month, year = date_match.groups()
+        return f"{year}-{month.zfill(2)}-{day.zfill(2)}"
+
+    return None
+
+
+def legacy_duration(distance: Optional[float]) -> Optional[int]:
+    """
+    Recover a duration from a legacy performances.distance value.
+
+    Only rows imported by the web fetcher can be decoded: it kept every digit,
+    so '15:53:39 h' became 155339. The Python fetcher kept the first number
+    (15.0 for the same time), and a packed multi-day time ('1d 02:00:00 h' as
+    1020000) has no hour field, so both return None and need performance_text
+    or a re-fetch.
+    """
+    if distance is None or distance != int(distance) or not 1000 <= distance < 1000000:
+        return None
+    digits = int(distance)
+    seconds, minutes, hours = digits % 100, (digits // 100) % 100, digits // 10000
+    if seconds >= 60 or minutes >= 60:
+        return None
+    return hours * 3600 + minutes * 60 + seconds
+
+
+def parse_yob(person_header: Optional[Dict[str, Any]]) -> Optional[int]:
+    """Extract year of birth from a DUV PersonHeader"""
+    if not person_header or 'YOB' not in person_header:
+        return None
+
+    yob_str = person_header['YOB']
+    if yob_str and yob_str != '0000' and yob_str != '&nbsp;':
+        try:
+            return int(yob_str)
+        except ValueError:
+            pass  # Skip invalid YOB values
+    return None
+
+
+def pb_since_year(race: Dict[str, Any]) -> int:
+    """First year of the race's PB window (2022 for a race on 2025-10-17)"""
+    return (date.fromisoformat(race['race_date']) - timedelta(days=PB_WINDOW_DAYS)).year
+
+
+def is_upcoming(race: Dict[str, Any]) -> bool:
+    """AllPBs are current PBs, so they only describe a race that hasn't happened yet"""
+    return race['race_date'] >= date.today().isoformat()
+
+
+def extract_24h_pbs(all_pbs: List[Dict[str, Any]], since_year: int) -> Tuple[Optional[float], Optional[float]]:
+    """Extract (all-time, since since_year) 24h PBs from a DUV AllPBs array"""
+    pb_all_time = None
+    pb_last_2_years = None
+
+    # Find 24h PBs entry
+    pb_24h = None
+    for pb_entry in all_pbs or []:
+        if '24h' in pb_entry or '24 h' in pb_entry:
+            pb_24h = pb_entry.get('24h') or pb_entry.get('24 h')
+            break
+
+    if pb_24h and isinstance(pb_24h, dict):
+        # Extract overall PB
+        if 'PB' in pb_24h:
+            try:
+                pb_all_time = float(pb_24h['PB'])
+            except (ValueError, TypeError):
+                pass
+
+        # Extract Last 3 Years PB (since Oct 2022)
+        year_keys = [k for k in pb_24h.keys() if k != 'PB' and k.isdigit()]
+        for year in year_keys:
+            if int(year) >= since_year:
+                year_data = pb_24h[year]
+                if isinstance(year_data, dict) and 'Perf' in year_data:
+                    try:
+                        perf_value = float(year_data['Perf'])
+                        if pb_last_2_years is None or perf_value > pb_last_2_years:
+                            pb_last_2_years = perf_value
+                    except (ValueError, TypeError):
+                        pass
+
+    return pb_all_time, pb_last_2_years
+
+
+@lru_cache(maxsize=None)
+def http():
+    """requests, imported on the first DUV request: --help, --list-failed and --materialize-only start without it"""
+    import requests
+    import urllib3
+    # Suppress SSL warnings since we need to disable verification for DUV API
+    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+    return requests
+
+
+def get_runner_pbs(duv_id: int) -> Dict[str, Any]:
+    """
+    Fetch only PersonHeader and AllPBs from a DUV profile.
+
+    With ijson installed the response is parsed incrementally and the download is
+    abandoned as soon as both sections are read, so AllPerfs is never materialized.
+    Raises like get_runner_profile().
+    """
+    url = f"{DUV_API_BASE}/mgetresultperson.php?runner={duv_id}&plain=1"
+    wanted = ('PersonHeader', 'AllPBs')
+
+    if ijson is None:
+        response = http().get(url, timeout=15, verify=False)
         response.raise_for_status()
         data = response.json()
+        sections = {key: data.get(key) for key in wanted}
+    else:
+        sections = {}
+        with http().get(url, timeout=15, verify=False, stream=True) as response:
+            response.raise_for_status()
+            response.raw.decode_content = True
+            for key, value in ijson.kvitems(response.raw, '', use_float=True):
+                if key in wanted:
+                    sections[key] = value
+                    if len(sections) == len(wanted):
+                        break
 
-        # Extract YOB from PersonHeader
-        yob = None
-        if 'PersonHeader' in data and 'YOB' in data['PersonHeader']:
-            yob_str = data['PersonHeader']['YOB']
-            if yob_str and yob_str != '0000' and yob_str != '&nbsp;':
-                try:
-                    yob = int(yob_str)
-                except ValueError:
-                    pass  # Skip invalid YOB values
-
-        # Extract AllPBs for efficient PB lookup
-        all_pbs = data.get('AllPBs', [])
-
-        # Extract all performances (not just 24h)
-        results = []
-        all_perfs = data.get('AllPerfs', [])
-
-        for year_data in all_perfs:
-            perfs_per_year = year_data.get('PerfsPerYear', [])
-            for perf in perfs_per_year:
-                evt_dist = perf.get('EvtDist', '')
-                perf_text = perf.get('Perf', '')
-
-                # Skip if no distance/performance data
-                if not evt_dist or not perf_text:
-                    continue
-
-                # Parse distance/result value
-                # For time-based events (24h, 6h, etc.): distance in km
-                # For distance-based events: could be time, laps, etc.
-                distance = None
-
-                # Try to extract numeric value (distance in km, or time, or laps)
-                dist_match = re.search(r'([\d.,]+)', perf_text.replace(',', '.'))
-                if dist_match:
-                    try:
-                        distance = float(dist_match.group(1).replace(',', '.'))
-                    except ValueError:
-                        continue
-
-                if distance is None:
-                    continue
-
-                # Parse event date (format: "26.-27.04.2025" or "27.04.2025")
-                evt_date = perf.get('EvtDate', '')
-                event_date = None
-                # Try two-day format first: "26.-27.04.2025" (day1.-day2.month.year)
-                date_match = re.search(r'(\d{1,2})\.[-\s]*(\d{1,2})\.(\d{1,2})\.(\d{4})', evt_date)
-                if date_match:
-                    # Format: day1.-day2.month.year -> use day2 as the end date
-                    day = date_match.group(2).zfill(2)
-                    month = date_match.group(3).zfill(2)
-                    year = date_match.group(4)
-                    event_date = f"{year}-{month}-{day}"
-                else:
-                    # Try single date format: "27.04.2025" (day.month.year)
-                    date_match = re.search(r'(\d{1,2})\.(\d{1,2})\.(\d{4})', evt_date)
-                    if date_match:
-                        day = date_match.group(1).zfill(2)
-                        month = date_match.group(2).zfill(2)
-                        year = date_match.group(3)
-                        event_date = f"{year}-{month}-{day}"
-
-                # Clean up event type
-                event_type = evt_dist.strip()
-
-                results.append({
-                    'Event': perf.get('EvtName', ''),
-                    'Startdate': event_date or evt_date,
-                    'Performance': perf_text,
-                    'Distance': distance,
-                    'Length': event_type,  # Store actual event type
-                    'EventID': perf.get('EvtID'),
-                    'Rank': perf.get('RankOverall')
-                })
-
-        return {
-            'YOB': yob,
-            'results': results,
-            'all_pbs': all_pbs
-        }
-
-    except Exception as e:
-        print(f"  ERROR fetching profile: {e}", file=sys.stderr)
-        return None
+    return {
+        'YOB': parse_yob(sections.get('PersonHeader')),
+        'all_pbs': sections.get('AllPBs') or []
+    }
+
+
+def get_runner_profile(duv_id: int) -> Dict[str, Any]:
+    """
+    Fetch runner profile from DUV JSON API.
+
+    Raises on timeouts, HTTP errors and invalid JSON so the caller can queue a retry.
+    """
+    url = f"{DUV_API_BASE}/mgetresultperson.php?runner={duv_id}&plain=1"
+
+    # Disable SSL verification to avoid certificate revocation check issues
+    response = http().get(url, timeout=15, verify=False)
+    response.raise_for_status()
+    data = response.json()
+
+    yob = parse_yob(data.get('PersonHeader'))
+
+    # Extract AllPBs for efficient PB lookup
+    all_pbs = data.get('AllPBs', [])
+
+    # Extract all performances (not just 24h)
+    results = []
+    all_perfs = data.get('AllPerfs', [])
+
+    for year_data in all_perfs:
+        perfs_per_year = year_data.get('PerfsPerYear', [])
+        for perf in perfs_per_year:
+            evt_dist = perf.get('EvtDist', '')
+            perf_text = perf.get('Perf', '')
+
+            # Skip if no distance/performance data
+            if not evt_dist or not perf_text:
+                continue
+
+            # Clean up event type
+            event_type = evt_dist.strip()
+
+            # Parse result value
+            # For time-based events (24h, 6h, etc.): distance in km
+            # For distance-based events (100km, 100mi, etc.): finish time in seconds
+            parsed = parse_performance(event_type, perf_text)
+            if parsed is None:
+                continue
+            distance, distance_km, duration_sec = parsed
+
+            evt_date = perf.get('EvtDate', '')
+            event_date = parse_event_date(evt_date)
+
+            results.append({
+                'Event': perf.get('EvtName', ''),
+                'Startdate': event_date or evt_date,
+                'Performance': perf_text,
+                'Distance': distance,
+                'DistanceKm': distance_km,
+                'DurationSec': duration_sec,
+                'Length': event_type,  # Store actual event type
+                'EventID': perf.get('EvtID'),
+                'Rank': perf.get('RankOverall')
+            })
+
+    return {
+        'YOB': yob,
+        'results': results,
+        'all_pbs': all_pbs
+    }
 
 
 def parse_distance(performance: str) -> Optional[float]:
@@ -137,164 +372,753 @@ def parse_distance(performance: str) -> Optional[float]:
         return None
 
 
-def fetch_performances(db_path: str):
-    """Main performance fetching logic"""
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
+def materialize_runner_pbs(conn: sqlite3.Connection, race_id: Optional[int] = None,
+                           duv_id: Optional[int] = None) -> int:
+    """
+    Rebuild runner_pbs from the performances table in a single window-function pass.
 
-    # Get matched runners
-    cursor.execute("""
-        SELECT * FROM runners
-        WHERE match_status IN ('auto-matched', 'manually-matched')
-        AND duv_id IS NOT NULL
-        ORDER BY entry_id
+    For every (runner, event_type) this stores the all-time best, the best inside the
+    PB window (same window as runners.personal_best_last_2_years) and the season best,
+    each with the year it was set. Only results before the runner's race date count,
+    and the window and season are those of that race, so an athlete entered in several
+    races gets one set of rows per race from the same shared history. Timed events
+    (24h, 6d, ...) rank by distance_km descending (unit 'km'), fixed-distance events
+    (100km, 100mi, ...) by duration_sec ascending (unit 's'). Pass race_id or duv_id
+    to rebuild only that race's or that athlete's rows. Unchanged rows are left
+    alone, so a rebuild after a refetch with no new results writes nothing.
+    """
+    params = {'race_id': race_id, 'duv_id': duv_id, 'window_days': f"-{PB_WINDOW_DAYS} days"}
+    scope = """
+        SELECT id FROM runners
+        WHERE (:race_id IS NULL OR race_id = :race_id)
+        AND (:duv_id IS NULL OR duv_id = :duv_id)
+    """
+
+    conn.execute("DROP TABLE IF EXISTS temp.fresh_pbs")
+    conn.execute("""
+        CREATE TEMP TABLE fresh_pbs AS
+        WITH typed AS (
+            SELECT
+                r.id AS runner_id,
+                p.event_type,
+                p.event_date,
+                CAST(substr(p.event_date, 1, 4) AS INTEGER) AS year,
+                CAST(substr(ra.race_date, 1, 4) AS INTEGER) AS season,
+                date(ra.race_date, :window_days) AS window_start,
+                p.event_type GLOB '*[0-9][hd]' AS timed,
+                CASE WHEN p.event_type GLOB '*[0-9][hd]'
+                     THEN COALESCE(p.distance_km, p.distance)
+                     ELSE p.duration_sec
+                END AS value
+            FROM runners r
+            JOIN races ra ON ra.id = r.race_id
+            JOIN performances p ON p.duv_id = r.duv_id AND p.event_date < ra.race_date
+            WHERE (:race_id IS NULL OR r.race_id = :race_id)
+            AND (:duv_id IS NULL OR r.duv_id = :duv_id)
+        ),
+        scored AS (
+            SELECT *, CASE WHEN timed THEN -value ELSE value END AS sort_key
+            FROM typed
+            WHERE value > 0
+        ),
+        ranked AS (
+            SELECT
+                *,
+                ROW_NUMBER() OVER (
+                    PARTITION BY runner_id, event_type
+                    ORDER BY sort_key, event_date
+                ) AS rn_all,
+                ROW_NUMBER() OVER (
+                    PARTITION BY runner_id, event_type, event_date >= window_start
+                    ORDER BY sort_key, event_date
+                ) AS rn_window,
+                ROW_NUMBER() OVER (
+                    PARTITION BY runner_id, event_type, year
+                    ORDER BY sort_key, event_date
+                ) AS rn_season
+            FROM scored
+        )
+        SELECT
+            runner_id,
+            event_type,
+            MAX(CASE WHEN rn_all = 1 THEN value END) AS pb_all_time,
+            MAX(CASE WHEN rn_all = 1 THEN year END) AS pb_all_time_year,
+            MAX(CASE WHEN rn_window = 1 AND event_date >= window_start THEN value END) AS pb_last_2_years,
+            MAX(CASE WHEN rn_window = 1 AND event_date >= window_start THEN year END) AS pb_last_2_years_year,
+            MAX(CASE WHEN rn_season = 1 AND year = season THEN value END) AS season_best,
+            MAX(CASE WHEN rn_season = 1 AND year = season THEN year END) AS season_best_year,
+            CASE WHEN MAX(timed) THEN 'km' ELSE 's' END AS unit,
+            COUNT(*) AS race_count
+        FROM ranked
+        GROUP BY runner_id, event_type
+    """, params)
+
+    # Only rows whose values changed are written, and only rows that disappeared are
+    # deleted, so updated_at and sync_tombstones record real changes (sync-changes.py)
+    conn.execute("""
+        INSERT INTO runner_pbs (
+            runner_id, event_type,
+            pb_all_time, pb_all_time_year,
+            pb_last_2_years, pb_last_2_years_year,
+            season_best, season_best_year,
+            unit, race_count
+        )
+        SELECT
+            runner_id, event_type,
+            pb_all_time, pb_all_time_year,
+            pb_last_2_years, pb_last_2_years_year,
+            season_best, season_best_year,
+            unit, race_count
+        FROM fresh_pbs WHERE true
+        ON CONFLICT(runner_id, event_type) DO UPDATE SET
+            pb_all_time = excluded.pb_all_time,
+            pb_all_time_year = excluded.pb_all_time_year,
+            pb_last_2_years = excluded.pb_last_2_years,
+            pb_last_2_years_year = excluded.pb_last_2_years_year,
+            season_best = excluded.season_best,
+            season_best_year = excluded.season_best_year,
+            unit = excluded.unit,
+            race_count = excluded.race_count,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE pb_all_time IS NOT excluded.pb_all_time
+           OR pb_all_time_year IS NOT excluded.pb_all_time_year
+           OR pb_last_2_years IS NOT excluded.pb_last_2_years
+           OR pb_last_2_years_year IS NOT excluded.pb_last_2_years_year
+           OR season_best IS NOT excluded.season_best
+           OR season_best_year IS NOT excluded.season_best_year
+           OR unit IS NOT excluded.unit
+           OR race_count IS NOT excluded.race_count
     """)
+    conn.execute(f"""
+        DELETE FROM runner_pbs
+        WHERE runner_id IN ({scope})
+        AND NOT EXISTS (
+            SELECT 1 FROM fresh_pbs f
+            WHERE f.runner_id = runner_pbs.runner_id AND f.event_type = runner_pbs.event_type
+        )
+    """, params)
+    conn.execute("DROP TABLE temp.fresh_pbs")
+
+    return conn.execute(f"SELECT COUNT(*) FROM runner_pbs WHERE runner_id IN ({scope})", params).fetchone()[0]
+
+
+def apply_history_pbs(cursor: sqlite3.Cursor, athletes: List[Tuple[int, Optional[int]]]):
+    """
+    Copy the materialized 24h PBs into the runners rows of each (duv_id, skip_runner_id).
+
+    Used for runners whose PBs can't come from AllPBs: past races and athletes whose
+    shared history was reused. The skipped runner already has fresh AllPBs values.
+    """
+    cursor.executemany("""
+        UPDATE runners SET
+            personal_best_all_time = (SELECT pb_all_time FROM runner_pbs
+                                      WHERE runner_id = runners.id AND event_type = '24h'),
+            personal_best_all_time_year = (SELECT pb_all_time_year FROM runner_pbs
+                                           WHERE runner_id = runners.id AND event_type = '24h'),
+            personal_best_last_2_years = (SELECT pb_last_2_years FROM runner_pbs
+                                          WHERE runner_id = runners.id AND event_type = '24h'),
+            personal_best_last_2_years_year = (SELECT pb_last_2_years_year FROM runner_pbs
+                                               WHERE runner_id = runners.id AND event_type = '24h')
+        WHERE duv_id = ? AND id IS NOT ?
+    """, athletes)
+
+
+def backfill_parsed_performances(conn: sqlite3.Connection) -> Tuple[int, int]:
+    """
+    Reparse every stored performance into distance_km / duration_sec in one pass.
+
+    Uses the raw performance_text where it was stored; older rows fall back to the
+    legacy distance value, which only holds a duration for rows packed by the web
+    fetcher (see legacy_duration). Rows from the Python fetcher keep a NULL
+    duration_sec until the runner is fetched again. Returns (rows updated, rows
+    without a usable value).
+    """
+    updates = []
+    unresolved = 0
+    for perf_id, event_type, distance, perf_text in conn.execute(
+            "SELECT id, event_type, distance, performance_text FROM performances"):
+        kind, event_km, event_sec = classify_event(event_type)
+
+        if perf_text:
+            parsed = parse_performance(event_type, perf_text)
+            if parsed:
+                updates.append((parsed[0], parsed[1], parsed[2], perf_id))
+                continue
+
+        if kind == 'timed':
+            updates.append((distance, distance, event_sec, perf_id))
+        elif kind == 'distance':
+            duration = legacy_duration(distance)
+            if duration is None:
+                unresolved += 1
+            updates.append((distance, event_km, duration, perf_id))
+        else:
+            unresolved += 1
+            updates.append((distance, None, None, perf_id))
+
+    conn.executemany("""
+        UPDATE performances
+        SET distance = ?, distance_km = ?, duration_sec = ?
+        WHERE id = ?
+    """, updates)
+
+    return len(updates), unresolved
+
+
+def record_fetch_failure(cursor: sqlite3.Cursor, runner: Dict[str, Any], error: str) -> int:
+    """Queue a failed profile fetch for retry with exponential backoff. Returns the attempt count."""
+    cursor.execute("SELECT attempts FROM fetch_failures WHERE duv_id = ?", (runner['duv_id'],))
+    row = cursor.fetchone()
+    attempts = (row[0] if row else 0) + 1
+    delay = min(RETRY_BASE_DELAY * 2 ** (attempts - 1), RETRY_MAX_DELAY)
+
+    cursor.execute("""
+        INSERT INTO fetch_failures (
+            duv_id, runner_id, attempts, last_error, last_attempt_at, next_attempt_at
+        ) VALUES (?, ?, ?, ?, datetime('now'), datetime('now', ?))
+        ON CONFLICT(duv_id) DO UPDATE SET
+            runner_id = excluded.runner_id,
+            attempts = excluded.attempts,
+            last_error = excluded.last_error,
+            last_attempt_at = excluded.last_attempt_at,
+            next_attempt_at = excluded.next_attempt_at
+    """, (runner['duv_id'], runner['id'], attempts, error[:500], f"+{delay} seconds"))
+
+    return attempts
+
+
+def list_fetch_failures(db_path: str):
+    """Print the failed-fetch queue"""
+    conn = get_connection(db_path)
+    rows = conn.execute("""
+        SELECT f.duv_id, f.attempts, f.last_error, f.next_attempt_at, r.firstname, r.lastname
+        FROM fetch_failures f
+        LEFT JOIN runners r ON r.id = f.runner_id
+        ORDER BY f.attempts >= ?, f.next_attempt_at
+    """, (MAX_FETCH_ATTEMPTS,)).fetchall()
+
+    if not rows:
+        print("No failed fetches queued.", file=sys.stderr)
+        return
+
+    print(f"\n{'DUV ID':>8} {'Tries':>5} {'Next attempt':19} {'Runner':30} Last error")
+    print("=" * 100)
+    for duv_id, attempts, last_error, next_attempt_at, firstname, lastname in rows:
+        next_str = 'DEAD-LETTER' if attempts >= MAX_FETCH_ATTEMPTS else next_attempt_at
+        name = f"{firstname or ''} {lastname or ''}".strip()
+        print(f"{duv_id:>8} {attempts:>5} {next_str:19} {name[:30]:30} {(last_error or '')[:60]}")
+
+
+def store_profile(cursor: sqlite3.Cursor, runner: Dict[str, Any], profile: Dict[str, Any],
+                  race: Dict[str, Any]) -> bool:
+    """
+    Bring an athlete's shared performance history up to date with a freshly fetched DUV profile.
+
+    Date of birth, age and fetch time are updated on every runner with this DUV id
+    (age as of each one's race). For an upcoming race the runner's 24h PBs come from
+    AllPBs; returns whether they did, otherwise see apply_history_pbs().
+    """
+    yob = profile.get('YOB')
+    cursor.execute("""
+        UPDATE runners
+        SET duv_fetched_at = datetime('now'),
+            date_of_birth = ?,
+            age = (SELECT CAST(substr(race_date, 1, 4) AS INTEGER) FROM races WHERE id = runners.race_id) - ?
+        WHERE duv_id = ?
+    """, (f"{yob}-01-01" if yob else None, yob, runner['duv_id']))
+
+    # Extract all race results
+    results = profile.get('results', [])
+
+    if not results:
+        print(f"  → No race results", file=sys.stderr)
+        return False
+
+    print(f"  → Found {len(results)} race results", file=sys.stderr)
+
+    # Diff against the athlete's stored history (shared by all their races): unchanged
+    # results keep their row, so a refetch with no new results syncs nothing
+    stored: Dict[Tuple[Any, ...], List[int]] = {}
+    for perf_id, event_id, event_type, event_date in cursor.execute(
+            "SELECT id, event_id, event_type, event_date FROM performances WHERE duv_id = ? ORDER BY id",
+            (runner['duv_id'],)).fetchall():
+        stored.setdefault((event_id, event_type, event_date), []).append(perf_id)
+
+    for result in results:
+        # Use Distance field directly from our parser
+        distance = result.get('Distance')
+        if not distance:
+            distance = parse_distance(result.get('Performance', ''))
+        if not distance:
+            continue
+
+        # Get event type from Length field
+        event_type = result.get('Length', 'Unknown')
+        values = (result.get('Event', ''), distance, result.get('Rank'),
+                  result.get('DistanceKm'), result.get('DurationSec'), result.get('Performance'))
+
+        matches = stored.get((result.get('EventID'), event_type, result.get('Startdate', '')))
+        if matches:
+            # Compared in SQL, so column affinity applies ('12' is rank 12)
+            cursor.execute("""
+                UPDATE performances
+                SET event_name = ?, distance = ?, rank = ?,
+                    distance_km = ?, duration_sec = ?, performance_text = ?
+                WHERE id = ?
+                AND (event_name, distance, rank, distance_km, duration_sec, performance_text)
+                    IS NOT (?, ?, ?, ?, ?, ?)
+            """, (*values, matches.pop(0), *values))
+            continue
+
+        # Save performance
+        cursor.execute("""
+            INSERT INTO performances (
+                duv_id, event_id, event_name, event_date,
+                distance, rank, event_type,
+                distance_km, duration_sec, performance_text
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            runner['duv_id'],
+            result.get('EventID'),
+            values[0],
+            result.get('Startdate', ''),
+            distance,
+            values[2],
+            event_type,
+            values[3],
+            values[4],
+            values[5]
+        ))
+
+    # Results DUV no longer lists
+    cursor.executemany("DELETE FROM performances WHERE id = ?",
+                       [(perf_id,) for ids in stored.values() for perf_id in ids])
+
+    if not is_upcoming(race):
+        return False
+
+    # Extract PBs from AllPBs array (more reliable than manual calculation)
+    pb_all_time, pb_last_2_years = extract_24h_pbs(profile.get('all_pbs', []), pb_since_year(race))
+
+    # Update runner with PBs (only 24h PBs are calculated)
+    cursor.execute("""
+        UPDATE runners
+        SET personal_best_all_time = ?,
+            personal_best_last_2_years = ?
+        WHERE id = ?
+    """, (pb_all_time, pb_last_2_years, runner['id']))
+
+    if pb_all_time:
+        pb_3y_str = f"{pb_last_2_years:.2f}" if pb_last_2_years else "N/A"
+        print(f"  24h PB All-Time: {pb_all_time:.2f} km, Last 3Y: {pb_3y_str} km", file=sys.stderr)
+    else:
+        print(f"  No 24h races found (stored {len(results)} other race results)", file=sys.stderr)
+    return True
+
+
+def reuse_shared_history(cursor: sqlite3.Cursor, runner: Dict[str, Any], race: Dict[str, Any],
+                         max_age_days: int) -> bool:
+    """
+    Point a runner at history already fetched for the same athlete in another race.
+
+    Returns False (fetch it) unless that fetch is at most max_age_days old.
+    """
+    if max_age_days <= 0:
+        return False
+    cursor.execute("""
+        SELECT duv_fetched_at, date_of_birth FROM runners
+        WHERE duv_id = ? AND race_id != ? AND duv_fetched_at >= datetime('now', ?)
+        ORDER BY duv_fetched_at DESC
+        LIMIT 1
+    """, (runner['duv_id'], race['id'], f"-{max_age_days} days"))
+    sibling = cursor.fetchone()
+    if sibling is None:
+        return False
+
+    fetched_at, dob = sibling
+    age = race_year(race) - int(dob[:4]) if dob else None
+    cursor.execute("UPDATE runners SET duv_fetched_at = ?, date_of_birth = ?, age = ? WHERE id = ?",
+                   (fetched_at, dob, age, runner['id']))
+    return True
+
+
+def fetch_performances(db_path: str, race: Optional[str] = None, retry_failed: bool = False,
+                       max_age_days: int = SHARED_HISTORY_MAX_AGE_DAYS, new_only: bool = False,
+                       stale_days: Optional[int] = None):
+    """
+    Main performance fetching logic
+
+    new_only limits the run to matched runners never fetched; stale_days to
+    those fetched longer ago than that. Both together select either.
+    """
+    conn = get_connection(db_path)
+    cursor = conn.cursor()
+    race = resolve_race(conn, race)
+
+    if retry_failed:
+        # Only runners whose last fetch failed and whose backoff has expired.
+        # CROSS JOIN keeps the (few) failures outermost; race_id alone would pick a runners index
+        cursor.execute("""
+            SELECT r.* FROM fetch_failures f
+            CROSS JOIN runners r ON r.duv_id = f.duv_id AND r.race_id = ?
+            WHERE f.attempts < ?
+            AND f.next_attempt_at <= datetime('now')
+            ORDER BY f.next_attempt_at
+        """, (race['id'], MAX_FETCH_ATTEMPTS))
+    else:
+        # Get matched runners
+        freshness, params = [], [race['id']]
+        if new_only:
+            freshness.append("duv_fetched_at IS NULL")
+        if stale_days is not None:
+            freshness.append("duv_fetched_at < datetime('now', ?)")
+            params.append(f"-{stale_days} days")
+        cursor.execute(f"""
+            SELECT * FROM runners
+            WHERE race_id = ?
+            AND match_status IN ('auto-matched', 'manually-matched')
+            AND duv_id IS NOT NULL
+            {f"AND ({' OR '.join(freshness)})" if freshness else ""}
+            ORDER BY entry_id
+        """, params)
 
     runners = [dict(row) for row in cursor.fetchall()]
 
     if not runners:
-        print("No matched runners found.", file=sys.stderr)
-        print("Run match-runners.py first.", file=sys.stderr)
+        if retry_failed:
+            print(f"No failed fetches are due for retry in {race['name']}.", file=sys.stderr)
+        else:
+            print(f"No matched runners found in {race['name']}.", file=sys.stderr)
+            if not freshness:
+                print("Run match-runners.py first.", file=sys.stderr)
         return
 
-    print(f"\nFetching performance data for {len(runners)} runners...\n", file=sys.stderr)
+    print(f"\nFetching performance data for {len(runners)} runners of {race['name']} ({race['race_date']})...\n",
+          file=sys.stderr)
 
-    # Race date: 2025-10-17, so 3 years before = 2022-10-18
-    race_date = datetime(2025, 10, 17)
-    three_years_ago = race_date - timedelta(days=1095)  # 2022-10-18
-    current_year = datetime.now().year
+    failed_count = 0
+    consecutive_failures = 0
+    fetched = set()  # DUV ids fetched in this run; a second entry shares the history
+    reused_count = 0
+    history_pbs = []  # (duv_id, runner id with AllPBs values or None) for apply_history_pbs
 
     for i, runner in enumerate(runners, 1):
         print(f"[{i}/{len(runners)}] {runner['firstname']} {runner['lastname']} (DUV ID: {runner['duv_id']})", file=sys.stderr)
 
+        if runner['duv_id'] in fetched or (
+                not retry_failed and reuse_shared_history(cursor, runner, race, max_age_days)):
+            print(f"  → Sharing history fetched for another entry", file=sys.stderr)
+            reused_count += 1
+            history_pbs.append((runner['duv_id'], None))
+            conn.commit()
+            continue
+
         # Fetch profile
-        profile = get_runner_profile(runner['duv_id'])
+        try:
+            profile = get_runner_profile(runner['duv_id'])
+        except Exception as e:
+            attempts = record_fetch_failure(cursor, runner, str(e))
+            conn.commit()
+            failed_count += 1
+            consecutive_failures += 1
+            print(f"  ERROR fetching profile: {e}", file=sys.stderr)
+            print(f"  Failed to fetch profile (attempt {attempts}/{MAX_FETCH_ATTEMPTS}, queued for retry)", file=sys.stderr)
+            if retry_failed and consecutive_failures >= RETRY_ABORT_AFTER:
+                print(f"\n  ⚠ {consecutive_failures} consecutive failures, DUV still unavailable. Stopping retry run.", file=sys.stderr)
+                break
+            time.sleep(RATE_LIMIT_DELAY)
+            continue
+
         time.sleep(RATE_LIMIT_DELAY)
+        consecutive_failures = 0
+        cursor.execute("DELETE FROM fetch_failures WHERE duv_id = ?", (runner['duv_id'],))
 
-        if not profile:
-            print(f"  Failed to fetch profile", file=sys.stderr)
-            continue
+        live_pbs = store_profile(cursor, runner, profile, race)
+        fetched.add(runner['duv_id'])
+        # Other races of this athlete (and past races) read PBs from the new history
+        history_pbs.append((runner['duv_id'], runner['id'] if live_pbs else None))
+        # Commit per runner so the write lock is free for match/view between requests
+        conn.commit()
 
-        # Extract all race results
-        results = profile.get('results', [])
+    # The history is shared, so every race's PBs are rebuilt, not just this one's
+    pb_rows = materialize_runner_pbs(conn)
+    apply_history_pbs(cursor, history_pbs)
 
-        if not results:
-            print(f"  → No race results", file=sys.stderr)
-            continue
+    conn.commit()
 
-        print(f"  → Found {len(results)} race results", file=sys.stderr)
+    print(f"\n{'='*60}", file=sys.stderr)
+    print(f"PERFORMANCE DATA FETCHED SUCCESSFULLY", file=sys.stderr)
+    print(f"  Total runners processed: {len(runners)}", file=sys.stderr)
+    print(f"  Shared history reused: {reused_count}", file=sys.stderr)
+    print(f"  Failed fetches queued for retry: {failed_count}", file=sys.stderr)
+    print(f"  Discipline PBs materialized: {pb_rows}", file=sys.stderr)
+    print(f"{'='*60}", file=sys.stderr)
 
-        # Extract PBs from AllPBs array (more reliable than manual calculation)
-        pb_all_time = None
-        pb_last_2_years = None
-        all_pbs = profile.get('all_pbs', [])
 
-        if all_pbs:
-            # Find 24h PBs entry
-            pb_24h = None
-            for pb_entry in all_pbs:
-                if '24h' in pb_entry or '24 h' in pb_entry:
-                    pb_24h = pb_entry.get('24h') or pb_entry.get('24 h')
-                    break
+def refresh_pbs_only(db_path: str, race: Optional[str] = None):
+    """
+    Lightweight race-week refresh: 24h PBs and age from AllPBs only.
 
-            if pb_24h and isinstance(pb_24h, dict):
-                # Extract overall PB
-                if 'PB' in pb_24h:
-                    try:
-                        pb_all_time = float(pb_24h['PB'])
-                    except (ValueError, TypeError):
-                        pass
+    Skips the AllPerfs walk and the performances rewrite; runners are updated
+    with a single executemany at the end. AllPBs are today's PBs, so past races
+    are refused (their PBs come from the stored history).
+    """
+    conn = get_connection(db_path)
+    cursor = conn.cursor()
+    race = resolve_race(conn, race)
 
-                # Extract Last 3 Years PB (since Oct 2022)
-                year_keys = [k for k in pb_24h.keys() if k != 'PB' and k.isdigit()]
-                for year in year_keys:
-                    year_int = int(year)
-                    if year_int >= three_years_ago.year:
-                        year_data = pb_24h[year]
-                        if isinstance(year_data, dict) and 'Perf' in year_data:
-                            try:
-                                perf_value = float(year_data['Perf'])
-                                if pb_last_2_years is None or perf_value > pb_last_2_years:
-                                    pb_last_2_years = perf_value
-                            except (ValueError, TypeError):
-                                pass
-
-        # Clear existing performances
-        cursor.execute("DELETE FROM performances WHERE runner_id = ?", (runner['id'],))
-
-        for result in results:
-            # Use Distance field directly from our parser
-            distance = result.get('Distance')
-            if not distance:
-                distance = parse_distance(result.get('Performance', ''))
-            if not distance:
-                continue
+    if not is_upcoming(race):
+        raise ValueError(f"{race['name']} was on {race['race_date']}; its PBs come from the stored history "
+                         f"(use --materialize-only), not from today's AllPBs")
 
-            # Get event type from Length field
-            event_type = result.get('Length', 'Unknown')
+    cursor.execute("""
+        SELECT id, firstname, lastname, duv_id FROM runners
+        WHERE race_id = ?
+        AND match_status IN ('auto-matched', 'manually-matched')
+        AND duv_id IS NOT NULL
+        ORDER BY entry_id
+    """, (race['id'],))
+    runners = [dict(row) for row in cursor.fetchall()]
 
-            # Save performance
-            cursor.execute("""
-                INSERT INTO performances (
-                    runner_id, event_id, event_name, event_date,
-                    distance, rank, event_type
-                ) VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (
-                runner['id'],
-                result.get('EventID'),
-                result.get('Event', ''),
-                result.get('Startdate', ''),
-                distance,
-                result.get('Rank'),
-                event_type
-            ))
-
-        # Calculate age
-        yob = profile.get('YOB')
-        age = current_year - yob if yob else None
+    if not runners:
+        print(f"No matched runners found in {race['name']}.", file=sys.stderr)
+        print("Run match-runners.py first.", file=sys.stderr)
+        return
+
+    mode = "incremental JSON" if ijson else "full JSON (install ijson for incremental parsing)"
+    print(f"\nRefreshing PBs for {len(runners)} runners of {race['name']} ({mode})...\n", file=sys.stderr)
+
+    since_year = pb_since_year(race)
+    season = race_year(race)
+    updates = []
+    refreshed_ids = []
+    failed_count = 0
+
+    for i, runner in enumerate(runners, 1):
+        try:
+            pbs = get_runner_pbs(runner['duv_id'])
+        except Exception as e:
+            attempts = record_fetch_failure(cursor, runner, str(e))
+            failed_count += 1
+            print(f"[{i}/{len(runners)}] {runner['firstname']} {runner['lastname']}: "
+                  f"ERROR {e} (attempt {attempts}/{MAX_FETCH_ATTEMPTS}, queued for retry)", file=sys.stderr)
+            time.sleep(RATE_LIMIT_DELAY)
+            continue
+
+        time.sleep(RATE_LIMIT_DELAY)
+
+        pb_all_time, pb_last_2_years = extract_24h_pbs(pbs['all_pbs'], since_year)
+        yob = pbs['YOB']
+        age = season - yob if yob else None
         dob = f"{yob}-01-01" if yob else None
 
-        # Update runner with PBs (only 24h PBs are calculated)
-        cursor.execute("""
-            UPDATE runners
-            SET personal_best_all_time = ?,
-                personal_best_last_2_years = ?,
-                date_of_birth = ?,
-                age = ?
-            WHERE id = ?
-        """, (pb_all_time, pb_last_2_years, dob, age, runner['id']))
-
-        if pb_all_time:
-            pb_3y_str = f"{pb_last_2_years:.2f}" if pb_last_2_years else "N/A"
-            print(f"  24h PB All-Time: {pb_all_time:.2f} km, Last 3Y: {pb_3y_str} km", file=sys.stderr)
-        else:
-            print(f"  No 24h races found (stored {len(results)} other race results)", file=sys.stderr)
+        updates.append((pb_all_time, pb_last_2_years, dob, age, runner['id']))
+        refreshed_ids.append((runner['duv_id'],))
+
+        pb_str = f"{pb_all_time:.2f} km" if pb_all_time else "no 24h PB"
+        print(f"[{i}/{len(runners)}] {runner['firstname']} {runner['lastname']}: {pb_str}", file=sys.stderr)
+
+    cursor.executemany("""
+        UPDATE runners
+        SET personal_best_all_time = ?,
+            personal_best_last_2_years = ?,
+            date_of_birth = ?,
+            age = ?
+        WHERE id = ?
+    """, updates)
+    cursor.executemany("DELETE FROM fetch_failures WHERE duv_id = ?", refreshed_ids)
 
     conn.commit()
-    conn.close()
 
     print(f"\n{'='*60}", file=sys.stderr)
-    print(f"PERFORMANCE DATA FETCHED SUCCESSFULLY", file=sys.stderr)
-    print(f"  Total runners processed: {len(runners)}", file=sys.stderr)
+    print(f"PB REFRESH COMPLETE", file=sys.stderr)
+    print(f"  Runners updated: {len(updates)}", file=sys.stderr)
+    print(f"  Failed fetches queued for retry: {failed_count}", file=sys.stderr)
     print(f"{'='*60}", file=sys.stderr)
 
 
+def build_refresh_queue(conn: sqlite3.Connection, race_id: int) -> List[Tuple[float, int, Dict[str, Any]]]:
+    """
+    Build a heap of the race's matched runners ordered by refresh priority.
+
+    Priority is hours since the last profile fetch, multiplied for seeded runners
+    (top SEED_RANK per gender) and runners who raced in the last RECENT_RACE_DAYS.
+    Runners fetched within DAEMON_MIN_REFRESH_HOURS are left out (a weighted fresh
+    runner would otherwise outrank a stale one and stall the queue), and so are
+    runners backing off in fetch_failures (or dead-lettered).
+    """
+    recent_cutoff = (datetime.now() - timedelta(days=RECENT_RACE_DAYS)).strftime('%Y-%m-%d')
+    rows = conn.execute("""
+        SELECT
+            r.id, r.entry_id, r.firstname, r.lastname, r.duv_id,
+            (julianday('now') - julianday(r.duv_fetched_at)) * 24 AS staleness_hours,
+            CASE WHEN r.personal_best_last_2_years IS NULL THEN NULL
+                 ELSE RANK() OVER (PARTITION BY r.gender ORDER BY r.personal_best_last_2_years DESC)
+            END AS seed_rank,
+            (SELECT MAX(p.event_date) FROM performances p WHERE p.duv_id = r.duv_id) AS last_race
+        FROM runners r
+        LEFT JOIN fetch_failures f ON f.duv_id = r.duv_id
+        WHERE r.race_id = ?
+        AND r.match_status IN ('auto-matched', 'manually-matched')
+        AND r.duv_id IS NOT NULL
+        AND (r.duv_fetched_at IS NULL OR r.duv_fetched_at < datetime('now', ?))
+        AND (f.duv_id IS NULL OR (f.attempts < ? AND f.next_attempt_at <= datetime('now')))
+    """, (race_id, f"-{DAEMON_MIN_REFRESH_HOURS} hours", MAX_FETCH_ATTEMPTS)).fetchall()
+
+    heap = []
+    for row in rows:
+        runner = dict(row)
+        staleness = runner['staleness_hours']
+        if staleness is None:
+            staleness = NEVER_FETCHED_HOURS
+        runner['staleness_hours'] = staleness
+
+        weight = 1.0
+        if runner['seed_rank'] is not None and runner['seed_rank'] <= SEED_RANK:
+            weight *= SEEDED_WEIGHT
+        if runner['last_race'] and runner['last_race'] >= recent_cutoff:
+            weight *= RECENT_RACE_WEIGHT
+
+        # heapq is a min-heap: negate priority, runner id breaks ties
+        heapq.heappush(heap, (-staleness * weight, runner['id'], runner))
+
+    return heap
+
+
+def run_refresh_daemon(db_path: str, race: Optional[str] = None,
+                       requests_per_hour: int = DAEMON_REQUESTS_PER_HOUR, max_requests: int = 0):
+    """
+    Continuously refresh the race's DUV profiles in priority order within a request budget.
+
+    Each refresh goes through store_profile() and a per-athlete runner_pbs rebuild,
+    so the data written is identical to a full fetch. Stop with Ctrl+C.
+    """
+    if requests_per_hour <= 0:
+        raise ValueError(f"--requests-per-hour must be positive, got {requests_per_hour}")
+    conn = get_connection(db_path)
+    cursor = conn.cursor()
+    race = resolve_race(conn, race)
+
+    interval = max(3600.0 / requests_per_hour, RATE_LIMIT_DELAY)
+
+    print(f"\nRefresh daemon started for {race['name']}: {requests_per_hour} requests/hour "
+          f"(one every {interval:.0f}s). Ctrl+C to stop.\n", file=sys.stderr)
+
+    heap = []
+    requests_made = 0
+    since_rebuild = 0
+
+    try:
+        while not max_requests or requests_made < max_requests:
+            if not heap or since_rebuild >= DAEMON_QUEUE_REBUILD:
+                heap = build_refresh_queue(conn, race['id'])
+                since_rebuild = 0
+
+            if not heap:
+                # Everything is fresh; idle one slot and look again
+                time.sleep(interval)
+                continue
+
+            _, _, runner = heapq.heappop(heap)
+            started = time.monotonic()
+            requests_made += 1
+            since_rebuild += 1
+
+            stale_str = "never fetched" if runner['staleness_hours'] >= NEVER_FETCHED_HOURS \
+                else f"{runner['staleness_hours']:.1f}h stale"
+            print(f"[{datetime.now():%H:%M:%S}] {runner['firstname']} {runner['lastname']} "
+                  f"(DUV ID: {runner['duv_id']}, {stale_str})", file=sys.stderr)
+
+            try:
+                profile = get_runner_profile(runner['duv_id'])
+            except Exception as e:
+                attempts = record_fetch_failure(cursor, runner, str(e))
+                print(f"  ERROR fetching profile: {e} (attempt {attempts}/{MAX_FETCH_ATTEMPTS})", file=sys.stderr)
+            else:
+                cursor.execute("DELETE FROM fetch_failures WHERE duv_id = ?", (runner['duv_id'],))
+                live_pbs = store_profile(cursor, runner, profile, race)
+                materialize_runner_pbs(conn, duv_id=runner['duv_id'])
+                apply_history_pbs(cursor, [(runner['duv_id'], runner['id'] if live_pbs else None)])
+            conn.commit()
+
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
+    except KeyboardInterrupt:
+        print("\nStopping refresh daemon...", file=sys.stderr)
+    finally:
+        conn.commit()
+
+    print(f"Refresh daemon stopped after {requests_made} requests", file=sys.stderr)
+
+
 def main():
     parser = argparse.ArgumentParser(description='Fetch DUV performance data for matched runners')
     parser.add_argument('--db-path', default='data/iau24hwc.db', help='Path to SQLite database')
+    parser.add_argument('--race', help='Race id or name to fetch for (default: the latest race)')
+    parser.add_argument('--max-age-days', type=int, default=SHARED_HISTORY_MAX_AGE_DAYS,
+                        help=f'Reuse an athlete\'s history fetched for another race within this many days '
+                             f'(default {SHARED_HISTORY_MAX_AGE_DAYS}, 0 = always refetch)')
+    parser.add_argument('--materialize-only', action='store_true',
+                        help='Only rebuild runner_pbs of all races from stored performances (no DUV requests)')
+    parser.add_argument('--backfill-parsed', action='store_true',
+                        help='Reparse stored performances into distance_km/duration_sec, then rebuild runner_pbs')
+    parser.add_argument('--retry-failed', action='store_true',
+                        help='Only retry runners whose last profile fetch failed (with backoff)')
+    parser.add_argument('--new-only', action='store_true',
+                        help='Only runners whose profile was never fetched (e.g. just matched)')
+    parser.add_argument('--stale-days', type=int,
+                        help='Only runners whose profile was fetched more than this many days ago')
+    parser.add_argument('--list-failed', action='store_true', help='Show the failed-fetch retry queue')
+    parser.add_argument('--pbs-only', action='store_true',
+                        help='Only refresh 24h PBs and age from AllPBs (skips performance history)')
+    parser.add_argument('--daemon', action='store_true',
+                        help='Run continuously, refreshing runners by staleness and importance')
+    parser.add_argument('--requests-per-hour', type=int, default=DAEMON_REQUESTS_PER_HOUR,
+                        help=f'DUV request budget for --daemon (default {DAEMON_REQUESTS_PER_HOUR})')
+    parser.add_argument('--max-requests', type=int, default=0,
+                        help='Stop --daemon after this many requests (default: run forever)')
 
     args = parser.parse_args()
 
-    db_path = args.db_path
-    if not os.path.isabs(db_path):
-        db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), db_path)
+    db_path = resolve_db_path(args.db_path)
 
     if not os.path.exists(db_path):
         print(f"ERROR: Database not found: {db_path}", file=sys.stderr)
         sys.exit(1)
 
-    fetch_performances(db_path)
+    if args.backfill_parsed:
+        conn = get_connection(db_path)
+        updated, unresolved = backfill_parsed_performances(conn)
+        pb_rows = materialize_runner_pbs(conn)
+        conn.commit()
+        print(f"✓ Reparsed {updated} performances ({unresolved} without a recoverable value)", file=sys.stderr)
+        if unresolved:
+            print("  Run fetch-performances.py again (with --max-age-days 0) to fill them from DUV", file=sys.stderr)
+        print(f"✓ Materialized {pb_rows} runner/discipline PB rows", file=sys.stderr)
+        return
+
+    if args.materialize_only:
+        conn = get_connection(db_path)
+        pb_rows = materialize_runner_pbs(conn)
+        conn.commit()
+        print(f"✓ Materialized {pb_rows} runner/discipline PB rows", file=sys.stderr)
+        return
+
+    if args.list_failed:
+        list_fetch_failures(db_path)
+        return
+
+    try:
+        if args.pbs_only:
+            refresh_pbs_only(db_path, args.race)
+        elif args.daemon:
+            run_refresh_daemon(db_path, args.race, args.requests_per_hour, args.max_requests)
+        else:
+            fetch_performances(db_path, args.race, retry_failed=args.retry_failed,
+                               max_age_days=args.max_age_days, new_only=args.new_only,
+                               stale_days=args.stale_days)
+    except ValueError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Spreadsheet Entry List Importer
+
+Usage:
+    python scripts/import-entry-list.py <entry-list.csv|.xlsx> [--db-path <path>] [--incremental] [--preview]
+    python scripts/import-entry-list.py entries-2024.xlsx --race "IAU 24H World Championships 2024" --race-date 2024-12-07
+
+Imports an entry list published as CSV or XLSX straight into the runners
+table, with no PDF conversion and no surname/firstname guessing:
+1. Finds the header row and maps columns with the same header vocabulary
+   as the Docling table parser (lib/pdf/entry_list.py COLUMN_ROLES)
+2. Streams rows through the shared name/nationality/gender normalizers
+3. Saves through the shared runner import (lib/db/runner_import.py) into
+   one race (--race, default the latest), so --incremental keeps DUV matches
+   and other races' fields are never touched
+
+XLSX files need openpyxl (pip install openpyxl); CSV needs nothing extra.
+"""
+
+import sys
+import os
+import csv
+import json
+import argparse
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'lib', 'pdf'))
+from entry_list import EMPTY_CELLS, infer_table_schema, normalize_name, normalize_gender, normalize_nationality
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'lib', 'db'))
+from runner_import import add_import_args, save_runners
+from sqlite_db import resolve_db_path
+
+REQUIRED_ROLES = ('firstname', 'lastname', 'nationality', 'gender')
+HEADER_SCAN_ROWS = 20  # title/notes rows allowed above the header
+
+
+def iter_csv_rows(path: str) -> Iterator[List[str]]:
+    """Stream CSV rows, sniffing the delimiter (comma, semicolon or tab)"""
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        sample = f.read(64 * 1024)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+        except csv.Error:
+            # Title rows above the header make short files look inconsistent to the
+            # sniffer; fall back to the commonest candidate delimiter
+            yield from csv.reader(f, csv.excel, delimiter=max(',;\t', key=sample.count))
+            return
+        yield from csv.reader(f, dialect)
+
+
+def iter_xlsx_rows(path: str, sheet: Optional[str] = None) -> Iterator[List[Any]]:
+    """Stream rows from an XLSX sheet in read-only mode"""
+    try:
+        import openpyxl
+    except ImportError:
+        print("ERROR: openpyxl not installed", file=sys.stderr)
+        print("Install with: pip install openpyxl", file=sys.stderr)
+        sys.exit(1)
+
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet] if sheet else workbook.active
+        for row in worksheet.iter_rows(values_only=True):
+            yield list(row)
+    finally:
+        workbook.close()
+
+
+def _cell(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)  # Bib numbers read from XLSX as 31.0
+    text = str(value).strip()
+    return None if text in EMPTY_CELLS else text
+
+
+def find_header(rows: Iterator[Sequence[Any]]) -> Tuple[List[str], Dict[str, Tuple[int, ...]]]:
+    """Consume rows up to and including the header row; return its columns and schema"""
+    for _ in range(HEADER_SCAN_ROWS):
+        row = next(rows, None)
+        if row is None:
+            break
+        columns = [_cell(value) or '' for value in row]
+        schema = infer_table_schema(tuple(columns))
+        if 'firstname' in schema and 'lastname' in schema:
+            return columns, schema
+    raise ValueError(f"No header row with first and last name columns in the first {HEADER_SCAN_ROWS} rows")
+
+
+def iter_runners(rows: Iterator[Sequence[Any]], schema: Dict[str, Tuple[int, ...]],
+                 stats: Dict[str, int]) -> Iterator[Dict[str, Any]]:
+    """Map data rows to runners; rows missing a required field are counted and skipped"""
+    seen_ids = set()
+    reserves = 0
+
+    for row in rows:
+        values = {}
+        for role, positions in schema.items():
+            values[role] = next((v for v in (_cell(row[i]) for i in positions if i < len(row)) if v), None)
+
+        if not any(values.values()):
+            continue  # Blank spacer row
+
+        firstname = normalize_name(values['firstname'] or '')
+        lastname = normalize_name(values['lastname'] or '')
+        nationality = normalize_nationality(values['nationality'] or '')
+        gender = normalize_gender(values['gender'] or '')
+
+        if not (firstname and lastname and nationality and gender):
+            stats['skipped'] += 1
+            continue
+
+        entry_id = values.get('entryId') or str(stats['imported'] + 1)
+        if entry_id.upper() == 'R':
+            # Reserves share the 'R' marker instead of a number
+            reserves += 1
+            entry_id = f"R{reserves}"
+        if entry_id in seen_ids:
+            print(f"  Skipping duplicate entry {entry_id}: {firstname} {lastname}", file=sys.stderr)
+            stats['duplicates'] += 1
+            continue
+        seen_ids.add(entry_id)
+
+        stats['imported'] += 1
+        yield {
+            'entry_id': entry_id,
+            'firstname': firstname,
+            'lastname': lastname,
+            'nationality': nationality,
+            'gender': gender,
+        }
+
+
+def read_entry_list(path: str, sheet: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """Read runners from a CSV or XLSX entry list"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.xlsx', '.xlsm'):
+        rows = iter_xlsx_rows(path, sheet)
+    elif extension in ('.csv', '.tsv', '.txt'):
+        rows = iter_csv_rows(path)
+    else:
+        raise ValueError(f"Unsupported file type: {extension} (expected .csv or .xlsx)")
+
+    columns, schema = find_header(rows)
+    missing = [role for role in REQUIRED_ROLES if role not in schema]
+    if missing:
+        raise ValueError(f"No column for {', '.join(missing)} in header: {columns}")
+
+    mapping = ', '.join(f"{role}={'/'.join(columns[i] for i in positions)}" for role, positions in schema.items())
+    print(f"Columns: {mapping}", file=sys.stderr)
+
+    stats = {'imported': 0, 'skipped': 0, 'duplicates': 0}
+    runners = list(iter_runners(rows, schema, stats))
+    return runners, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import an entry list from CSV or XLSX (no PDF conversion)')
+    parser.add_argument('file', help='Path to .csv or .xlsx entry list')
+    parser.add_argument('--db-path', default='data/iau24hwc.db', help='Path to database')
+    add_import_args(parser)
+    parser.add_argument('--sheet', help='XLSX sheet name (default: active sheet)')
+    parser.add_argument('--preview', action='store_true', help='Preview first 30 entries without saving')
+    parser.add_argument('--json', action='store_true', help='Output JSON to stdout')
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.file):
+        print(f"ERROR: File not found: {args.file}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        runners, stats = read_entry_list(args.file, args.sheet)
+    except (ValueError, KeyError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"Read {stats['imported']} runners ({stats['skipped']} incomplete rows, "
+          f"{stats['duplicates']} duplicate entry IDs skipped)", file=sys.stderr)
+
+    if args.preview:
+        print(f"\nPreview of first 30 runners:\n")
+        for i, r in enumerate(runners[:30], 1):
+            print(f"{r['entry_id']:>5}. firstname=\"{r['firstname']:20s}\" lastname=\"{r['lastname']:20s}\" {r['nationality']:3s} {r['gender']}")
+        print(f"\nTotal: {len(runners)} runners")
+        return
+
+    if not runners:
+        print("ERROR: No runners found in file", file=sys.stderr)
+        sys.exit(1)
+
+    db_path = resolve_db_path(args.db_path)
+    try:
+        save_runners(runners, db_path, incremental=args.incremental, race=args.race, race_date=args.race_date)
+    except ValueError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps(runners, indent=2, ensure_ascii=False))
+
+    men = sum(1 for r in runners if r['gender'] == 'M')
+    women = sum(1 for r in runners if r['gender'] == 'W')
+    print(f"Saved {len(runners)} runners ({men} men, {women} women) to database", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
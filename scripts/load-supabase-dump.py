@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+CLI Tool: Build a local SQLite database from the Supabase SQL dump
+
+Usage:
+    python scripts/load-supabase-dump.py [--db-path data/iau24hwc.db] [--force]
+    python scripts/load-supabase-dump.py --parts 'data/supabase-import-part-*' --db-path /tmp/dev.db
+    python scripts/load-supabase-dump.py --race "IAU 24H World Championships 2025" --race-date 2025-10-17
+
+This script:
+1. Streams the split dump parts (data/supabase-import-part-aa, -ab, ...) in
+   order as one byte stream; a statement, a quoted string or even a UTF-8
+   character may continue in the next part
+2. Cuts the stream into statements and tokenizes each INSERT's VALUES tuples
+   (quoted strings with '' escapes, numbers, NULL, TRUE/FALSE -> 1/0);
+   setval() and comments are skipped, since AUTOINCREMENT tracks ids itself
+3. Groups rows by table and inserts them with executemany in one transaction
+   (duplicate keys are ignored, like the dump's ON CONFLICT DO NOTHING)
+   into a fresh database that has the tables but no indexes or triggers yet
+4. Files the dump's single championship under one race (--race/--race-date,
+   default the 2025 championship): runners and teams get its race_id, and
+   performances, which the dump keys by runner, move to the athlete's DUV id
+   (one copy per athlete, as lib/db/sqlite_db.migrate_races does)
+5. Creates the indexes and triggers from lib/db/schema.sql afterwards, then
+   moves the new database into place (an existing one is kept unless --force)
+
+The dump has no runner_pbs or parsed performance columns; run
+fetch-performances.py --backfill-parsed afterwards to fill both.
+"""
+
+import sys
+import os
+import re
+import glob
+import time
+import codecs
+import sqlite3
+import argparse
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'lib', 'db'))
+from sqlite_db import create_tables, ensure_schema, resolve_db_path
+from races import DEFAULT_RACE_DATE, DEFAULT_RACE_NAME, create_race
+
+DEFAULT_PARTS = 'data/supabase-import-part-*'
+READ_BYTES = 1 << 20
+BATCH_ROWS = 10000
+
+# Characters that matter when looking for the ';' ending a statement
+SPECIAL = re.compile(r"[;']|--")
+INSERT = re.compile(r"INSERT\s+INTO\s+(\w+)\s*\(([^)]*)\)\s*VALUES\s*", re.I)
+# One VALUES token per match; exactly one group is non-empty (strings keep their
+# quotes so '' stays distinguishable from a missing group)
+TOKEN = re.compile(r"""
+    \s*(?:
+        (?P<str>'[^']*(?:''[^']*)*')
+      | (?P<num>[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)
+      | (?P<word>[A-Za-z_]\w*)
+      | ::\s*\w+(?:\s*\(\s*\d+(?:\s*,\s*\d+)?\s*\))?
+      | (?P<punct>[(),])
+      | (?P<other>\S)
+    )""", re.X)
+WORDS = {'NULL': None, 'TRUE': 1, 'FALSE': 0}
+# The dump's performances are keyed by runner; they are staged here and moved to duv_id
+DUMP_PERFORMANCES = 'dump_performances'
+
+
+def iter_text(paths: Iterable[str]) -> Iterator[str]:
+    """Decode the parts as one continuous UTF-8 stream"""
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    for path in paths:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(READ_BYTES), b''):
+                yield decoder.decode(block)
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+
+def split_statements(buffer: str) -> Tuple[List[str], str]:
+    """Complete statements (without the ';') in buffer, and the unfinished rest"""
+    statements = []
+    start = pos = 0
+    while True:
+        match = SPECIAL.search(buffer, pos)
+        if match is None:
+            break
+        token = match.group()
+        if token == ';':
+            statements.append(buffer[start:match.start()])
+            start = pos = match.end()
+            continue
+        # Skip a quoted string ('' is just two strings back to back) or a comment line
+        end = buffer.find("'" if token == "'" else '\n', match.end())
+        if end < 0:
+            break
+        pos = end + 1
+    return statements, buffer[start:]
+
+
+def iter_statements(blocks: Iterable[str]) -> Iterator[str]:
+    """Split the stream into statements; one may span blocks (and dump parts)"""
+    rest = ''
+    for block in blocks:
+        statements, rest = split_statements(rest + block)
+        yield from statements
+    if strip_comments(rest):
+        raise ValueError(f"Dump ends inside a statement: {rest.strip()[:80]!r}")
+
+
+def strip_comments(statement: str) -> str:
+    return '\n'.join(line for line in statement.splitlines() if not line.lstrip().startswith('--')).strip()
+
+
+def parse_values(text: str, start: int) -> List[Tuple[Any, ...]]:
+    """Tokenize the VALUES (...), (...) list starting at text[start:]"""
+    rows = []
+    row: Optional[List[Any]] = None
+    for string, number, word, punct, other in TOKEN.findall(text, start):
+        if string:
+            if row is None:
+                break
+            row.append(string[1:-1].replace("''", "'"))
+        elif number:
+            if row is None:
+                break
+            row.append(int(number) if number.isdigit() or number[1:].isdigit() else float(number))
+        elif punct:
+            if punct == ',':
+                continue
+            if punct == '(' and row is None:
+                row = []
+            elif punct == ')' and row is not None:
+                rows.append(tuple(row))
+                row = None
+            else:
+                raise ValueError(f"Unexpected '{punct}' in VALUES: {text[start:start + 80]!r}")
+        elif word:
+            if row is None:
+                break  # ON CONFLICT / RETURNING after the last tuple
+            value = WORDS.get(word.upper(), WORDS)
+            if value is WORDS:
+                raise ValueError(f"Unsupported value {word!r} in VALUES")
+            row.append(value)
+        elif other:
+            raise ValueError(f"Unexpected {other!r} in VALUES: {text[start:start + 80]!r}")
+        # else: a '::type' cast, which keeps the literal as is
+    if row is not None or not rows:
+        raise ValueError(f"Incomplete VALUES list: {text[start:start + 80]!r}")
+    return rows
+
+
+def move_performances(conn: sqlite3.Connection) -> int:
+    """
+    Insert the staged runner-keyed performances under their athlete's duv_id.
+
+    When two runners were matched to the same athlete the history of the
+    higher runner id is kept; history of runners without a duv_id is dropped.
+    """
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(performances)") if row[1] != 'duv_id']
+    return conn.execute(f"""
+        INSERT OR IGNORE INTO performances ({', '.join(columns)}, duv_id)
+        SELECT {', '.join('d.' + c for c in columns)}, owner.duv_id
+        FROM {DUMP_PERFORMANCES} d
+        JOIN (
+            SELECT duv_id, MAX(id) AS runner_id
+            FROM runners
+            WHERE duv_id IS NOT NULL AND id IN (SELECT runner_id FROM {DUMP_PERFORMANCES})
+            GROUP BY duv_id
+        ) owner ON owner.runner_id = d.runner_id
+    """).rowcount
+
+
+def load_dump(paths: List[str], db_path: str, race_name: str = DEFAULT_RACE_NAME,
+              race_date: str = DEFAULT_RACE_DATE) -> Dict[str, int]:
+    """Load the dump into a new database file at db_path as one race; returns rows per table"""
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    # A failed build is thrown away, so skip the journal and fsyncs entirely
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA cache_size = -64000")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    try:
+        create_tables(conn)
+        conn.execute(f"CREATE TEMP TABLE {DUMP_PERFORMANCES} AS SELECT * FROM performances WHERE 0")
+        conn.execute(f"ALTER TABLE {DUMP_PERFORMANCES} ADD COLUMN runner_id INTEGER")
+        table_columns = {
+            name: {row[1] for row in conn.execute(f"PRAGMA table_info({name})")}
+            for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+        }
+        table_columns[DUMP_PERFORMANCES] = {row[1] for row in conn.execute(f"PRAGMA table_info({DUMP_PERFORMANCES})")}
+
+        counts: Dict[str, int] = defaultdict(int)
+        pending: Dict[Tuple[str, Tuple[str, ...]], List[Tuple[Any, ...]]] = defaultdict(list)
+        skipped: Dict[str, int] = defaultdict(int)
+
+        def flush(key):
+            table, columns = key
+            rows = pending.pop(key)
+            # Dumps of tables without updated_at: start it at created_at, as the column migration does
+            if 'updated_at' in table_columns[table] and 'updated_at' not in columns and 'created_at' in columns:
+                at = columns.index('created_at')
+                columns = columns + ('updated_at',)
+                rows = [row + (row[at],) for row in rows]
+            # The dump predates races: its runners and teams all belong to the race being loaded
+            if 'race_id' in table_columns[table] and 'race_id' not in columns:
+                columns = columns + ('race_id',)
+                rows = [row + (race['id'],) for row in rows]
+            conn.executemany(
+                f"INSERT OR IGNORE INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                rows,
+            )
+            counts[table] += len(rows)
+
+        conn.execute("BEGIN")
+        race = create_race(conn, race_name, race_date)
+        for statement in iter_statements(iter_text(paths)):
+            statement = strip_comments(statement)
+            if not statement:
+                continue
+            match = INSERT.match(statement)
+            if match is None:
+                skipped[statement.split(None, 1)[0].upper()] += 1
+                continue
+            table = match.group(1)
+            if table not in table_columns:
+                skipped[f"INSERT INTO {table}"] += 1
+                continue
+            columns = tuple(c.strip() for c in match.group(2).split(','))
+            if table == 'performances' and 'runner_id' in columns:
+                table = DUMP_PERFORMANCES
+            unknown = [c for c in columns if c not in table_columns[table]]
+            if unknown:
+                raise ValueError(f"{table} has no column(s) {', '.join(unknown)}")
+            key = (table, columns)
+            pending[key].extend(parse_values(statement, match.end()))
+            if len(pending[key]) >= BATCH_ROWS:
+                flush(key)
+        for key in list(pending):
+            flush(key)
+        if counts.pop(DUMP_PERFORMANCES, 0):
+            counts['performances'] += move_performances(conn)
+        conn.execute(f"DROP TABLE {DUMP_PERFORMANCES}")
+        conn.execute("COMMIT")
+
+        for what, count in sorted(skipped.items()):
+            print(f"  Skipped {count} {what} statement(s)", file=sys.stderr)
+
+        started = time.monotonic()
+        ensure_schema(conn)
+        print(f"  Indexes and triggers created in {time.monotonic() - started:.2f}s", file=sys.stderr)
+        return dict(counts)
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build a local SQLite database from the split Supabase SQL dump')
+    parser.add_argument('--db-path', default='data/iau24hwc.db', help='Path to SQLite database to create')
+    parser.add_argument('--parts', default=DEFAULT_PARTS, help=f'Glob of dump parts, loaded in name order (default: {DEFAULT_PARTS})')
+    parser.add_argument('--race', default=DEFAULT_RACE_NAME, help=f'Name of the race the dump holds (default: {DEFAULT_RACE_NAME})')
+    parser.add_argument('--race-date', default=DEFAULT_RACE_DATE, help=f'Its race date, YYYY-MM-DD (default: {DEFAULT_RACE_DATE})')
+    parser.add_argument('--force', action='store_true', help='Replace an existing database')
+
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(resolve_db_path(args.parts)))
+    if not paths:
+        print(f"ERROR: No dump parts match {args.parts}", file=sys.stderr)
+        sys.exit(1)
+
+    db_path = resolve_db_path(args.db_path)
+    if os.path.exists(db_path) and not args.force:
+        print(f"ERROR: {db_path} already exists; use --force to replace it", file=sys.stderr)
+        sys.exit(1)
+
+    directory = os.path.dirname(db_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    build_path = db_path + '.loading'
+    if os.path.exists(build_path):
+        os.remove(build_path)
+
+    print(f"Loading {len(paths)} dump part(s) into {db_path}...", file=sys.stderr)
+    started = time.monotonic()
+    try:
+        counts = load_dump(paths, build_path, args.race, args.race_date)
+    except (ValueError, sqlite3.Error) as e:
+        if os.path.exists(build_path):
+            os.remove(build_path)
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    for suffix in ('-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)  # Belong to the database being replaced
+    os.replace(build_path, db_path)
+
+    for table, count in counts.items():
+        print(f"  {table}: {count} rows", file=sys.stderr)
+    print(f"✓ Built {db_path} in {time.monotonic() - started:.2f}s", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -3,43 +3,60 @@
 CLI Tool: Manual matching for unmatched runners
 
 Usage:
-    # List all unmatched runners
+    # List all unmatched runners of the latest race (or --race <id|name>)
     python scripts/manual-match.py --list
 
     # Manually match a runner by ID
     python scripts/manual-match.py --runner-id 123 --duv-id 456789
 
-    # Interactive manual matching
+    # Interactive manual matching (top 5 candidates per runner are preloaded;
+    # decisions are saved every --batch-size picks and when the session ends)
     python scripts/manual-match.py --interactive
 """
 
 import sys
 import os
-import sqlite3
 import argparse
-from typing import Optional
+from typing import Dict, List, NamedTuple, Optional, Tuple
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'lib', 'db'))
+from sqlite_db import get_connection, resolve_db_path
+from races import resolve_race
 
-def list_unmatched(db_path: str, status: str = 'unmatched'):
-    """List all runners with given match status"""
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
+CANDIDATES_SHOWN = 5
+DEFAULT_BATCH_SIZE = 20  # Queued decisions per commit in interactive mode
+
+
+class Candidate(NamedTuple):
+    duv_person_id: int
+    firstname: str
+    lastname: str
+    year_of_birth: Optional[int]
+    nation: Optional[str]
+    sex: Optional[str]
+    confidence: float
+
+
+def list_unmatched(db_path: str, status: str = 'unmatched', race: Optional[str] = None):
+    """List all runners of a race with given match status"""
+    conn = get_connection(db_path)
     cursor = conn.cursor()
+    race = resolve_race(conn, race)
 
     cursor.execute("""
         SELECT * FROM runners
-        WHERE match_status = ?
+        WHERE race_id = ?
+        AND match_status = ?
         ORDER BY nationality, gender, entry_id
-    """, (status,))
+    """, (race['id'], status))
 
     runners = [dict(row) for row in cursor.fetchall()]
-    conn.close()
 
     if not runners:
-        print(f"No runners with status '{status}'", file=sys.stderr)
+        print(f"No runners with status '{status}' in {race['name']}", file=sys.stderr)
         return
 
-    print(f"\n{len(runners)} runners with status '{status}':\n")
+    print(f"\n{len(runners)} runners with status '{status}' in {race['name']}:\n")
     print(f"{'ID':>4} {'Entry':>6} {'First Name':20} {'Last Name':20} {'Nat':3} {'G':1}")
     print("=" * 80)
 
@@ -55,7 +72,7 @@ def list_unmatched(db_path: str, status: str = 'unmatched'):
 
 def manual_match(db_path: str, runner_id: int, duv_id: int, confidence: float = 1.0):
     """Manually match a runner to a DUV ID"""
-    conn = sqlite3.connect(db_path)
+    conn = get_connection(db_path)
     cursor = conn.cursor()
 
     # Check runner exists
@@ -64,7 +81,6 @@ def manual_match(db_path: str, runner_id: int, duv_id: int, confidence: float =
 
     if not runner:
         print(f"ERROR: Runner ID {runner_id} not found", file=sys.stderr)
-        conn.close()
         return False
 
     # Update runner
@@ -77,61 +93,92 @@ def manual_match(db_path: str, runner_id: int, duv_id: int, confidence: float =
     """, (duv_id, confidence, runner_id))
 
     conn.commit()
-    conn.close()
 
     print(f"✓ Runner {runner_id} manually matched to DUV ID {duv_id}")
     return True
 
 
-def interactive_match(db_path: str):
-    """Interactive matching for unmatched runners"""
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
+def load_candidates(conn, race_id: int, status: str = 'unmatched',
+                    limit: int = CANDIDATES_SHOWN) -> Dict[int, List[Candidate]]:
+    """Top candidates for every runner of the race with the given status, in one windowed query"""
+    rows = conn.execute("""
+        SELECT runner_id, duv_person_id, firstname, lastname, year_of_birth, nation, sex, confidence
+        FROM (
+            SELECT mc.*, ROW_NUMBER() OVER (
+                PARTITION BY mc.runner_id ORDER BY mc.confidence DESC, mc.id
+            ) AS rank
+            FROM match_candidates mc
+            JOIN runners r ON r.id = mc.runner_id
+            WHERE r.race_id = ? AND r.match_status = ?
+        )
+        WHERE rank <= ?
+        ORDER BY runner_id, rank
+    """, (race_id, status, limit))
+
+    candidates: Dict[int, List[Candidate]] = {}
+    for row in rows:
+        candidates.setdefault(row[0], []).append(Candidate(*row[1:]))
+    return candidates
+
+
+def save_matches(conn, decisions: List[Tuple[int, float, int]]):
+    """Write queued (duv_id, confidence, runner_id) decisions in one transaction"""
+    if not decisions:
+        return
+    conn.executemany("""
+        UPDATE runners
+        SET duv_id = ?,
+            match_status = 'manually-matched',
+            match_confidence = ?
+        WHERE id = ?
+    """, decisions)
+    conn.commit()
+    print(f"  Saved {len(decisions)} match(es)")
+    decisions.clear()
 
-    cursor.execute("""
-        SELECT * FROM runners
-        WHERE match_status = 'unmatched'
-        ORDER BY nationality, gender, entry_id
-    """)
 
-    runners = [dict(row) for row in cursor.fetchall()]
-    conn.close()
+def interactive_match(db_path: str, batch_size: int = DEFAULT_BATCH_SIZE, race: Optional[str] = None):
+    """Interactive matching for unmatched runners of a race"""
+    conn = get_connection(db_path)
+    race = resolve_race(conn, race)
+
+    runners = conn.execute("""
+        SELECT id, entry_id, firstname, lastname, nationality, gender FROM runners
+        WHERE race_id = ?
+        AND match_status = 'unmatched'
+        ORDER BY nationality, gender, entry_id
+    """, (race['id'],)).fetchall()
 
     if not runners:
-        print("No unmatched runners found.", file=sys.stderr)
+        print(f"No unmatched runners found in {race['name']}.", file=sys.stderr)
         return
 
-    print(f"\nInteractive Manual Matching - {len(runners)} unmatched runners")
-    print("Commands: [d]uv-id <ID>, [s]kip, [q]uit\n")
-
-    for i, r in enumerate(runners, 1):
-        print(f"\n[{i}/{len(runners)}] ID:{r['id']} Entry:{r['entry_id']}")
-        print(f"  Name: {r['firstname']} {r['lastname']}")
-        print(f"  Nationality: {r['nationality']} | Gender: {r['gender']}")
-
-        # Show candidates if any
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT * FROM match_candidates
-            WHERE runner_id = ?
-            ORDER BY confidence DESC
-            LIMIT 5
-        """, (r['id'],))
-        candidates = [dict(row) for row in cursor.fetchall()]
-        conn.close()
-
-        if candidates:
-            print(f"\n  Suggested candidates:")
-            for j, c in enumerate(candidates, 1):
-                yob = f"YOB:{c['year_of_birth']}" if c['year_of_birth'] else "YOB:N/A"
-                print(f"    {j}. DUV ID {c['duv_person_id']}: {c['firstname']} {c['lastname']} "
-                      f"({c['nation']}, {c['sex']}) {yob} - Conf:{c['confidence']:.2f}")
-
-        try:
-            cmd = input("\nCommand [d <duv_id> / s / q]: ").strip().lower()
+    candidates_by_runner = load_candidates(conn, race['id'])
+    decisions: List[Tuple[int, float, int]] = []  # Saved every batch_size decisions and on exit
+
+    print(f"\nInteractive Manual Matching - {len(runners)} unmatched runners in {race['name']}")
+    print("Commands: [d]uv-id <ID>, <n> pick candidate, [s]kip, [q]uit\n")
+
+    try:
+        for i, r in enumerate(runners, 1):
+            print(f"\n[{i}/{len(runners)}] ID:{r['id']} Entry:{r['entry_id']}")
+            print(f"  Name: {r['firstname']} {r['lastname']}")
+            print(f"  Nationality: {r['nationality']} | Gender: {r['gender']}")
+
+            # Show candidates if any
+            candidates = candidates_by_runner.get(r['id'], [])
+            if candidates:
+                print(f"\n  Suggested candidates:")
+                for j, c in enumerate(candidates, 1):
+                    yob = f"YOB:{c.year_of_birth}" if c.year_of_birth else "YOB:N/A"
+                    print(f"    {j}. DUV ID {c.duv_person_id}: {c.firstname} {c.lastname} "
+                          f"({c.nation}, {c.sex}) {yob} - Conf:{c.confidence:.2f}")
+
+            try:
+                cmd = input("\nCommand [d <duv_id> / <n> / s / q]: ").strip().lower()
+            except (EOFError, KeyboardInterrupt):
+                print("\nExiting...")
+                break
 
             if cmd == 'q':
                 break
@@ -139,24 +186,27 @@ def interactive_match(db_path: str):
                 continue
             elif cmd.startswith('d '):
                 try:
-                    duv_id = int(cmd.split()[1])
-                    manual_match(db_path, r['id'], duv_id, 1.0)
+                    decisions.append((int(cmd.split()[1]), 1.0, r['id']))
                 except (ValueError, IndexError):
                     print("Invalid DUV ID. Use: d <number>")
+                    continue
             elif cmd.isdigit() and candidates:
                 # User selected candidate number
                 choice = int(cmd)
-                if 1 <= choice <= len(candidates):
-                    selected = candidates[choice - 1]
-                    manual_match(db_path, r['id'], selected['duv_person_id'], selected['confidence'])
-                else:
+                if not 1 <= choice <= len(candidates):
                     print(f"Invalid choice. Enter 1-{len(candidates)}")
+                    continue
+                selected = candidates[choice - 1]
+                decisions.append((selected.duv_person_id, selected.confidence, r['id']))
             else:
-                print("Unknown command. Use: d <duv_id>, s, or q")
+                print("Unknown command. Use: d <duv_id>, <n>, s, or q")
+                continue
 
-        except (EOFError, KeyboardInterrupt):
-            print("\nExiting...")
-            break
+            print(f"✓ Runner {r['id']} → DUV ID {decisions[-1][0]} (queued)")
+            if len(decisions) >= batch_size:
+                save_matches(conn, decisions)
+    finally:
+        save_matches(conn, decisions)
 
     print("\nDone!")
 
@@ -164,31 +214,35 @@ def interactive_match(db_path: str):
 def main():
     parser = argparse.ArgumentParser(description='Manual matching for unmatched runners')
     parser.add_argument('--db-path', default='data/iau24hwc.db', help='Path to SQLite database')
+    parser.add_argument('--race', help='Race id or name for --list / --interactive (default: the latest race)')
     parser.add_argument('--list', action='store_true', help='List unmatched runners')
     parser.add_argument('--status', default='unmatched', help='Filter by status (unmatched, no-match, etc.)')
     parser.add_argument('--runner-id', type=int, help='Runner ID to match')
     parser.add_argument('--duv-id', type=int, help='DUV Person ID to match to')
     parser.add_argument('--interactive', '-i', action='store_true', help='Interactive matching mode')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Interactive decisions saved per commit')
 
     args = parser.parse_args()
 
-    db_path = args.db_path
-    if not os.path.isabs(db_path):
-        db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), db_path)
+    db_path = resolve_db_path(args.db_path)
 
     if not os.path.exists(db_path):
         print(f"ERROR: Database not found: {db_path}", file=sys.stderr)
         sys.exit(1)
 
-    if args.interactive:
-        interactive_match(db_path)
-    elif args.list:
-        list_unmatched(db_path, args.status)
-    elif args.runner_id and args.duv_id:
-        manual_match(db_path, args.runner_id, args.duv_id)
-    else:
-        # Default: list unmatched
-        list_unmatched(db_path, args.status)
+    try:
+        if args.interactive:
+            interactive_match(db_path, max(1, args.batch_size), args.race)
+        elif args.list:
+            list_unmatched(db_path, args.status, args.race)
+        elif args.runner_id and args.duv_id:
+            manual_match(db_path, args.runner_id, args.duv_id)
+        else:
+            # Default: list unmatched
+            list_unmatched(db_path, args.status, args.race)
+    except ValueError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
 
 
 if __name__ == '__main__':
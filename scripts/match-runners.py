@@ -3,11 +3,12 @@
 CLI Tool: Auto-match runners to DUV profiles
 
 Usage:
-    python scripts/match-runners.py [--db-path data/iau24hwc.db]
+    python scripts/match-runners.py [--db-path data/iau24hwc.db] [--race <id|name>]
 
 This script:
-1. Loads unmatched runners from SQLite
-2. Searches DUV API for each runner
+1. Loads unmatched runners of one race (--race, default the latest) from SQLite
+2. Reuses the DUV match of the same athlete (name, nationality, gender) in
+   another race; searches DUV API for the rest
 3. Auto-matches with confidence >= 0.8
 4. Saves candidates for manual review
 5. Updates database with match results
@@ -15,13 +16,15 @@ This script:
 
 import sys
 import os
-import sqlite3
 import argparse
-import requests
 import time
 from typing import List, Dict, Any, Optional
 from urllib.parse import urlencode
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'lib', 'db'))
+from sqlite_db import get_connection, resolve_db_path
+from races import resolve_race
+
 DUV_API_BASE = "https://statistik.d-u-v.org/json"
 RATE_LIMIT_DELAY = 1.0  # 1 second between requests
 
@@ -80,6 +83,7 @@ def normalize_nationality(nat: str) -> str:
 
 def search_duv(lastname: str, firstname: str, gender: str, nationality: str = None) -> List[Dict[str, Any]]:
     """Search DUV API for runner with multiple strategies"""
+    import requests  # Imported here so --help and reused matches start without it
     all_results = []
     url = f"{DUV_API_BASE}/msearchrunner.php"
 
@@ -382,34 +386,74 @@ def interactive_select(runner: Dict[str, Any], candidates: List[Dict[str, Any]])
             return None
 
 
-def match_runners(db_path: str, auto_match_threshold: float = 0.95, interactive: bool = False):
+def previous_match(cursor, runner: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """The latest DUV match of the same athlete (name, nationality, gender) in another race"""
+    cursor.execute("""
+        SELECT r.duv_id, r.match_status, r.match_confidence, ra.name AS race_name
+        FROM runners r
+        JOIN races ra ON ra.id = r.race_id
+        WHERE r.race_id IN (SELECT id FROM races WHERE id != ?)  -- IN, not !=: uses idx_runners_race_nationality_gender_pb
+        AND r.match_status IN ('auto-matched', 'manually-matched')
+        AND r.duv_id IS NOT NULL
+        AND r.lastname = ? COLLATE NOCASE
+        AND r.firstname = ? COLLATE NOCASE
+        AND r.nationality = ?
+        AND r.gender = ?
+        ORDER BY ra.race_date DESC
+        LIMIT 1
+    """, (runner['race_id'], runner['lastname'], runner['firstname'], runner['nationality'], runner['gender']))
+    row = cursor.fetchone()
+    return dict(row) if row else None
+
+
+def match_runners(db_path: str, auto_match_threshold: float = 0.95, interactive: bool = False,
+                  race: Optional[str] = None):
     """Main matching logic"""
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
+    conn = get_connection(db_path)
     cursor = conn.cursor()
+    race = resolve_race(conn, race)
 
     # Get unmatched runners
     cursor.execute("""
         SELECT * FROM runners
-        WHERE match_status = 'unmatched'
+        WHERE race_id = ?
+        AND match_status = 'unmatched'
         ORDER BY entry_id
-    """)
+    """, (race['id'],))
 
     runners = [dict(row) for row in cursor.fetchall()]
 
     if not runners:
-        print("No unmatched runners found.", file=sys.stderr)
+        print(f"No unmatched runners found in {race['name']}.", file=sys.stderr)
         return
 
-    print(f"\nMatching {len(runners)} runners...\n", file=sys.stderr)
+    print(f"\nMatching {len(runners)} runners of {race['name']}...\n", file=sys.stderr)
 
     matched_count = 0
+    reused_count = 0
     no_match_count = 0
     manual_review_count = 0
 
     for i, runner in enumerate(runners, 1):
+        # Commit the previous runner before the DUV request so fetch/view can write meanwhile
+        conn.commit()
         print(f"[{i}/{len(runners)}] firstname=\"{runner['firstname']}\" lastname=\"{runner['lastname']}\" ({runner['nationality']}, {runner['gender']})", file=sys.stderr)
 
+        # Same athlete matched in another race: reuse it without a DUV search
+        previous = previous_match(cursor, runner)
+        if previous:
+            cursor.execute("""
+                UPDATE runners
+                SET duv_id = ?,
+                    match_status = ?,
+                    match_confidence = ?
+                WHERE id = ?
+            """, (previous['duv_id'], previous['match_status'], previous['match_confidence'], runner['id']))
+            print(f"  ✓ Reused DUV ID {previous['duv_id']} from {previous['race_name']}", file=sys.stderr)
+            matched_count += 1
+            reused_count += 1
+            continue
+
         # Search DUV with nationality filtering
         candidates = search_duv(
             runner['lastname'],
@@ -489,14 +533,14 @@ def match_runners(db_path: str, auto_match_threshold: float = 0.95, interactive:
             print(f"  ✓ AUTO-MATCHED to DUV ID {best['PersonID']} ({best['FirstName']} {best['LastName']})", file=sys.stderr)
             matched_count += 1
         elif interactive and len(scored_candidates) > 0:
-            # Interactive selection
+            # Interactive selection (don't hold the write lock while waiting for input)
+            conn.commit()
             selected_idx = interactive_select(runner, scored_candidates[:10])
 
             if selected_idx is None:
                 # User quit interactive mode
                 print(f"\n  ⚠ Exiting interactive mode. Remaining runners marked for manual review.", file=sys.stderr)
                 conn.commit()
-                conn.close()
                 return
             elif selected_idx == -1:
                 # User wants to edit names
@@ -585,11 +629,10 @@ def match_runners(db_path: str, auto_match_threshold: float = 0.95, interactive:
             manual_review_count += 1
 
     conn.commit()
-    conn.close()
 
     print(f"\n{'='*60}", file=sys.stderr)
     print(f"MATCHING SUMMARY:", file=sys.stderr)
-    print(f"  Auto-matched: {matched_count}", file=sys.stderr)
+    print(f"  Auto-matched: {matched_count} ({reused_count} reused from other races)", file=sys.stderr)
     print(f"  Manual review: {manual_review_count}", file=sys.stderr)
     print(f"  No match: {no_match_count}", file=sys.stderr)
     print(f"  Total: {len(runners)}", file=sys.stderr)
@@ -600,20 +643,23 @@ def main():
     parser = argparse.ArgumentParser(description='Auto-match runners to DUV profiles')
     parser.add_argument('--db-path', default='data/iau24hwc.db', help='Path to SQLite database')
     parser.add_argument('--threshold', type=float, default=0.95, help='Auto-match confidence threshold (0.0-1.0, default 0.95 for safety)')
+    parser.add_argument('--race', help='Race id or name to match (default: the latest race)')
     parser.add_argument('--interactive', '-i', action='store_true', help='Interactive mode for manual selection')
 
     args = parser.parse_args()
 
-    db_path = args.db_path
-    if not os.path.isabs(db_path):
-        db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), db_path)
+    db_path = resolve_db_path(args.db_path)
 
     if not os.path.exists(db_path):
         print(f"ERROR: Database not found: {db_path}", file=sys.stderr)
         print(f"Run parse-pdf-backend.py first to create the database.", file=sys.stderr)
         sys.exit(1)
 
-    match_runners(db_path, args.threshold, args.interactive)
+    try:
+        match_runners(db_path, args.threshold, args.interactive, args.race)
+    except ValueError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
 
 
 if __name__ == '__main__':
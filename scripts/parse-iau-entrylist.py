@@ -1,26 +1,27 @@
 #!/usr/bin/env python3
-import sys, os, re, sqlite3, argparse
-from typing import List, Dict, Any
-
-try:
-    from docling.document_converter import DocumentConverter
-except ImportError:
-    print("ERROR: Docling not installed", file=sys.stderr)
-    print("Install with: pip install docling", file=sys.stderr)
-    sys.exit(1)
-
-def parse_pdf_iau_format(pdf_path: str) -> List[Dict[str, Any]]:
+import sys, os, re, argparse
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+
+# Docling is imported lazily by docling_convert (skipped entirely on a cache hit)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'lib', 'pdf'))
+from docling_convert import add_profile_arg, convert_pdf, count_pages, get_converter, require_docling, resolve_profile
+from entry_list import parse_section_header, parse_table_row
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'lib', 'db'))
+from runner_import import add_import_args, save_runners
+from sqlite_db import resolve_db_path
+
+def parse_pdf_iau_format(pdf_path: str, use_cache: bool = True, profile: str = 'auto') -> List[Dict[str, Any]]:
     """Parse PDF using Docling for table extraction"""
     print("Converting PDF with Docling...", file=sys.stderr)
 
-    converter = DocumentConverter()
-    result = converter.convert(pdf_path)
+    result = convert_pdf(pdf_path, use_cache=use_cache, profile=profile)
 
     runners = []
     entry_id = 1
 
     # Get all text to find country/gender headers
-    full_text = result.document.export_to_markdown()
+    full_text = result.markdown
 
     # Extract country/gender for each table by finding headers in the markdown text
     # Build a mapping of text position to country/gender
@@ -86,69 +87,122 @@ def parse_pdf_iau_format(pdf_path: str) -> List[Dict[str, Any]]:
 
         # Process table rows - handle both 3-column and 4-column formats
         # Format 1: [Number, Surname, Firstname] (most common)
-        # Format 2: [Number, Surname_Part1, Surname_Part2, Firstname] (compound surnames)
-        # Format 3: [Number, Surname, Firstname_Part1, Firstname_Part2] (compound firstnames)
-        for row_idx, row in enumerate(table_grid):
-            if not row:
+        # Format 2: [Number, Surname, Firstname_Part1, Firstname_Part2] (compound firstnames)
+        for row in table_grid:
+            parsed = parse_table_row(row)
+            if not parsed:
                 continue
 
-            try:
-                # Handle different column counts
-                if len(row) == 3:
-                    # Standard 3-column: [Number, Surname, Firstname]
-                    num = str(row[0]).strip() if row[0] and str(row[0]) != 'nan' else ""
-                    lastname = str(row[1]).strip().title() if row[1] and str(row[1]) != 'nan' else ""
-                    firstname = str(row[2]).strip().title() if row[2] and str(row[2]) != 'nan' else ""
-                elif len(row) == 4:
-                    # 4-column format - need to determine which is compound
-                    # Check if row[1] and row[2] together look like a surname, or if row[2] and row[3] are firstname
-                    num = str(row[0]).strip() if row[0] and str(row[0]) != 'nan' else ""
-
-                    # Try both interpretations:
-                    # Option A: [Number, Surname, Firstname_Part1, Firstname_Part2]
-                    # Option B: [Number, Surname_Part1, Surname_Part2, Firstname]
-
-                    # Heuristic: if row[1] is capitalized and row[2] is also capitalized, likely compound surname
-                    # Otherwise, row[2]+row[3] is compound firstname
-                    val1 = str(row[1]).strip() if row[1] and str(row[1]) != 'nan' else ""
-                    val2 = str(row[2]).strip() if row[2] and str(row[2]) != 'nan' else ""
-                    val3 = str(row[3]).strip() if row[3] and str(row[3]) != 'nan' else ""
-
-                    # For now, assume: [Number, Surname, Firstname1, Firstname2]
-                    # This matches "Eriksen | Bouchra | Lundgren" pattern
-                    lastname = val1.title()
-                    firstname = f"{val2} {val3}".strip().title()
-                elif len(row) > 4:
-                    # More than 4 columns - concatenate middle columns as surname
-                    num = str(row[0]).strip() if row[0] and str(row[0]) != 'nan' else ""
-                    lastname = ' '.join(str(row[i]).strip() for i in range(1, len(row)-1) if row[i] and str(row[i]) != 'nan').title()
-                    firstname = str(row[-1]).strip().title() if row[-1] and str(row[-1]) != 'nan' else ""
-                else:
-                    # Less than 3 columns, skip
-                    continue
-
-                # Skip if not a valid entry (number must be digit or 'R' for reserve)
-                if not (num.isdigit() or num == 'R'):
-                    continue
-
-                if len(lastname) >= 2 and len(firstname) >= 2:
-                    runners.append({
-                        'entry_id': str(entry_id),
-                        'firstname': firstname,
-                        'lastname': lastname,
-                        'nationality': current_country,
-                        'gender': current_gender
-                    })
-                    entry_id += 1
-                    if len(runners) <= 10:
-                        print(f"  -> {entry_id-1}. {firstname} {lastname} ({current_country}, {current_gender})", file=sys.stderr)
-            except (ValueError, IndexError, AttributeError) as e:
-                continue
+            _, lastname, firstname = parsed
+            runners.append({
+                'entry_id': str(entry_id),
+                'firstname': firstname,
+                'lastname': lastname,
+                'nationality': current_country,
+                'gender': current_gender
+            })
+            entry_id += 1
+            if len(runners) <= 10:
+                print(f"  -> {entry_id-1}. {firstname} {lastname} ({current_country}, {current_gender})", file=sys.stderr)
 
     # Fallback to text extraction if no tables found
     if not tables_found or len(runners) < 50:
         print("Table extraction failed or insufficient data, using text fallback...", file=sys.stderr)
-        runners = parse_from_text_fallback(result.document.export_to_markdown())
+        runners = parse_from_text_fallback(result.markdown)
+
+    return runners
+
+
+def _init_worker(profile: str):
+    """Pool initializer: load the Docling converter once per worker process"""
+    get_converter(profile)
+
+
+def parse_page_range(pdf_path: str, page_range: Tuple[int, int], use_cache: bool = True,
+                     profile: str = 'accurate') -> Dict[str, Any]:
+    """
+    Parse one page range in a pool worker.
+
+    Walks the document in reading order and returns table rows grouped into
+    segments by the section header in effect. The first segment has section None
+    when the range starts mid-section (its header is on an earlier page), and
+    'section' is the trailing header the next range continues from.
+    """
+    from docling_core.types.doc import TableItem
+
+    result = convert_pdf(pdf_path, page_range=page_range, use_cache=use_cache, profile=profile)
+
+    segments = [{'section': None, 'rows': []}]
+    for item, _level in result.document.iterate_items():
+        if isinstance(item, TableItem):
+            try:
+                table_grid = item.export_to_dataframe().values.tolist()
+            except Exception:
+                continue
+            for row in table_grid:
+                parsed = parse_table_row(row)
+                if parsed:
+                    segments[-1]['rows'].append(parsed)
+        else:
+            header = parse_section_header(getattr(item, 'text', '') or '')
+            if header and header != segments[-1]['section']:
+                segments.append({'section': header, 'rows': []})
+
+    return {
+        'page_range': page_range,
+        'segments': segments,
+        'section': segments[-1]['section'],
+        'markdown': result.markdown,
+    }
+
+
+def merge_page_ranges(chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Stitch page-range results in page order, carrying sections across range boundaries"""
+    runners = []
+    section = None
+
+    for chunk in chunks:
+        for segment in chunk['segments']:
+            section = segment['section'] or section
+            if section is None:
+                continue  # Rows before the first header in the document
+            for _, lastname, firstname in segment['rows']:
+                runners.append({
+                    'entry_id': str(len(runners) + 1),
+                    'firstname': firstname,
+                    'lastname': lastname,
+                    'nationality': section[0],
+                    'gender': section[1]
+                })
+
+    return runners
+
+
+def parse_pdf_parallel(pdf_path: str, workers: int, pages_per_chunk: Optional[int] = None,
+                       use_cache: bool = True, profile: str = 'auto') -> List[Dict[str, Any]]:
+    """Parse PDF page ranges in a process pool with one warm Docling converter per worker"""
+    total_pages = count_pages(pdf_path)
+    profile = resolve_profile(pdf_path, profile)  # once for the document, not per range
+    if not pages_per_chunk:
+        # ~4 chunks per worker keeps the pool balanced when pages differ in size
+        pages_per_chunk = max(1, -(-total_pages // (workers * 4)))
+
+    ranges = [(first, min(first + pages_per_chunk - 1, total_pages))
+              for first in range(1, total_pages + 1, pages_per_chunk)]
+    print(f"Converting {total_pages} pages in {len(ranges)} ranges with {workers} workers "
+          f"({profile} profile)...", file=sys.stderr)
+
+    # Checked here: a worker whose initializer fails only surfaces as BrokenProcessPool
+    require_docling()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(profile,)) as pool:
+        chunks = list(pool.map(parse_page_range, [pdf_path] * len(ranges), ranges,
+                               [use_cache] * len(ranges), [profile] * len(ranges)))
+
+    runners = merge_page_ranges(chunks)
+
+    if len(runners) < 50:
+        print("Table extraction failed or insufficient data, using text fallback...", file=sys.stderr)
+        runners = parse_from_text_fallback('\n'.join(chunk['markdown'] for chunk in chunks))
 
     return runners
 
@@ -247,33 +301,27 @@ def parse_from_text_fallback(markdown_text: str) -> List[Dict[str, Any]]:
     
     return runners
 
-def save_to_database(runners: List[Dict[str, Any]], db_path: str):
-    os.makedirs(os.path.dirname(db_path), exist_ok=True)
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    cursor.execute("DELETE FROM match_candidates")
-    cursor.execute("DELETE FROM performances")
-    cursor.execute("DELETE FROM teams")
-    cursor.execute("DELETE FROM runners")
-    
-    for runner in runners:
-        cursor.execute("""
-            INSERT INTO runners (entry_id, firstname, lastname, nationality, gender, match_status)
-            VALUES (?, ?, ?, ?, ?, 'unmatched')
-        """, (runner['entry_id'], runner['firstname'], runner['lastname'], runner['nationality'], runner['gender']))
-    
-    conn.commit()
-    conn.close()
-
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument('pdf_file')
     parser.add_argument('--db-path', default='data/iau24hwc.db')
+    add_import_args(parser)
     parser.add_argument('--preview', action='store_true')
+    parser.add_argument('--no-cache', action='store_true', help='Re-run Docling even if a cached conversion exists')
+    parser.add_argument('--workers', type=int, default=1, help='Parse page ranges in N worker processes')
+    parser.add_argument('--pages-per-chunk', type=int, help='Pages per worker task (default: ~4 tasks per worker)')
+    add_profile_arg(parser)
     args = parser.parse_args()
     
-    runners = parse_pdf_iau_format(args.pdf_file)
+    try:
+        if args.workers > 1:
+            runners = parse_pdf_parallel(args.pdf_file, args.workers, args.pages_per_chunk,
+                                         use_cache=not args.no_cache, profile=args.profile)
+        else:
+            runners = parse_pdf_iau_format(args.pdf_file, use_cache=not args.no_cache, profile=args.profile)
+    except RuntimeError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
     
     if args.preview:
         for i, r in enumerate(runners[:30], 1):
@@ -284,8 +332,12 @@ def main():
         print(f"\nTotal: {len(runners)} runners")
         return
     
-    db_path = args.db_path if os.path.isabs(args.db_path) else os.path.join(os.path.dirname(os.path.dirname(__file__)), args.db_path)
-    save_to_database(runners, db_path)
+    db_path = resolve_db_path(args.db_path)
+    try:
+        save_runners(runners, db_path, incremental=args.incremental, race=args.race, race_date=args.race_date)
+    except ValueError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
     
     men = sum(1 for r in runners if r['gender']=='M')
     women = sum(1 for r in runners if r['gender']=='W')
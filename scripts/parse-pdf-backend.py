@@ -17,17 +17,16 @@ Requirements:
 import sys
 import os
 import json
-import sqlite3
 import argparse
 from pathlib import Path
 from typing import List, Dict, Any
 
-# Import Dockling (install: pip install docling)
-try:
-    from docling.document_converter import DocumentConverter
-except ImportError:
-    print("ERROR: Dockling not installed. Run: pip install docling", file=sys.stderr)
-    sys.exit(1)
+# Dockling is imported lazily by docling_convert (skipped entirely on a cache hit)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'lib', 'pdf'))
+from docling_convert import add_profile_arg, convert_pdf
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'lib', 'db'))
+from runner_import import add_import_args, save_runners
+from sqlite_db import resolve_db_path
 
 
 def normalize_name(name: str) -> str:
@@ -84,57 +83,59 @@ def normalize_gender(gender: str) -> str:
     return gender
 
 
-def parse_pdf(pdf_path: str) -> List[Dict[str, Any]]:
-    """Parse PDF entry list using Dockling"""
+def parse_pdf(pdf_path: str, use_cache: bool = True, converter=None, profile: str = 'auto') -> List[Dict[str, Any]]:
+    """Parse PDF entry list using Dockling (pass a loaded converter to skip model start-up)"""
     print(f"Parsing PDF: {pdf_path}", file=sys.stderr)
 
-    converter = DocumentConverter()
-    result = converter.convert(pdf_path)
+    result = convert_pdf(pdf_path, converter=converter, use_cache=use_cache, profile=profile)
 
     runners = []
     entry_id_counter = 1
 
     # Try to extract table data
-    if hasattr(result, 'pages'):
-        for page in result.pages:
-            if hasattr(page, 'tables'):
-                for table in page.tables:
-                    for row in table.rows:
-                        runner_data = {}
-
-                        for i, cell in enumerate(row.cells):
-                            col_name = table.headers[i] if i < len(table.headers) else ""
-                            col_lower = col_name.lower()
-                            val = str(cell.value).strip()
-
-                            if not val:
-                                continue
-
-                            # Map columns
-                            if 'first' in col_lower or 'given' in col_lower or 'vorname' in col_lower:
-                                runner_data['firstname'] = normalize_name(val)
-                            elif 'last' in col_lower or 'surname' in col_lower or 'name' in col_lower or 'nachname' in col_lower:
-                                runner_data['lastname'] = normalize_name(val)
-                            elif 'nat' in col_lower or 'country' in col_lower or 'nation' in col_lower:
-                                runner_data['nationality'] = normalize_nationality(val)
-                            elif 'gender' in col_lower or 'sex' in col_lower or 'geschlecht' in col_lower:
-                                runner_data['gender'] = normalize_gender(val)
-                            elif 'id' in col_lower or 'bib' in col_lower or 'number' in col_lower:
-                                runner_data['entry_id'] = str(val)
-
-                        # Validate required fields
-                        if runner_data.get('firstname') and runner_data.get('lastname'):
-                            if 'entry_id' not in runner_data:
-                                runner_data['entry_id'] = str(entry_id_counter)
-                                entry_id_counter += 1
-
-                            if 'gender' not in runner_data:
-                                runner_data['gender'] = 'M'  # Default
-
-                            if 'nationality' not in runner_data:
-                                runner_data['nationality'] = 'UNK'
-
-                            runners.append(runner_data)
+    if hasattr(result.document, 'tables'):
+        for table in result.document.tables:
+            try:
+                table_data = table.export_to_dataframe()
+            except Exception:
+                continue
+
+            headers = [str(col) for col in table_data.columns]
+            for row in table_data.itertuples(index=False):
+                runner_data = {}
+
+                for col_name, cell in zip(headers, row):
+                    col_lower = col_name.lower()
+                    val = str(cell).strip()
+
+                    if not val or val == 'nan':
+                        continue
+
+                    # Map columns
+                    if 'first' in col_lower or 'given' in col_lower or 'vorname' in col_lower:
+                        runner_data['firstname'] = normalize_name(val)
+                    elif 'last' in col_lower or 'surname' in col_lower or 'name' in col_lower or 'nachname' in col_lower:
+                        runner_data['lastname'] = normalize_name(val)
+                    elif 'nat' in col_lower or 'country' in col_lower or 'nation' in col_lower:
+                        runner_data['nationality'] = normalize_nationality(val)
+                    elif 'gender' in col_lower or 'sex' in col_lower or 'geschlecht' in col_lower:
+                        runner_data['gender'] = normalize_gender(val)
+                    elif 'id' in col_lower or 'bib' in col_lower or 'number' in col_lower:
+                        runner_data['entry_id'] = str(val)
+
+                # Validate required fields
+                if runner_data.get('firstname') and runner_data.get('lastname'):
+                    if 'entry_id' not in runner_data:
+                        runner_data['entry_id'] = str(entry_id_counter)
+                        entry_id_counter += 1
+
+                    if 'gender' not in runner_data:
+                        runner_data['gender'] = 'M'  # Default
+
+                    if 'nationality' not in runner_data:
+                        runner_data['nationality'] = 'UNK'
+
+                    runners.append(runner_data)
 
     # Fallback: regex-based text extraction if no tables found
     if not runners:
@@ -153,45 +154,14 @@ def parse_pdf(pdf_path: str) -> List[Dict[str, Any]]:
     return unique_runners
 
 
-def save_to_database(runners: List[Dict[str, Any]], db_path: str) -> None:
-    """Save parsed runners to SQLite database"""
-    print(f"Saving {len(runners)} runners to database: {db_path}", file=sys.stderr)
-
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-
-    # Clear existing runners (fresh import)
-    cursor.execute("DELETE FROM match_candidates")
-    cursor.execute("DELETE FROM performances")
-    cursor.execute("DELETE FROM teams")
-    cursor.execute("DELETE FROM runners")
-
-    # Insert runners
-    for runner in runners:
-        cursor.execute("""
-            INSERT INTO runners (
-                entry_id, firstname, lastname, nationality, gender,
-                match_status
-            ) VALUES (?, ?, ?, ?, ?, 'unmatched')
-        """, (
-            runner['entry_id'],
-            runner['firstname'],
-            runner['lastname'],
-            runner['nationality'],
-            runner['gender']
-        ))
-
-    conn.commit()
-    conn.close()
-
-    print(f"✓ Successfully saved {len(runners)} runners to database", file=sys.stderr)
-
-
 def main():
     parser = argparse.ArgumentParser(description='Parse IAU 24h WC entry list PDF to SQLite')
     parser.add_argument('pdf_file', help='Path to PDF entry list file')
     parser.add_argument('--db-path', default='data/iau24hwc.db', help='Path to SQLite database')
+    add_import_args(parser)
     parser.add_argument('--json', action='store_true', help='Output JSON to stdout')
+    parser.add_argument('--no-cache', action='store_true', help='Re-run Dockling even if a cached conversion exists')
+    add_profile_arg(parser)
 
     args = parser.parse_args()
 
@@ -200,19 +170,24 @@ def main():
         sys.exit(1)
 
     # Parse PDF
-    runners = parse_pdf(args.pdf_file)
+    try:
+        runners = parse_pdf(args.pdf_file, use_cache=not args.no_cache, profile=args.profile)
+    except RuntimeError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
 
     if not runners:
         print("ERROR: No runners found in PDF", file=sys.stderr)
         sys.exit(1)
 
     # Save to database
-    db_path = args.db_path
-    if not os.path.isabs(db_path):
-        # Relative to project root
-        db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), db_path)
+    db_path = resolve_db_path(args.db_path)
 
-    save_to_database(runners, db_path)
+    try:
+        save_runners(runners, db_path, incremental=args.incremental, race=args.race, race_date=args.race_date)
+    except ValueError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
 
     # Output JSON if requested
     if args.json:
@@ -11,7 +11,6 @@ Uses PyPDF2 for text extraction with regex patterns.
 import sys
 import os
 import re
-import sqlite3
 import argparse
 from typing import List, Dict, Any
 
@@ -21,6 +20,10 @@ except ImportError:
     print("ERROR: PyPDF2 not installed. Run: pip install PyPDF2", file=sys.stderr)
     sys.exit(1)
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'lib', 'db'))
+from runner_import import add_import_args, save_runners
+from sqlite_db import resolve_db_path
+
 
 NATIONALITY_MAP = {
     'US': 'USA', 'USA': 'USA',
@@ -146,44 +149,11 @@ def normalize_nationality(nat: str) -> str:
     return NATIONALITY_MAP.get(nat, nat[:3] if len(nat) >= 3 else nat)
 
 
-def save_to_database(runners: List[Dict[str, Any]], db_path: str) -> None:
-    """Save parsed runners to SQLite database"""
-    print(f"Saving {len(runners)} runners to database: {db_path}", file=sys.stderr)
-
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-
-    # Clear existing runners
-    cursor.execute("DELETE FROM match_candidates")
-    cursor.execute("DELETE FROM performances")
-    cursor.execute("DELETE FROM teams")
-    cursor.execute("DELETE FROM runners")
-
-    # Insert runners
-    for runner in runners:
-        cursor.execute("""
-            INSERT INTO runners (
-                entry_id, firstname, lastname, nationality, gender,
-                match_status
-            ) VALUES (?, ?, ?, ?, ?, 'unmatched')
-        """, (
-            runner['entry_id'],
-            runner['firstname'],
-            runner['lastname'],
-            runner['nationality'],
-            runner['gender']
-        ))
-
-    conn.commit()
-    conn.close()
-
-    print(f"✓ Successfully saved {len(runners)} runners to database", file=sys.stderr)
-
-
 def main():
     parser = argparse.ArgumentParser(description='Parse IAU 24h WC entry list PDF (simple text extraction)')
     parser.add_argument('pdf_file', help='Path to PDF entry list file')
     parser.add_argument('--db-path', default='data/iau24hwc.db', help='Path to SQLite database')
+    add_import_args(parser)
     parser.add_argument('--preview', action='store_true', help='Preview extracted runners without saving')
 
     args = parser.parse_args()
@@ -211,11 +181,13 @@ def main():
         return
 
     # Save to database
-    db_path = args.db_path
-    if not os.path.isabs(db_path):
-        db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), db_path)
+    db_path = resolve_db_path(args.db_path)
 
-    save_to_database(runners, db_path)
+    try:
+        save_runners(runners, db_path, incremental=args.incremental, race=args.race, race_date=args.race_date)
+    except ValueError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
 
     # Print summary
     print(f"\n{'='*60}", file=sys.stderr)
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Tiered PDF Parser for IAU 24h Entry Lists
+
+Usage:
+    python scripts/parse-pdf-tiered.py <pdf_file> [--db-path <path>] [--preview] [--json]
+
+This script:
+1. Extracts layout text for every page with pdfplumber (fast path)
+2. Validates each page's yield (section header, row yield, column split)
+3. Escalates only the failing pages to Docling (cached, see lib/pdf/docling_convert.py)
+4. Merges pages in order and saves runners to SQLite
+
+Typical text-native entry lists never touch Docling and parse at pdfplumber speed.
+Use --force-docling to send every page through Docling for comparison.
+"""
+
+import sys
+import os
+import json
+import time
+import argparse
+from typing import List, Dict, Any, Optional, Tuple
+
+try:
+    import pdfplumber
+except ImportError:
+    print("ERROR: pdfplumber not installed", file=sys.stderr)
+    print("Install with: pip install pdfplumber", file=sys.stderr)
+    sys.exit(1)
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'lib', 'pdf'))
+from entry_list import (
+    SKIP_LINE_MARKERS, LAYOUT_ROW_RE,
+    parse_section_header, parse_layout_line, parse_table_row
+)
+from docling_convert import add_profile_arg, convert_pdf
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'lib', 'db'))
+from runner_import import add_import_args, save_runners
+from sqlite_db import resolve_db_path
+
+# Page validation thresholds for the pdfplumber tier
+MIN_ROW_YIELD = 0.9  # parsed rows / numbered lines
+MAX_GUESSED_SPLIT = 0.2  # rows without a column gap between surname and firstname
+
+
+def parse_layout_page(text: str, section: Optional[Tuple[str, str]]) -> Dict[str, Any]:
+    """
+    Parse one page of layout text, starting in the section carried from the previous page.
+
+    Returns rows as (number, lastname, firstname, country, gender) plus the stats
+    used by validate_page() and the section the page ends in.
+    """
+    rows = []
+    numbered = 0
+    guessed = 0
+    headers = 0
+
+    for line in text.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+
+        # Skip headers
+        if any(skip in line for skip in SKIP_LINE_MARKERS):
+            continue
+
+        header = parse_section_header(line)
+        if header and LAYOUT_ROW_RE.match(line) is None:
+            section = header
+            headers += 1
+            continue
+
+        if LAYOUT_ROW_RE.match(line):
+            numbered += 1
+            if section is None:
+                continue
+
+            parsed = parse_layout_line(line)
+            if parsed is None:
+                continue
+
+            number, lastname, firstname, split_by_columns = parsed
+            if len(lastname) >= 2 and len(firstname) >= 2:
+                rows.append((number, lastname, firstname, section[0], section[1]))
+                if not split_by_columns:
+                    guessed += 1
+
+    return {
+        'rows': rows,
+        'numbered': numbered,
+        'guessed': guessed,
+        'headers': headers,
+        'has_text': bool(text.strip()),
+        'section': section,
+    }
+
+
+def validate_page(page: Dict[str, Any]) -> Optional[str]:
+    """Return why a pdfplumber page result should be escalated to Docling, or None if it passes"""
+    if not page['has_text']:
+        return 'no text layer'
+
+    if page['numbered'] == 0:
+        return None  # Cover or notes page without entries
+
+    if page['section'] is None:
+        return 'no section header'
+
+    if len(page['rows']) < page['numbered'] * MIN_ROW_YIELD:
+        return f"low row yield ({len(page['rows'])}/{page['numbered']})"
+
+    if page['guessed'] > len(page['rows']) * MAX_GUESSED_SPLIT:
+        return f"no column split on {page['guessed']} rows"
+
+    return None
+
+
+def parse_docling_pages(pdf_path: str, page_range: Tuple[int, int],
+                        section: Optional[Tuple[str, str]], profile: str = 'auto') -> Dict[str, Any]:
+    """
+    Parse a 1-based inclusive page range with Docling, walking items in reading order.
+
+    Tables take the most recent section header; tables before any header in the
+    range continue the section carried in from the previous page.
+    """
+    from docling_core.types.doc import TableItem
+
+    result = convert_pdf(pdf_path, page_range=page_range, profile=profile)
+    rows = []
+
+    for item, _level in result.document.iterate_items():
+        if isinstance(item, TableItem):
+            if section is None:
+                continue
+            try:
+                table_grid = item.export_to_dataframe().values.tolist()
+            except Exception:
+                print(f"  Could not convert table to dataframe, skipping", file=sys.stderr)
+                continue
+            for row in table_grid:
+                parsed = parse_table_row(row)
+                if parsed:
+                    rows.append((*parsed, section[0], section[1]))
+        else:
+            header = parse_section_header(getattr(item, 'text', '') or '')
+            if header:
+                section = header
+
+    return {'rows': rows, 'section': section}
+
+
+def group_ranges(pages: List[int]) -> List[Tuple[int, int]]:
+    """Group sorted 0-based page indexes into 1-based inclusive ranges"""
+    ranges = []
+    for idx in pages:
+        if ranges and ranges[-1][1] == idx:
+            ranges[-1] = (ranges[-1][0], idx + 1)
+        else:
+            ranges.append((idx + 1, idx + 1))
+    return ranges
+
+
+def parse_pdf_tiered(pdf_path: str, force_docling: bool = False, profile: str = 'auto') -> List[Dict[str, Any]]:
+    """
+    Parse PDF with pdfplumber, escalating only failing pages to Docling.
+
+    With profile 'auto', ranges containing a page without a text layer use the
+    accurate (OCR) pipeline and all other escalated ranges use the fast one.
+    """
+    started = time.monotonic()
+
+    with pdfplumber.open(pdf_path) as pdf:
+        texts = [page.extract_text(layout=True) or '' for page in pdf.pages]
+
+    # Pass 1: cheap layout parse to find the pages that need Docling
+    failing = {}
+    section = None
+    for idx, text in enumerate(texts):
+        page = parse_layout_page(text, section)
+        reason = 'forced' if force_docling else validate_page(page)
+        if reason:
+            failing[idx] = reason
+        section = page['section']
+
+    fast_time = time.monotonic() - started
+    print(f"pdfplumber: {len(texts)} pages in {fast_time:.2f}s, "
+          f"{len(failing)} page(s) need Docling", file=sys.stderr)
+
+    # Pass 2: merge in page order with a live section, converting failing ranges
+    ranges = {start: (start, end) for start, end in group_ranges(sorted(failing))}
+    all_rows = []
+    section = None
+    idx = 0
+    while idx < len(texts):
+        if idx + 1 in ranges:
+            start, end = ranges[idx + 1]
+            reasons = sorted({failing[i] for i in range(start - 1, end)})
+            range_profile = profile
+            if profile == 'auto':
+                range_profile = 'accurate' if 'no text layer' in reasons else 'fast'
+            print(f"  Pages {start}-{end}: Docling {range_profile} ({', '.join(reasons)})", file=sys.stderr)
+            page = parse_docling_pages(pdf_path, (start, end), section, range_profile)
+            idx = end
+        else:
+            page = parse_layout_page(texts[idx], section)
+            idx += 1
+
+        all_rows.extend(page['rows'])
+        section = page['section']
+
+    runners = []
+    for entry_id, (_number, lastname, firstname, country, gender) in enumerate(all_rows, 1):
+        runners.append({
+            'entry_id': str(entry_id),
+            'firstname': firstname,
+            'lastname': lastname,
+            'nationality': country,
+            'gender': gender
+        })
+
+    print(f"Parsed {len(runners)} runners in {time.monotonic() - started:.2f}s", file=sys.stderr)
+    return runners
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Parse IAU entry list PDF (pdfplumber first, Docling for failing pages)')
+    parser.add_argument('pdf_file', help='Path to PDF file')
+    parser.add_argument('--db-path', default='data/iau24hwc.db', help='Path to database')
+    add_import_args(parser)
+    parser.add_argument('--preview', action='store_true', help='Preview first 30 entries without saving')
+    parser.add_argument('--json', action='store_true', help='Output JSON to stdout')
+    parser.add_argument('--force-docling', action='store_true', help='Send every page through Docling')
+    add_profile_arg(parser)
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.pdf_file):
+        print(f"ERROR: PDF file not found: {args.pdf_file}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        runners = parse_pdf_tiered(args.pdf_file, force_docling=args.force_docling, profile=args.profile)
+    except RuntimeError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.preview:
+        print(f"\nPreview of first 30 runners:\n")
+        for i, r in enumerate(runners[:30], 1):
+            print(f"{i:3d}. firstname=\"{r['firstname']:20s}\" lastname=\"{r['lastname']:20s}\" {r['nationality']:3s} {r['gender']}")
+        print(f"\nTotal: {len(runners)} runners")
+        return
+
+    if not runners:
+        print("ERROR: No runners found in PDF", file=sys.stderr)
+        sys.exit(1)
+
+    # Save to database
+    db_path = resolve_db_path(args.db_path)
+    try:
+        save_runners(runners, db_path, incremental=args.incremental, race=args.race, race_date=args.race_date)
+    except ValueError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps(runners, indent=2, ensure_ascii=False))
+
+    men = sum(1 for r in runners if r['gender'] == 'M')
+    women = sum(1 for r in runners if r['gender'] == 'W')
+    print(f"Saved {len(runners)} runners ({men} men, {women} women) to database", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
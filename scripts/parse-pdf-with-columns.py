@@ -9,7 +9,6 @@ and correctly extract surname/firstname from their respective columns.
 import sys
 import os
 import argparse
-import sqlite3
 from typing import List, Dict, Any
 
 try:
@@ -19,6 +18,10 @@ except ImportError:
     print("Install with: pip install pdfplumber", file=sys.stderr)
     sys.exit(1)
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'lib', 'db'))
+from runner_import import add_import_args, save_runners
+from sqlite_db import resolve_db_path
+
 
 def parse_pdf_with_columns(pdf_path: str) -> List[Dict[str, Any]]:
     """Parse PDF using pdfplumber for better column detection"""
@@ -93,33 +96,11 @@ def parse_pdf_with_columns(pdf_path: str) -> List[Dict[str, Any]]:
     return runners
 
 
-def save_to_database(runners: List[Dict[str, Any]], db_path: str):
-    """Save runners to database"""
-    os.makedirs(os.path.dirname(db_path), exist_ok=True)
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-
-    # Clear existing data
-    cursor.execute("DELETE FROM match_candidates")
-    cursor.execute("DELETE FROM performances")
-    cursor.execute("DELETE FROM teams")
-    cursor.execute("DELETE FROM runners")
-
-    # Insert runners
-    for runner in runners:
-        cursor.execute("""
-            INSERT INTO runners (entry_id, firstname, lastname, nationality, gender, match_status)
-            VALUES (?, ?, ?, ?, ?, 'unmatched')
-        """, (runner['entry_id'], runner['firstname'], runner['lastname'], runner['nationality'], runner['gender']))
-
-    conn.commit()
-    conn.close()
-
-
 def main():
     parser = argparse.ArgumentParser(description='Parse PDF with column detection')
     parser.add_argument('pdf_file', help='Path to PDF file')
     parser.add_argument('--db-path', default='data/iau24hwc.db', help='Path to database')
+    add_import_args(parser)
     parser.add_argument('--preview', action='store_true', help='Preview first 30 entries')
 
     args = parser.parse_args()
@@ -139,8 +120,12 @@ def main():
         return
 
     # Save to database
-    db_path = args.db_path if os.path.isabs(args.db_path) else os.path.join(os.path.dirname(os.path.dirname(__file__)), args.db_path)
-    save_to_database(runners, db_path)
+    db_path = resolve_db_path(args.db_path)
+    try:
+        save_runners(runners, db_path, incremental=args.incremental, race=args.race, race_date=args.race_date)
+    except ValueError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
 
     men = sum(1 for r in runners if r['gender'] == 'M')
     women = sum(1 for r in runners if r['gender'] == 'W')
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Persistent PDF Parse Worker
+
+Usage:
+    python scripts/pdf-parse-worker.py [--port 8765] [--db-path <path>] [--queue-size 4] [--profile auto] [--race <id|name>]
+
+Keeps a Docling DocumentConverter loaded in one long-lived process so uploads
+don't pay interpreter start, the Docling/torch import and model load on every
+parse. The /api/parse-pdf route uses it when PDF_WORKER_URL is reachable and
+falls back to spawning scripts/parse-pdf-backend.py otherwise.
+
+Endpoints (localhost only):
+    POST /parse         PDF bytes in the body -> {"runners": [...], "count": N}
+                        Add ?save=1 to also replace the runners of --race in --db-path
+    GET  /health        Worker status, queue depth and job counters
+
+Jobs run one at a time on the converter thread. When the bounded queue is full
+the worker answers 503 with Retry-After instead of accepting more work.
+
+Results are one JSON body, not streamed: Docling converts the whole document
+before the first table can be read, and ?save=1 replaces the race's runners
+in one transaction, so there is nothing useful to send earlier (the route
+needs the complete list either way). A request that times out (504) cancels
+its job. A queued job is dropped. A running one finishes converting, because
+Docling can't be interrupted, but its result is discarded and never saved,
+so the route's fallback parse is the only one that writes.
+"""
+
+import sys
+import os
+import json
+import time
+import queue
+import tempfile
+import argparse
+import threading
+import importlib.util
+from typing import Optional
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'lib', 'pdf'))
+from docling_convert import add_profile_arg, get_converter, docling_version
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'lib', 'db'))
+from runner_import import save_runners
+from sqlite_db import resolve_db_path
+
+# parse-pdf-backend.py has a hyphenated name, so load it by path
+_spec = importlib.util.spec_from_file_location(
+    'parse_pdf_backend', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'parse-pdf-backend.py')
+)
+backend = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(backend)
+
+MAX_UPLOAD_BYTES = 50 * 1024 * 1024
+JOB_TIMEOUT = 600  # seconds a request waits for its job before giving up
+
+
+class Job:
+    def __init__(self, pdf_bytes: bytes, save: bool):
+        self.pdf_bytes = pdf_bytes
+        self.save = save
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self._lock = threading.Lock()
+        self._cancelled = False
+        self._saving = False
+
+    def cancel(self) -> bool:
+        """Give up on the job (request timed out); False if its save already started"""
+        with self._lock:
+            if not self._saving:
+                self._cancelled = True
+            return self._cancelled
+
+    @property
+    def cancelled(self) -> bool:
+        with self._lock:
+            return self._cancelled
+
+    def start_save(self) -> bool:
+        """Claim the save for the converter thread; False if the request gave up"""
+        with self._lock:
+            if not self._cancelled:
+                self._saving = True
+            return self._saving
+
+
+class ParseWorker:
+    """Owns the warm converter and a bounded queue of parse jobs"""
+
+    def __init__(self, db_path: str, queue_size: int, profile: str = 'auto', race: Optional[str] = None):
+        self.db_path = db_path
+        self.race = race
+        self.profile = profile
+        self.jobs = queue.Queue(maxsize=queue_size)
+        self.started_at = time.time()
+        self.converter = None
+        self.busy = False
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.cancelled = 0
+
+    def warm_up(self):
+        """Load Docling and its PDF pipeline models before accepting jobs"""
+        started = time.monotonic()
+        # Entry lists are text-native, so 'auto' warms the fast pipeline; a scanned
+        # upload loads the accurate one on first use and keeps it loaded too
+        self.converter = get_converter('accurate' if self.profile == 'accurate' else 'fast')
+        try:
+            from docling.datamodel.base_models import InputFormat
+            self.converter.initialize_pipeline(InputFormat.PDF)
+        except (ImportError, AttributeError):
+            pass  # Older Docling: models load on the first conversion instead
+        print(f"Docling {docling_version()} ready in {time.monotonic() - started:.1f}s", file=sys.stderr)
+
+    def submit(self, pdf_bytes: bytes, save: bool) -> Job:
+        """Queue a job, raising queue.Full when the worker is saturated"""
+        job = Job(pdf_bytes, save)
+        try:
+            self.jobs.put_nowait(job)
+        except queue.Full:
+            self.rejected += 1
+            raise
+        return job
+
+    def run(self):
+        """Converter thread: process jobs one at a time"""
+        while True:
+            job = self.jobs.get()
+            try:
+                self.run_job(job)
+            finally:
+                self.jobs.task_done()
+
+    def run_job(self, job: Job):
+        if job.cancelled:
+            self.cancelled += 1
+            print("Dropped a job whose request timed out while queued", file=sys.stderr)
+            job.done.set()
+            return
+        self.busy = True
+        try:
+            job.result = self.parse(job)
+            if job.cancelled:
+                self.cancelled += 1
+            else:
+                self.completed += 1
+        except Exception as e:
+            job.error = str(e)
+            self.failed += 1
+            print(f"Parse failed: {e}", file=sys.stderr)
+        finally:
+            self.busy = False
+            job.done.set()
+
+    def parse(self, job: Job) -> Optional[dict]:
+        """Parse (and save) a job's PDF; None when the request gave up before the save"""
+        started = time.monotonic()
+
+        # Docling and the content-hash cache both work from a file path
+        fd, pdf_path = tempfile.mkstemp(prefix='entry-list-', suffix='.pdf')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(job.pdf_bytes)
+            runners = backend.parse_pdf(pdf_path, profile=self.profile)
+        finally:
+            os.unlink(pdf_path)
+
+        if job.save:
+            if not runners:
+                raise ValueError('No runners found in PDF')
+            if not job.start_save():
+                print(f"Discarded {len(runners)} runners: the request timed out, not saving", file=sys.stderr)
+                return None
+            save_runners(runners, self.db_path, race=self.race)
+
+        elapsed = time.monotonic() - started
+        print(f"Parsed {len(runners)} runners in {elapsed:.2f}s", file=sys.stderr)
+        return {'runners': runners, 'count': len(runners), 'saved': job.save, 'seconds': round(elapsed, 3)}
+
+    def health(self) -> dict:
+        return {
+            'status': 'ok' if self.converter is not None else 'starting',
+            'docling_version': docling_version(),
+            'profile': self.profile,
+            'busy': self.busy,
+            'queued': self.jobs.qsize(),
+            'queue_size': self.jobs.maxsize,
+            'completed': self.completed,
+            'failed': self.failed,
+            'rejected': self.rejected,
+            'cancelled': self.cancelled,
+            'uptime_seconds': round(time.time() - self.started_at),
+        }
+
+
+class Handler(BaseHTTPRequestHandler):
+    worker: ParseWorker = None
+
+    def send_json(self, status: int, payload: dict, headers: dict = None):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if urlparse(self.path).path == '/health':
+            self.send_json(200, self.worker.health())
+        else:
+            self.send_json(404, {'error': 'Not found'})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != '/parse':
+            self.send_json(404, {'error': 'Not found'})
+            return
+
+        length = int(self.headers.get('Content-Length') or 0)
+        if length <= 0:
+            self.send_json(400, {'error': 'Empty request body'})
+            return
+        if length > MAX_UPLOAD_BYTES:
+            self.send_json(413, {'error': f'PDF larger than {MAX_UPLOAD_BYTES // (1024 * 1024)} MB'})
+            return
+
+        pdf_bytes = self.rfile.read(length)
+        if not pdf_bytes.startswith(b'%PDF'):
+            self.send_json(400, {'error': 'Body is not a PDF'})
+            return
+
+        save = parse_qs(url.query).get('save', ['0'])[0] in ('1', 'true')
+        try:
+            job = self.worker.submit(pdf_bytes, save)
+        except queue.Full:
+            self.send_json(503, {'error': 'Parse queue full'}, {'Retry-After': '5'})
+            return
+
+        if not job.done.wait(JOB_TIMEOUT) and job.cancel():
+            self.send_json(504, {'error': 'Parse timed out'})
+            return
+        job.done.wait()  # Timed out while saving: the save finishes, so report it
+        if job.error:
+            self.send_json(500, {'error': 'Failed to parse PDF', 'details': job.error})
+        else:
+            self.send_json(200, job.result)
+
+    def log_message(self, format, *args):
+        print(f"{self.address_string()} - {format % args}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Long-lived PDF parse worker with a warm Docling converter')
+    parser.add_argument('--host', default='127.0.0.1', help='Bind address (default: localhost only)')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PDF_WORKER_PORT', 8765)), help='Port to listen on')
+    parser.add_argument('--db-path', default='data/iau24hwc.db', help='Path to SQLite database for ?save=1')
+    parser.add_argument('--race', help='Race id or name that ?save=1 imports into (default: the latest race)')
+    parser.add_argument('--queue-size', type=int, default=4, help='Maximum jobs waiting behind the running one')
+    add_profile_arg(parser)
+
+    args = parser.parse_args()
+
+    db_path = resolve_db_path(args.db_path)
+
+    worker = ParseWorker(db_path, args.queue_size, args.profile, args.race)
+    try:
+        worker.warm_up()
+    except RuntimeError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+    threading.Thread(target=worker.run, name='converter', daemon=True).start()
+
+    Handler.worker = worker
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    print(f"PDF parse worker listening on http://{args.host}:{args.port} (queue size {args.queue_size})", file=sys.stderr)
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down", file=sys.stderr)
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+"""
+CLI Tool: Run the data pipeline (parse -> match -> fetch -> teams), skipping up-to-date stages
+
+Usage:
+    # Bring the latest race up to date (or --race <id|name>)
+    python scripts/run-pipeline.py run [--db-path data/iau24hwc.db]
+
+    # With a new or revised entry list
+    python scripts/run-pipeline.py run --pdf downloads/iau-2025-entry-list.pdf
+
+    # Show what would run and why, without running anything
+    python scripts/run-pipeline.py run --dry-run
+
+    # Rerun a stage even if its inputs are unchanged
+    python scripts/run-pipeline.py run --force fetch
+
+    # Last successful run of each stage
+    python scripts/run-pipeline.py status
+
+Stages and what they depend on:
+
+    parse    entry list PDF -> runners (--incremental)      only with --pdf
+    refresh  refetch matched profiles older than --refresh-days
+    match    match new or changed runners to DUV             after parse
+    fetch    fetch the history of newly matched runners      after match, refresh
+    teams    recalculate team rankings                       after fetch
+
+This script:
+1. Fingerprints each stage's inputs when its dependencies are done: the PDF's
+   SHA-256 (parse), the stale matched profiles (refresh), the runners' names,
+   countries and entry ids (match), the runner -> DUV id matches (fetch) and
+   the PBs and DNS flags plus the teams table (teams), with the options that
+   change a stage's result
+2. Runs only the stages whose fingerprint differs from their last successful
+   run (pipeline_runs); a stage that ran but changed nothing its dependents
+   read leaves them up to date
+3. Starts every stage whose dependencies are done at once, each as the
+   tool's own script in a subprocess with its output prefixed by the stage:
+   refresh runs while the PDF is parsed and runners are matched (both make
+   DUV requests then, each at one per second; --serial runs one at a time)
+4. Records the fingerprint after a stage succeeds, skips the stages after a
+   failed one, and prints each stage's status, start and duration
+
+The fingerprints are taken again after a stage ran, so a refresh whose
+failed profiles went to the retry queue (fetch-performances.py
+--retry-failed) isn't rerun for them.
+"""
+
+import sys
+import os
+import json
+import time
+import hashlib
+import argparse
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple, TYPE_CHECKING
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(SCRIPTS_DIR), 'lib', 'db'))
+from sqlite_db import get_connection, resolve_db_path
+from races import resolve_race
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+    from threading import Lock
+
+# docling_convert.PROFILES, repeated so --help and status don't import lib/pdf
+PROFILES = ('auto', 'fast', 'accurate')
+
+DEFAULT_REFRESH_DAYS = 7
+DEFAULT_THRESHOLD = 0.95  # match-runners.py's auto-match threshold
+FAILURE_TAIL_LINES = 20  # Output lines shown for a failed stage with --quiet
+
+
+class Stage(NamedTuple):
+    name: str
+    script: str
+    depends: Tuple[str, ...]
+    summary: str
+
+
+STAGES = (
+    Stage('parse', 'parse-pdf-backend.py', (), 'Import the entry list PDF'),
+    Stage('refresh', 'fetch-performances.py', (), 'Refetch stale matched profiles'),
+    Stage('match', 'match-runners.py', ('parse',), 'Match new runners to DUV'),
+    Stage('fetch', 'fetch-performances.py', ('match', 'refresh'), 'Fetch newly matched profiles'),
+    Stage('teams', 'calculate-teams.py', ('fetch',), 'Recalculate team rankings'),
+)
+STAGES_BY_NAME = {s.name: s for s in STAGES}
+
+
+def sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def digest(options: Iterable[Any], rows: Iterable[Tuple[Any, ...]] = ()) -> str:
+    """Short hash of a stage's options and the rows it reads"""
+    h = hashlib.sha256(repr(tuple(options)).encode('utf-8'))
+    for row in rows:
+        h.update(repr(tuple(row)).encode('utf-8'))
+    return h.hexdigest()[:16]
+
+
+# Fingerprint of each stage's inputs: (conn, race_id, args) -> str
+def parse_fingerprint(conn, race_id: int, args) -> str:
+    return digest((sha256_file(args.pdf), args.profile))
+
+
+def refresh_fingerprint(conn, race_id: int, args) -> str:
+    return digest((args.refresh_days,), conn.execute("""
+        SELECT id, duv_id FROM runners
+        WHERE race_id = ? AND match_status IN ('auto-matched', 'manually-matched') AND duv_id IS NOT NULL
+        AND duv_fetched_at < datetime('now', ?)
+        ORDER BY id
+    """, (race_id, f"-{args.refresh_days} days")))
+
+
+def match_fingerprint(conn, race_id: int, args) -> str:
+    return digest((args.threshold,), conn.execute("""
+        SELECT id, entry_id, firstname, lastname, nationality, gender FROM runners
+        WHERE race_id = ?
+        ORDER BY id
+    """, (race_id,)))
+
+
+def fetch_fingerprint(conn, race_id: int, args) -> str:
+    return digest((), conn.execute("""
+        SELECT id, duv_id FROM runners
+        WHERE race_id = ? AND match_status IN ('auto-matched', 'manually-matched') AND duv_id IS NOT NULL
+        ORDER BY id
+    """, (race_id,)))
+
+
+def teams_fingerprint(conn, race_id: int, args) -> str:
+    runners = conn.execute("""
+        SELECT id, nationality, gender, dns, personal_best_all_time, personal_best_last_2_years
+        FROM runners
+        WHERE race_id = ?
+        ORDER BY id
+    """, (race_id,))
+    # The teams themselves too, so teams deleted or edited elsewhere are rebuilt
+    teams = conn.execute("SELECT COUNT(*), MAX(updated_at) FROM teams WHERE race_id = ?", (race_id,))
+    return digest((), [*runners, *teams])
+
+
+FINGERPRINTS: Dict[str, Callable[..., str]] = {
+    'parse': parse_fingerprint,
+    'refresh': refresh_fingerprint,
+    'match': match_fingerprint,
+    'fetch': fetch_fingerprint,
+    'teams': teams_fingerprint,
+}
+
+
+def stage_argv(stage: Stage, db_path: str, race_id: int, args) -> List[str]:
+    argv = [sys.executable, os.path.join(SCRIPTS_DIR, stage.script), '--db-path', db_path, '--race', str(race_id)]
+    if stage.name == 'parse':
+        argv += [args.pdf, '--incremental', '--profile', args.profile]
+    elif stage.name == 'refresh':
+        argv += ['--stale-days', str(args.refresh_days)]
+    elif stage.name == 'match':
+        argv += ['--threshold', str(args.threshold)]
+    elif stage.name == 'fetch':
+        argv += ['--new-only']
+    return argv
+
+
+def last_runs(conn, race_id: int) -> Dict[str, Dict[str, Any]]:
+    rows = conn.execute(
+        "SELECT stage, fingerprint, duration_sec, finished_at FROM pipeline_runs WHERE race_id = ?", (race_id,))
+    return {r[0]: {'fingerprint': r[1], 'duration_sec': r[2], 'finished_at': r[3]} for r in rows}
+
+
+def record_run(conn, race_id: int, stage: str, fingerprint: str, duration: float):
+    conn.execute("""
+        INSERT INTO pipeline_runs (race_id, stage, fingerprint, duration_sec, finished_at)
+        VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(race_id, stage) DO UPDATE SET
+            fingerprint = excluded.fingerprint,
+            duration_sec = excluded.duration_sec,
+            finished_at = excluded.finished_at
+    """, (race_id, stage, fingerprint, round(duration, 3)))
+    conn.commit()
+
+
+class StageRunner:
+    """Runs one stage's script, prefixing its output lines with the stage name"""
+
+    def __init__(self, stage: Stage, argv: List[str], quiet: bool, print_lock: 'Lock'):
+        self.stage = stage
+        self.argv = argv
+        self.quiet = quiet
+        self.print_lock = print_lock
+        self.tail: List[str] = []
+
+    def __call__(self) -> int:
+        import subprocess  # Imported here, like the thread pool, so --help and status start without it
+        env = dict(os.environ, PYTHONUNBUFFERED='1')
+        process = subprocess.Popen(self.argv, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                   stdin=subprocess.DEVNULL, env=env, text=True, errors='replace')
+        for line in process.stdout:
+            line = line.rstrip('\n')
+            if self.quiet:
+                self.tail = (self.tail + [line])[-FAILURE_TAIL_LINES:]
+            elif line.strip():
+                with self.print_lock:
+                    print(f"[{self.stage.name}] {line}", file=sys.stderr, flush=True)
+        return process.wait()
+
+
+def plan(conn, race_id: int, args) -> List[Dict[str, Any]]:
+    """What run would do, without running anything (dependents of a stale stage may turn out up to date)"""
+    previous = last_runs(conn, race_id)
+    rows, will_run = [], set()
+    for stage in STAGES:
+        if stage.name == 'parse' and not args.pdf:
+            rows.append({'stage': stage.name, 'status': 'skipped', 'detail': 'no --pdf'})
+            continue
+        pending = [d for d in stage.depends if d in will_run]
+        status, detail = decide(conn, stage, race_id, args, previous)
+        if status == 'run':
+            will_run.add(stage.name)
+        elif pending:
+            status, detail = 'maybe', f"runs if {' or '.join(pending)} changes its inputs"
+            will_run.add(stage.name)
+        rows.append({'stage': stage.name, 'status': status, 'detail': detail})
+    return rows
+
+
+def decide(conn, stage: Stage, race_id: int, args,
+           previous: Dict[str, Dict[str, Any]]) -> Tuple[str, str]:
+    """('run' | 'up to date', reason) from the stage's current fingerprint"""
+    if stage.name in args.force or 'all' in args.force:
+        return 'run', 'forced'
+    last = previous.get(stage.name)
+    if last is None:
+        return 'run', 'never ran'
+    if FINGERPRINTS[stage.name](conn, race_id, args) != last['fingerprint']:
+        return 'run', f"inputs changed since {last['finished_at']}"
+    return 'up to date', f"since {last['finished_at']}"
+
+
+def run_pipeline(db_path: str, race_id: int, args) -> List[Dict[str, Any]]:
+    """Run the stale stages, dependencies first and independent ones side by side; one report row per stage"""
+    import threading
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+    conn = get_connection(db_path)
+    previous = last_runs(conn, race_id)
+    started_at = time.perf_counter()
+    report: Dict[str, Dict[str, Any]] = {}
+    print_lock = threading.Lock()
+    running: Dict['Future', Tuple[Stage, StageRunner, str, float]] = {}
+
+    def settle(stage: Stage, status: str, detail: str):
+        report[stage.name] = {'stage': stage.name, 'status': status, 'detail': detail}
+
+    with ThreadPoolExecutor(max_workers=1 if args.serial else len(STAGES)) as pool:
+        while len(report) < len(STAGES):
+            # STAGES is in dependency order, so one pass settles every stage that can be settled now
+            active = {stage.name for stage, _, _, _ in running.values()}
+            for stage in STAGES:
+                if stage.name in report or stage.name in active:
+                    continue
+                if any(d not in report for d in stage.depends):
+                    continue
+                failed = [d for d in stage.depends if report[d]['status'] in ('failed', 'blocked')]
+                if failed:
+                    settle(stage, 'blocked', f"{', '.join(failed)} did not finish")
+                elif stage.name == 'parse' and not args.pdf:
+                    settle(stage, 'skipped', 'no --pdf')
+                elif args.serial and running:
+                    continue
+                else:
+                    status, detail = decide(conn, stage, race_id, args, previous)
+                    if status == 'up to date':
+                        settle(stage, status, detail)
+                        continue
+                    print(f"▶ {stage.name}: {stage.summary} ({detail})", file=sys.stderr, flush=True)
+                    runner = StageRunner(stage, stage_argv(stage, db_path, race_id, args), args.quiet, print_lock)
+                    running[pool.submit(runner)] = (stage, runner, detail, time.perf_counter())
+                    active.add(stage.name)
+
+            if not running:
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, runner, detail, stage_started = running.pop(future)
+                duration = time.perf_counter() - stage_started
+                returncode = future.result()
+                if returncode == 0:
+                    # Taken after the run: what the stage left behind is what the next run compares with
+                    record_run(conn, race_id, stage.name, FINGERPRINTS[stage.name](conn, race_id, args), duration)
+                    settle(stage, 'ran', detail)
+                    print(f"✓ {stage.name} done in {duration:.1f}s", file=sys.stderr, flush=True)
+                else:
+                    settle(stage, 'failed', f"exit status {returncode}")
+                    print(f"✗ {stage.name} failed (exit status {returncode})", file=sys.stderr, flush=True)
+                    for line in runner.tail:
+                        print(f"[{stage.name}] {line}", file=sys.stderr)
+                report[stage.name].update(start_sec=round(stage_started - started_at, 2),
+                                          duration_sec=round(duration, 2))
+
+    return [report[s.name] for s in STAGES]
+
+
+def format_report(rows: List[Dict[str, Any]], total_sec: Optional[float] = None) -> str:
+    header = f"{'stage':<8} {'status':<11} {'start s':>8} {'time s':>8}  detail"
+    lines = [header, '-' * len(header)]
+    for r in rows:
+        start = f"{r['start_sec']:>8.1f}" if 'start_sec' in r else f"{'':>8}"
+        duration = f"{r['duration_sec']:>8.1f}" if 'duration_sec' in r else f"{'':>8}"
+        lines.append(f"{r['stage']:<8} {r['status']:<11} {start} {duration}  {r['detail']}")
+    if total_sec is not None:
+        serial = sum(r.get('duration_sec', 0) for r in rows)
+        lines.append(f"\nTotal {total_sec:.1f}s wall time ({serial:.1f}s of stage time)")
+    return '\n'.join(lines)
+
+
+def show_status(conn, race: Dict[str, Any], args):
+    """Last successful run of each stage and whether its inputs changed since"""
+    previous = last_runs(conn, race['id'])
+    print(f"Pipeline of {race['name']} ({race['race_date']})\n")
+    header = f"{'stage':<8} {'last run':<20} {'time s':>8}  inputs"
+    print(header)
+    print('-' * len(header))
+    for stage in STAGES:
+        last = previous.get(stage.name)
+        if last is None:
+            print(f"{stage.name:<8} {'never':<20} {'':>8}")
+            continue
+        if stage.name == 'parse' and not args.pdf:
+            state = 'pass --pdf to compare'
+        elif FINGERPRINTS[stage.name](conn, race['id'], args) == last['fingerprint']:
+            state = 'unchanged'
+        else:
+            state = 'changed'
+        print(f"{stage.name:<8} {last['finished_at']:<20} {last['duration_sec'] or 0:>8.1f}  {state}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the parse -> match -> fetch -> teams pipeline, skipping up-to-date stages')
+    subparsers = parser.add_subparsers(dest='action', metavar='<action>')
+    subparsers.required = True
+    run_parser = subparsers.add_parser('run', help='Run the stages whose inputs changed')
+    status_parser = subparsers.add_parser('status', help='Show the last run of each stage')
+    for sub in (run_parser, status_parser):
+        sub.add_argument('--db-path', default='data/iau24hwc.db', help='Path to SQLite database')
+        sub.add_argument('--race', help='Race id or name (default: the latest race; a new name needs --race-date)')
+        sub.add_argument('--pdf', help='Entry list PDF for the parse stage (without it, parse is skipped)')
+        sub.add_argument('--profile', choices=PROFILES, default='auto', help='Docling pipeline for parse (default auto)')
+        sub.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                         help=f'Auto-match confidence threshold for match (default {DEFAULT_THRESHOLD})')
+        sub.add_argument('--refresh-days', type=int, default=DEFAULT_REFRESH_DAYS,
+                         help=f'Refetch matched profiles older than this many days (default {DEFAULT_REFRESH_DAYS})')
+    run_parser.add_argument('--race-date', help='Race date (YYYY-MM-DD) of a new race created by --pdf')
+    run_parser.add_argument('--force', action='append', default=[], choices=[*STAGES_BY_NAME, 'all'],
+                            help='Run this stage even if its inputs are unchanged (repeatable, or "all")')
+    run_parser.add_argument('--dry-run', action='store_true', help='Only show which stages would run and why')
+    run_parser.add_argument('--serial', action='store_true', help='Run one stage at a time')
+    run_parser.add_argument('--quiet', '-q', action='store_true',
+                            help='Hide stage output (the last lines of a failed stage are still shown)')
+    run_parser.add_argument('--json', action='store_true', help='Output the stage report as JSON to stdout')
+
+    args = parser.parse_args()
+
+    db_path = resolve_db_path(args.db_path)
+    if args.pdf and not os.path.exists(args.pdf):
+        print(f"ERROR: PDF file not found: {args.pdf}", file=sys.stderr)
+        sys.exit(1)
+    if not os.path.exists(db_path) and not (args.action == 'run' and args.pdf):
+        print(f"ERROR: Database not found: {db_path}", file=sys.stderr)
+        sys.exit(1)
+
+    conn = get_connection(db_path)
+    try:
+        # A new race is created here (as parse would) so that every stage gets its id
+        race = resolve_race(conn, args.race, getattr(args, 'race_date', None),
+                            create=args.action == 'run' and bool(args.pdf) and not args.dry_run)
+        conn.commit()
+    except ValueError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.action == 'status':
+        show_status(conn, race, args)
+        return
+
+    if args.dry_run:
+        rows = plan(conn, race['id'], args)
+        total = None
+    else:
+        print(f"Pipeline of {race['name']} ({race['race_date']})", file=sys.stderr)
+        started = time.perf_counter()
+        rows = run_pipeline(db_path, race['id'], args)
+        total = time.perf_counter() - started
+
+    if args.json:
+        print(json.dumps({'race': race, 'stages': rows,
+                          'total_sec': round(total, 2) if total is not None else None}, indent=2))
+    else:
+        print()
+        print(format_report(rows, total))
+
+    if any(r['status'] in ('failed', 'blocked') for r in rows):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
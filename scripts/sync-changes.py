@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+CLI Tool: Incremental sync of local changes to Supabase Postgres
+
+Usage:
+    # Build a delta batch of rows changed/deleted since the last sync and apply it
+    python scripts/sync-changes.py --apply [--db-path data/iau24hwc.db] [--database-url URL]
+
+    # Only write the batch (to apply later, e.g. from another machine)
+    python scripts/sync-changes.py [--out-dir data/supabase-delta]
+    python scripts/sync-changes.py --apply-batch data/supabase-delta/changes-....ndjson.gz
+
+    # Show the stored watermarks and what the next batch would contain
+    python scripts/sync-changes.py --status
+
+    # Sync another race than the latest one (Postgres holds one race at a time)
+    python scripts/sync-changes.py --apply --race "IAU 24H World Championships 2025"
+
+This script:
+1. Reads the per-table watermarks in sync_watermarks (newest updated_at and
+   deleted_at already applied) and collects, from one read snapshot, the rows
+   whose updated_at is newer plus the keys in sync_tombstones (filled by
+   delete triggers in lib/db/schema.sql) that no longer exist locally
+2. Writes them as one gzipped JSON-lines batch: a header with the watermarks,
+   then per changed table its columns, upserted rows and deleted keys
+3. Applies the batch in one Postgres transaction: deletes, then staged
+   INSERT ... ON CONFLICT DO UPDATE that skips rows whose data is unchanged.
+   The batch id is recorded in sync_delta_batches, so reapplying it is a no-op
+4. Only after a successful apply, advances the local watermarks and prunes
+   the synced tombstones
+
+The first run (or --full) sends every row, like export-supabase.py; after that
+only what changed. Watermarks are kept for the race last synced: switching
+--race sends everything again, and Postgres should be reloaded for the new
+race first (see lib/db/pg_sync.py). Needs psycopg (pip install "psycopg[binary]")
+to apply.
+"""
+
+import sys
+import os
+import time
+import argparse
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'lib', 'db'))
+from sqlite_db import connect, resolve_db_path
+from races import resolve_race
+from pg_sync import (
+    SYNC_TABLES, TABLES_BY_NAME, advance_watermarks, apply_delta, build_delta, connect_postgres,
+    read_delta, read_watermarks, write_delta,
+)
+
+DEFAULT_OUT_DIR = 'data/supabase-delta'
+
+
+def summarize(batch: Dict[str, Any]) -> str:
+    if not batch['tables']:
+        return "no changes"
+    return ', '.join(f"{t['name']} +{len(t['upserts'])}/-{len(t['deletes'])}" for t in batch['tables'])
+
+
+def show_status(db_path: str, tables: List[str], race: Optional[str] = None):
+    """Print the race's stored watermarks and the size of the pending delta"""
+    conn = connect(db_path)
+    try:
+        race = resolve_race(conn, race)
+        watermarks = read_watermarks(conn, race['id'])
+        pending = build_delta(conn, [TABLES_BY_NAME[t] for t in tables], race['id'])
+    finally:
+        conn.close()
+    print(f"{race['name']} ({race['race_date']})")
+    print(f"{'Table':18s} {'Changed up to':20s} {'Deleted up to':20s} {'Pending':>9s} {'Deletes':>8s}")
+    counts = {t['name']: t for t in pending['tables']}
+    for name in tables:
+        mark = watermarks.get(name, {})
+        entry = counts.get(name, {'upserts': [], 'deletes': []})
+        print(f"{name:18s} {mark.get('changed_at') or '(never)':20s} {mark.get('deleted_at') or '-':20s} "
+              f"{len(entry['upserts']):9d} {len(entry['deletes']):8d}")
+
+
+def apply_batch(batch: Dict[str, Any], db_path: str, database_url: str, force: bool):
+    """Apply a batch to Postgres, then advance the local watermarks"""
+    pg = connect_postgres(database_url)
+    try:
+        started = time.monotonic()
+        counts = apply_delta(pg, batch, force)
+    finally:
+        pg.close()
+
+    if counts is None:
+        print(f"  Batch {batch['batch_id']} was already applied; nothing to do", file=sys.stderr)
+    else:
+        for name, count in counts.items():
+            print(f"  {name}: {count['changed']} inserted/changed, {count['deleted']} deleted", file=sys.stderr)
+        print(f"  Applied in {time.monotonic() - started:.1f}s", file=sys.stderr)
+
+    conn = connect(db_path)
+    try:
+        advance_watermarks(conn, batch)
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Send rows changed or deleted since the last sync to Supabase as a delta batch')
+    parser.add_argument('--db-path', default='data/iau24hwc.db', help='Path to SQLite database')
+    parser.add_argument('--race', help='Race id or name to sync (default: the latest race)')
+    parser.add_argument('--out-dir', default=DEFAULT_OUT_DIR, help=f'Directory for batch files (default: {DEFAULT_OUT_DIR})')
+    parser.add_argument('--tables', default=','.join(t.name for t in SYNC_TABLES), help='Comma-separated tables to sync')
+    parser.add_argument('--apply', action='store_true', help='Apply the new batch to Postgres and advance the watermarks')
+    parser.add_argument('--apply-batch', metavar='FILE', help='Apply an existing batch file instead of building one')
+    parser.add_argument('--full', action='store_true', help='Ignore the watermarks and send every row')
+    parser.add_argument('--status', action='store_true', help='Show watermarks and pending changes, then exit')
+    parser.add_argument('--database-url', default=os.environ.get('DATABASE_URL'), help='Postgres URL (default: $DATABASE_URL)')
+    parser.add_argument('--force', action='store_true', help='Apply even if the batch was applied before or is older than the last one')
+
+    args = parser.parse_args()
+
+    db_path = resolve_db_path(args.db_path)
+    if not os.path.exists(db_path):
+        print(f"ERROR: Database not found: {db_path}", file=sys.stderr)
+        sys.exit(1)
+
+    tables = [t.strip() for t in args.tables.split(',') if t.strip()]
+    unknown = [t for t in tables if t not in TABLES_BY_NAME]
+    if unknown:
+        print(f"ERROR: Unknown table(s): {', '.join(unknown)}", file=sys.stderr)
+        sys.exit(1)
+    tables = [t.name for t in SYNC_TABLES if t.name in tables]
+
+    if args.status:
+        try:
+            show_status(db_path, tables, args.race)
+        except ValueError as e:
+            print(f"ERROR: {e}", file=sys.stderr)
+            sys.exit(1)
+        return
+
+    if (args.apply or args.apply_batch) and not args.database_url:
+        print("ERROR: Applying needs --database-url or DATABASE_URL", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        if args.apply_batch:
+            batch = read_delta(resolve_db_path(args.apply_batch))
+            print(f"Applying batch {batch['batch_id']} ({summarize(batch)})...", file=sys.stderr)
+            apply_batch(batch, db_path, args.database_url, args.force)
+            print("✓ Synced", file=sys.stderr)
+            return
+
+        conn = connect(db_path)
+        try:
+            race = resolve_race(conn, args.race)
+            batch = build_delta(conn, [TABLES_BY_NAME[t] for t in tables], race['id'], full=args.full)
+        finally:
+            conn.close()
+        print(f"Changes since last sync: {summarize(batch)}", file=sys.stderr)
+        if not batch['tables']:
+            if args.apply:
+                # Nothing to send, but tombstones of re-inserted keys can be pruned
+                conn = connect(db_path)
+                try:
+                    advance_watermarks(conn, batch)
+                finally:
+                    conn.close()
+            return
+
+        out_dir = resolve_db_path(args.out_dir)
+        os.makedirs(out_dir, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+        path = os.path.join(out_dir, f"changes-{stamp}-{batch['batch_id'][:8]}.ndjson.gz")
+        write_delta(batch, path)
+        print(f"  Batch written to {path} ({os.path.getsize(path)} bytes)", file=sys.stderr)
+
+        if args.apply:
+            apply_batch(batch, db_path, args.database_url, args.force)
+            print("✓ Synced", file=sys.stderr)
+        else:
+            print(f"  Apply with: python scripts/sync-changes.py --apply-batch {path}", file=sys.stderr)
+    except (RuntimeError, ValueError, FileNotFoundError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
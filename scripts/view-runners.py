@@ -4,51 +4,243 @@ CLI Tool: View and edit runners in database
 
 Usage:
     python scripts/view-runners.py [--db-path data/iau24hwc.db] [--filter COUNTRY]
+    python scripts/view-runners.py --status unmatched --gender W --name "van d"
+    python scripts/view-runners.py --fuzzy "jorg muller" --columns id,entry_id,firstname,lastname,duv_id
+    python scripts/view-runners.py --page-size 50 --after 120   # one page, resume after entry 120
+    python scripts/view-runners.py --list-races
+    python scripts/view-runners.py --race "IAU 24H World Championships 2024" --filter SWE
+
+Every view shows one race (--race, default the latest). Runners are read in
+keyset-paginated pages (WHERE race_id = ? AND entry_id > last ORDER BY
+entry_id LIMIT n, on the (race_id, entry_id) key), so large databases are never
+loaded whole. Name search uses runners.search_name, an indexed accent- and
+case-folded "lastname firstname" column: --name is a prefix match on it
+(surname first), --fuzzy ranks the filtered runners by similarity to it.
 """
 
 import sys
 import os
-import sqlite3
+import heapq
+import difflib
 import argparse
-from typing import Optional
-
-
-def view_runners(db_path: str, filter_country: Optional[str] = None):
-    """Display all runners with option to edit"""
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-
-    query = "SELECT * FROM runners ORDER BY entry_id"
-    params = ()
-
-    if filter_country:
-        query = "SELECT * FROM runners WHERE nationality = ? ORDER BY entry_id"
-        params = (filter_country.upper(),)
+import unicodedata
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'lib', 'db'))
+from sqlite_db import get_connection, resolve_db_path
+from races import list_races, resolve_race
+
+DEFAULT_COLUMNS = ('id', 'entry_id', 'firstname', 'lastname', 'nationality', 'gender', 'match_status')
+PAGE_SIZE = 500
+FUZZY_RESULTS = 20
+FUZZY_MIN_SCORE = 0.5
+
+# Display headers and widths; other columns print as-is at width 12
+COLUMN_FORMATS = {
+    'id': ('ID', 5, '>'),
+    'entry_id': ('Entry', 6, '>'),
+    'firstname': ('First Name', 20, '<'),
+    'lastname': ('Last Name', 20, '<'),
+    'nationality': ('Nat', 3, '<'),
+    'gender': ('G', 1, '<'),
+    'match_status': ('Match', 16, '<'),
+    'duv_id': ('DUV ID', 8, '>'),
+}
+
+# Letters NFKD does not decompose into base letter + accent
+FOLD_LETTERS = str.maketrans({'ø': 'o', 'æ': 'ae', 'œ': 'oe', 'ß': 'ss', 'đ': 'd', 'ł': 'l', 'þ': 'th', 'ð': 'd'})
+
+
+def search_name(firstname: str, lastname: str) -> str:
+    """Accent- and case-folded "lastname firstname" for runners.search_name"""
+    text = unicodedata.normalize('NFKD', f"{lastname} {firstname}")
+    text = ''.join(c for c in text if not unicodedata.combining(c)).casefold().translate(FOLD_LETTERS)
+    return ' '.join(text.replace('-', ' ').split())
+
+
+def refresh_search_names(conn) -> int:
+    """Fill search_name for new or renamed runners (a trigger resets it to NULL on rename)"""
+    rows = conn.execute("SELECT id, firstname, lastname FROM runners WHERE search_name IS NULL").fetchall()
+    if rows:
+        conn.executemany("UPDATE runners SET search_name = ? WHERE id = ?",
+                         [(search_name(r['firstname'], r['lastname']), r['id']) for r in rows])
+        conn.commit()
+    return len(rows)
+
+
+def build_filters(race_id: int, nationality: Optional[str] = None, status: Optional[str] = None,
+                  gender: Optional[str] = None, name: Optional[str] = None) -> Tuple[List[str], List[Any]]:
+    """WHERE clauses and parameters for the server-side filters (always one race)"""
+    clauses, params = ["race_id = ?"], [race_id]
+    if nationality:
+        clauses.append("nationality = ?")
+        params.append(nationality.upper())
+    if status:
+        clauses.append("match_status = ?")
+        params.append(status)
+    if gender:
+        clauses.append("gender = ?")
+        params.append(gender.upper())
+    if name:
+        # Range scan on idx_runners_race_search_name instead of LIKE 'x%'
+        prefix = search_name('', name)
+        clauses.append("search_name >= ? AND search_name < ?")
+        params += [prefix, prefix + '\U0010ffff']
+    return clauses, params
+
+
+def resolve_columns(conn, columns: Optional[str]) -> Tuple[str, ...]:
+    """Validate a --columns list against the runners table"""
+    if not columns:
+        return DEFAULT_COLUMNS
+    available = {row[1] for row in conn.execute("PRAGMA table_info(runners)")}
+    requested = tuple(c.strip() for c in columns.split(',') if c.strip())
+    unknown = [c for c in requested if c not in available]
+    if unknown:
+        raise ValueError(f"Unknown column(s): {', '.join(unknown)} (available: {', '.join(sorted(available))})")
+    return requested
+
+
+def iter_runner_pages(conn, columns: Sequence[str], clauses: List[str], params: List[Any],
+                      after: Optional[str] = None, page_size: int = PAGE_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    """Yield pages of runners in entry_id order using the entry_id key of the previous page"""
+    projection = ', '.join(dict.fromkeys(('entry_id', *columns)))
+    while True:
+        where = list(clauses)
+        page_params = list(params)
+        if after is not None:
+            where.append("entry_id > ?")
+            page_params.append(after)
+        sql = f"SELECT {projection} FROM runners"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY entry_id LIMIT ?"
+        rows = [dict(row) for row in conn.execute(sql, (*page_params, page_size))]
+        if not rows:
+            return
+        yield rows
+        if len(rows) < page_size:
+            return
+        after = rows[-1]['entry_id']
+
+
+def fuzzy_search(conn, query: str, clauses: List[str], params: List[Any],
+                 limit: int = FUZZY_RESULTS) -> List[int]:
+    """Runner ids ranked by similarity of search_name to the query (best first)"""
+    target = search_name('', query)
+    target_tokens = target.split()
+    sql = "SELECT id, search_name FROM runners"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+
+    scored = []
+    for row in conn.execute(sql, params):
+        name = row['search_name'] or ''
+        # Compare against the name in both orders so "jorg muller" finds "muller jorg"
+        tokens = name.split()
+        score = max(
+            difflib.SequenceMatcher(None, target, name).ratio(),
+            difflib.SequenceMatcher(None, target, ' '.join(reversed(tokens))).ratio(),
+            sum(1 for t in target_tokens if any(n.startswith(t) for n in tokens)) / len(target_tokens)
+            if target_tokens else 0.0,
+        )
+        if score >= FUZZY_MIN_SCORE:
+            scored.append((score, row['id']))
+    return [runner_id for _, runner_id in heapq.nlargest(limit, scored)]
+
+
+def format_row(row: Dict[str, Any], columns: Sequence[str]) -> str:
+    cells = []
+    for column in columns:
+        _, width, align = COLUMN_FORMATS.get(column, (column, 12, '<'))
+        value = row.get(column)
+        text = '' if value is None else str(value)
+        cells.append(f"{text[:width]:{align}{width}}")
+    return ' '.join(cells)
+
+
+def format_header(columns: Sequence[str]) -> str:
+    cells = []
+    for column in columns:
+        title, width, align = COLUMN_FORMATS.get(column, (column, 12, '<'))
+        cells.append(f"{title[:max(width, 1)]:{align}{width}}")
+    header = ' '.join(cells)
+    return f"{header}\n{'=' * len(header)}"
+
+
+def print_races(db_path: str):
+    """List the races in the database, newest first"""
+    races = list_races(get_connection(db_path))
+    if not races:
+        print("No races found.", file=sys.stderr)
+        return
+    print(f"\n{'ID':>4} {'Date':10} {'Runners':>7} Name")
+    print("=" * 60)
+    for race in races:
+        print(f"{race['id']:>4} {race['race_date']:10} {race['runners']:>7} {race['name']}")
+
+
+def view_runners(db_path: str, filter_country: Optional[str] = None, status: Optional[str] = None,
+                 gender: Optional[str] = None, name: Optional[str] = None, fuzzy: Optional[str] = None,
+                 columns: Optional[str] = None, page_size: Optional[int] = None, after: Optional[str] = None,
+                 race: Optional[str] = None):
+    """Print a race's runners page by page (or the best fuzzy matches) with the selected columns"""
+    conn = get_connection(db_path)
+    refresh_search_names(conn)
+    race = resolve_race(conn, race)
+    selected = resolve_columns(conn, columns)
+    clauses, params = build_filters(race['id'], filter_country, status, gender, name)
+
+    if fuzzy:
+        ids = fuzzy_search(conn, fuzzy, clauses, params)
+        projection = ', '.join(selected)
+        placeholders = ', '.join('?' for _ in ids)
+        by_id = {row['id']: dict(row) for row in conn.execute(
+            f"SELECT id, {projection} FROM runners WHERE id IN ({placeholders})", ids
+        )} if ids else {}
+        runners = [by_id[i] for i in ids]
+        if not runners:
+            print("No runners found.", file=sys.stderr)
+            return
+        print(f"\nBest matches for \"{fuzzy}\" in {race['name']}: {len(runners)}\n")
+        print(format_header(selected))
+        for r in runners:
+            print(format_row(r, selected))
+        return
 
-    cursor.execute(query, params)
-    runners = [dict(row) for row in cursor.fetchall()]
+    # --page-size prints a single page and the key to continue from
+    single_page = page_size is not None
+    shown = 0
+    last_entry = None
+    for page in iter_runner_pages(conn, selected, clauses, params, after, page_size or PAGE_SIZE):
+        if shown == 0:
+            print(f"\n{race['name']} ({race['race_date']})\n")
+            print(format_header(selected))
+        for r in page:
+            print(format_row(r, selected))
+        shown += len(page)
+        last_entry = page[-1]['entry_id']
+        if single_page:
+            break
 
-    if not runners:
+    if not shown:
         print("No runners found.", file=sys.stderr)
-        conn.close()
         return
 
-    print(f"\nTotal runners: {len(runners)}\n")
-    print(f"{'ID':>4} {'Entry':>6} {'First Name':20} {'Last Name':20} {'Nat':3} {'G':1} {'Match':12}")
-    print("=" * 90)
+    print(f"\nShown: {shown} runners")
+    if single_page and shown == page_size:
+        print(f"Next page: --page-size {page_size} --after {last_entry}")
 
-    for r in runners:
-        match_status = r.get('match_status', 'unmatched')[:12]
-        print(f"{r['id']:>4} {r['entry_id']:>6} {r['firstname'][:20]:20} {r['lastname'][:20]:20} "
-              f"{r['nationality']:3} {r['gender']:1} {match_status:12}")
 
-    conn.close()
+def load_runner(db_path: str, runner_id: int) -> Optional[Dict[str, Any]]:
+    """Reload a single runner after an edit"""
+    row = get_connection(db_path).execute("SELECT * FROM runners WHERE id = ?", (runner_id,)).fetchone()
+    return dict(row) if row else None
 
 
 def edit_runner(db_path: str, runner_id: int, firstname: str = None, lastname: str = None):
     """Edit a runner's name"""
-    conn = sqlite3.connect(db_path)
+    conn = get_connection(db_path)
     cursor = conn.cursor()
 
     if firstname and lastname:
@@ -74,66 +266,63 @@ def edit_runner(db_path: str, runner_id: int, firstname: str = None, lastname: s
         print(f"✓ Updated runner {runner_id} lastname: {lastname}")
 
     conn.commit()
-    conn.close()
+    refresh_search_names(conn)
 
 
-def interactive_edit(db_path: str):
-    """Interactive editing mode"""
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
+def interactive_edit(db_path: str, filter_country: Optional[str] = None, status: Optional[str] = None,
+                     gender: Optional[str] = None, name: Optional[str] = None, after: Optional[str] = None,
+                     race: Optional[str] = None):
+    """Interactive editing mode, one page of a race's runners in memory at a time"""
+    conn = get_connection(db_path)
+    refresh_search_names(conn)
+    race = resolve_race(conn, race)
+    clauses, params = build_filters(race['id'], filter_country, status, gender, name)
 
-    cursor.execute("SELECT * FROM runners ORDER BY entry_id")
-    runners = [dict(row) for row in cursor.fetchall()]
-    conn.close()
+    count_clauses = clauses + (["entry_id > ?"] if after is not None else [])
+    count_params = params + ([after] if after is not None else [])
+    total = conn.execute(f"SELECT COUNT(*) FROM runners WHERE {' AND '.join(count_clauses)}",
+                         count_params).fetchone()[0]
 
-    print(f"\nInteractive Edit Mode - {len(runners)} runners")
+    print(f"\nInteractive Edit Mode - {total} runners in {race['name']}")
     print("Commands: [n]ext, [e]dit, [s]wap names, [q]uit\n")
 
-    i = 0
-    while i < len(runners):
-        r = runners[i]
-        print(f"\n[{i+1}/{len(runners)}] ID:{r['id']} Entry:{r['entry_id']}")
-        print(f"  Name: {r['firstname']} {r['lastname']}")
-        print(f"  Nationality: {r['nationality']} | Gender: {r['gender']}")
-        print(f"  Match: {r.get('match_status', 'unmatched')}")
-
-        try:
-            cmd = input("\nCommand [n/e/s/q]: ").strip().lower()
-
-            if cmd == 'q':
-                break
-            elif cmd == 'n' or cmd == '':
-                i += 1
-            elif cmd == 's':
-                # Swap firstname and lastname
-                edit_runner(db_path, r['id'], r['lastname'], r['firstname'])
-                print(f"✓ Swapped: {r['lastname']} {r['firstname']}")
-                # Reload
-                conn = sqlite3.connect(db_path)
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
-                cursor.execute("SELECT * FROM runners ORDER BY entry_id")
-                runners = [dict(row) for row in cursor.fetchall()]
-                conn.close()
-            elif cmd == 'e':
-                new_first = input(f"  Firstname [{r['firstname']}]: ").strip() or r['firstname']
-                new_last = input(f"  Lastname [{r['lastname']}]: ").strip() or r['lastname']
-                edit_runner(db_path, r['id'], new_first, new_last)
-                # Reload
-                conn = sqlite3.connect(db_path)
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
-                cursor.execute("SELECT * FROM runners ORDER BY entry_id")
-                runners = [dict(row) for row in cursor.fetchall()]
-                conn.close()
-                i += 1
-            else:
-                print("Unknown command")
-
-        except (EOFError, KeyboardInterrupt):
-            print("\nExiting...")
-            break
+    position = 0
+    for page in iter_runner_pages(conn, ('*',), clauses, params, after):
+        i = 0
+        while i < len(page):
+            r = page[i]
+            print(f"\n[{position + i + 1}/{total}] ID:{r['id']} Entry:{r['entry_id']}")
+            print(f"  Name: {r['firstname']} {r['lastname']}")
+            print(f"  Nationality: {r['nationality']} | Gender: {r['gender']}")
+            print(f"  Match: {r.get('match_status', 'unmatched')}")
+
+            try:
+                cmd = input("\nCommand [n/e/s/q]: ").strip().lower()
+
+                if cmd == 'q':
+                    print(f"\nDone!")
+                    return
+                elif cmd == 'n' or cmd == '':
+                    i += 1
+                elif cmd == 's':
+                    # Swap firstname and lastname
+                    edit_runner(db_path, r['id'], r['lastname'], r['firstname'])
+                    print(f"✓ Swapped: {r['lastname']} {r['firstname']}")
+                    # Only the edited row changed; entry_id order is unaffected
+                    page[i] = load_runner(db_path, r['id']) or r
+                elif cmd == 'e':
+                    new_first = input(f"  Firstname [{r['firstname']}]: ").strip() or r['firstname']
+                    new_last = input(f"  Lastname [{r['lastname']}]: ").strip() or r['lastname']
+                    edit_runner(db_path, r['id'], new_first, new_last)
+                    page[i] = load_runner(db_path, r['id']) or r
+                    i += 1
+                else:
+                    print("Unknown command")
+
+            except (EOFError, KeyboardInterrupt):
+                print("\nExiting...")
+                return
+        position += len(page)
 
     print(f"\nDone!")
 
@@ -141,7 +330,16 @@ def interactive_edit(db_path: str):
 def main():
     parser = argparse.ArgumentParser(description='View and edit runners in database')
     parser.add_argument('--db-path', default='data/iau24hwc.db', help='Path to SQLite database')
-    parser.add_argument('--filter', help='Filter by country code (e.g., DEN)')
+    parser.add_argument('--race', help='Race id or name to show (default: the latest race)')
+    parser.add_argument('--list-races', action='store_true', help='List the races in the database')
+    parser.add_argument('--filter', '--nationality', dest='filter', help='Filter by country code (e.g., DEN)')
+    parser.add_argument('--status', help='Filter by match status (unmatched, auto-matched, manually-matched, no-match)')
+    parser.add_argument('--gender', choices=['M', 'W', 'm', 'w'], help='Filter by gender')
+    parser.add_argument('--name', help='Name prefix, surname first (accents and case ignored)')
+    parser.add_argument('--fuzzy', help='Show the runners whose name best matches this text')
+    parser.add_argument('--columns', help=f"Comma-separated columns to show (default: {','.join(DEFAULT_COLUMNS)})")
+    parser.add_argument('--page-size', type=int, help='Show a single page of this many runners')
+    parser.add_argument('--after', help='Start after this entry_id (continue from a previous page)')
     parser.add_argument('--edit', action='store_true', help='Interactive edit mode')
     parser.add_argument('--id', type=int, help='Edit specific runner by ID')
     parser.add_argument('--firstname', help='New firstname')
@@ -149,16 +347,24 @@ def main():
 
     args = parser.parse_args()
 
-    db_path = args.db_path
-    if not os.path.isabs(db_path):
-        db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), db_path)
+    db_path = resolve_db_path(args.db_path)
 
     if not os.path.exists(db_path):
         print(f"ERROR: Database not found: {db_path}", file=sys.stderr)
         sys.exit(1)
 
-    if args.edit:
-        interactive_edit(db_path)
+    if args.page_size is not None and args.page_size < 1:
+        print("ERROR: --page-size must be at least 1", file=sys.stderr)
+        sys.exit(1)
+
+    if args.list_races:
+        print_races(db_path)
+    elif args.edit:
+        try:
+            interactive_edit(db_path, args.filter, args.status, args.gender, args.name, args.after, args.race)
+        except ValueError as e:
+            print(f"ERROR: {e}", file=sys.stderr)
+            sys.exit(1)
     elif args.id:
         if args.firstname or args.lastname:
             edit_runner(db_path, args.id, args.firstname, args.lastname)
@@ -166,7 +372,12 @@ def main():
             print("ERROR: Must provide --firstname and/or --lastname with --id")
             sys.exit(1)
     else:
-        view_runners(db_path, args.filter)
+        try:
+            view_runners(db_path, args.filter, args.status, args.gender, args.name, args.fuzzy,
+                         args.columns, args.page_size, args.after, args.race)
+        except ValueError as e:
+            print(f"ERROR: {e}", file=sys.stderr)
+            sys.exit(1)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,67 @@
+"""
+Shared fixtures for the Python tool tests (python -m pytest from the repository root).
+
+The tools are scripts with hyphenated names in scripts/ and lib/pdf/, so they
+are loaded by path, the way iau24.cli loads them; lib/db and lib/pdf are put on
+sys.path as the scripts do themselves.
+"""
+
+import os
+import sys
+import sqlite3
+import importlib.util
+from types import ModuleType
+from typing import Dict
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for lib_dir in ('db', 'pdf'):
+    path = os.path.join(REPO_ROOT, 'lib', lib_dir)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+_scripts: Dict[str, ModuleType] = {}
+
+
+def _load(relative_path: str) -> ModuleType:
+    module = _scripts.get(relative_path)
+    if module is None:
+        path = os.path.join(REPO_ROOT, relative_path)
+        name = os.path.splitext(os.path.basename(path))[0].replace('-', '_')
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _scripts[relative_path] = module
+    return module
+
+
+@pytest.fixture(scope='session')
+def load_script():
+    """load_script('scripts/fetch-performances.py') -> the script as a module (loaded once)"""
+    return _load
+
+
+@pytest.fixture
+def conn(tmp_path):
+    """A fresh database with lib/db/schema.sql applied and one race (id 1, 2025-10-17)"""
+    from sqlite_db import connect
+
+    connection = connect(str(tmp_path / 'test.db'))
+    connection.row_factory = sqlite3.Row
+    connection.execute("INSERT INTO races (id, name, race_date) VALUES (1, 'Test Championship', '2025-10-17')")
+    connection.commit()
+    yield connection
+    connection.close()
+
+
+@pytest.fixture
+def add_runner(conn):
+    """add_runner(entry_id='1', lastname='Smith', ...) -> runner id, with defaults for the required columns"""
+    def add(**fields) -> int:
+        row = {'race_id': 1, 'entry_id': '1', 'firstname': 'Anna', 'lastname': 'Smith',
+               'nationality': 'SWE', 'gender': 'W', **fields}
+        cursor = conn.execute(
+            f"INSERT INTO runners ({', '.join(row)}) VALUES ({', '.join('?' * len(row))})", tuple(row.values()))
+        return cursor.lastrowid
+    return add
@@ -0,0 +1,63 @@
+"""Header role mapping shared by the entry list parsers (lib/pdf/entry_list.py) and the CSV/XLSX importer"""
+
+import pytest
+
+from entry_list import infer_table_schema
+
+
+@pytest.mark.parametrize('header, expected', [
+    (('Bib', 'First name', 'Last name', 'Country', 'Gender'),
+     {'entryId': (0,), 'firstname': (1,), 'lastname': (2,), 'nationality': (3,), 'gender': (4,)}),
+    (('Dossard', 'Prénom', 'Nom', 'Pays', 'Sexe'),
+     {'entryId': (0,), 'firstname': (1,), 'lastname': (2,), 'nationality': (3,), 'gender': (4,)}),
+    (('Startnummer', 'Vorname', 'Nachname', 'Land', 'Geschlecht'),
+     {'entryId': (0,), 'firstname': (1,), 'lastname': (2,), 'nationality': (3,), 'gender': (4,)}),
+    (('#', 'Surname', 'Given name', 'Nation', 'M/W'),
+     {'entryId': (0,), 'lastname': (1,), 'firstname': (2,), 'nationality': (3,), 'gender': (4,)}),
+])
+def test_each_column_fills_one_role(header, expected):
+    assert infer_table_schema(header) == expected
+
+
+def test_prenom_is_not_a_lastname():
+    schema = infer_table_schema(('Prénom', 'Nom'))
+    assert schema['firstname'] == (0,)
+    assert schema['lastname'] == (1,)
+
+
+@pytest.fixture
+def importer(load_script):
+    return load_script('scripts/import-entry-list.py')
+
+
+def write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+
+def test_french_csv(tmp_path, importer):
+    path = write(tmp_path, 'inscrits.csv',
+                 "Liste des inscrits\n"
+                 "Dossard;Prénom;Nom;Pays;Sexe\n"
+                 "12;Aurélie;DUPONT;FRA;F\n"
+                 "13;Jean-Pierre;Martin;BEL;H\n")
+    runners, stats = importer.read_entry_list(path)
+    assert [(r['entry_id'], r['firstname'], r['lastname'], r['nationality']) for r in runners] == [
+        ('12', 'Aurélie', 'Dupont', 'FRA'),
+        ('13', 'Jean-Pierre', 'Martin', 'BEL'),
+    ]
+    assert [r['gender'] for r in runners] == ['W', 'M']  # F(emme), H(omme)
+    assert stats == {'imported': 2, 'skipped': 0, 'duplicates': 0}
+
+
+def test_german_csv(tmp_path, importer):
+    path = write(tmp_path, 'meldeliste.csv',
+                 "Nr,Vorname,Nachname,Land,Geschlecht\n"
+                 "1,Jürgen,Müller,GER,M\n"
+                 "R,Anna,Schmidt,AUT,W\n")
+    runners, _ = importer.read_entry_list(path)
+    assert [(r['entry_id'], r['firstname'], r['lastname'], r['gender']) for r in runners] == [
+        ('1', 'Jürgen', 'Müller', 'M'),
+        ('R1', 'Anna', 'Schmidt', 'W'),
+    ]
@@ -0,0 +1,95 @@
+"""Entry list PDF parsing helpers (lib/pdf/parse-entry-list.py) that run without Docling"""
+
+import pytest
+
+
+@pytest.fixture(scope='module')
+def parser(load_script):
+    return load_script('lib/pdf/parse-entry-list.py')
+
+
+@pytest.mark.parametrize('total, per_range, expected', [
+    (10, 4, [(1, 4), (5, 8), (9, 10)]),
+    (8, 4, [(1, 4), (5, 8)]),
+    (3, 4, [(1, 3)]),
+    (9, 0, [(1, 9)]),
+])
+def test_page_ranges_cover_every_page_once(parser, total, per_range, expected):
+    assert parser.page_ranges(total, per_range) == expected
+
+
+class FakeTable:
+    """Stands in for a Docling TableItem"""
+
+    def __init__(self, columns, rows):
+        self.columns = columns
+        self.rows = rows
+
+    def export_to_dataframe(self):
+        import pandas as pd
+        return pd.DataFrame(self.rows, columns=self.columns, dtype=object)
+
+
+def extract_row_by_row(table):
+    """The per-row loop extract_from_table replaced, on the same column roles"""
+    from entry_list import EMPTY_CELLS, infer_table_schema, normalize_gender, normalize_name, normalize_nationality
+
+    schema = infer_table_schema(tuple(table.columns))
+    normalizers = {'entryId': str, 'firstname': normalize_name, 'lastname': normalize_name,
+                   'nationality': normalize_nationality, 'gender': normalize_gender}
+    runners = []
+    for row in table.rows:
+        runner = {}
+        for role, positions in schema.items():
+            cells = [str(row[p]).strip() for p in positions]
+            filled = [cell for cell in cells if cell not in EMPTY_CELLS]
+            runner[role] = normalizers[role](filled[0]) if filled else None
+        if all(runner.get(role) is not None for role in ('firstname', 'lastname', 'nationality', 'gender')):
+            runner['entryId'] = runner.get('entryId') or str(len(runners) + 1)
+            runners.append({role: runner[role] for role in ('entryId', 'firstname', 'lastname', 'nationality', 'gender')})
+    return runners
+
+
+def test_extract_from_table_reads_the_columns(parser):
+    table = FakeTable(['Bib', 'Surname', 'First name', 'Country', 'Sex'], [
+        ['12', 'SMITH', ' anna ', 'swe', 'F'],
+        ['13', 'berg', 'Bo', 'nor', 'male'],
+        ['14', 'Lind', '', 'FIN', 'W'],  # No first name: skipped
+    ])
+    assert parser.extract_from_table(table) == [
+        {'entryId': '12', 'firstname': 'Anna', 'lastname': 'Smith', 'nationality': 'SWE', 'gender': 'W'},
+        {'entryId': '13', 'firstname': 'Bo', 'lastname': 'Berg', 'nationality': 'NOR', 'gender': 'M'},
+    ]
+
+
+def test_extract_from_table_numbers_rows_without_ids(parser):
+    table = FakeTable(['Nachname', 'Vorname', 'Land', 'Geschlecht'], [
+        ['Ehm', 'Moritz', 'GER', 'M'],
+        ['', 'Nobody', 'GER', 'M'],
+        ['Weber', 'Lena', 'GER', 'W'],
+    ])
+    assert [r['entryId'] for r in parser.extract_from_table(table)] == ['1', '2']
+
+
+def test_extract_from_table_without_name_columns_is_empty(parser):
+    assert parser.extract_from_table(FakeTable(['Rank', 'Time'], [['1', '7:12:33']])) == []
+    assert parser.extract_from_table(FakeTable(['Bib', 'Name', 'Nat', 'Sex'], [])) == []
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_extract_from_table_matches_the_row_by_row_loop(parser, seed):
+    import random
+    rng = random.Random(seed)
+    columns = ['Nr', 'Bib', 'Surname', 'First name', 'Given name', 'Nat', 'Sex']
+    choices = {
+        'Nr': ['1', '2', '17', '', 'nan', None],
+        'Bib': ['5', 'R', '', None],
+        'Surname': ['smith', 'Berg', ' de la cruz ', '', None],
+        'First name': ['anna', 'Bo', '', 'nan'],
+        'Given name': ['Cleo', '', None],
+        'Nat': ['SWE', 'nor', 'United States', 'GB', '', None],
+        'Sex': ['M', 'w', 'F', 'x', '', None],
+    }
+    rows = [[rng.choice(choices[column]) for column in columns] for _ in range(300)]
+    table = FakeTable(columns, rows)
+    assert parser.extract_from_table(table) == extract_row_by_row(table)
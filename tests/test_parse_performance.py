@@ -0,0 +1,88 @@
+"""DUV event and result parsing (scripts/fetch-performances.py)"""
+
+import pytest
+
+
+@pytest.fixture(scope='module')
+def fetch(load_script):
+    return load_script('scripts/fetch-performances.py')
+
+
+@pytest.mark.parametrize('event_type, expected', [
+    ('24h', ('timed', None, 86400)),
+    ('6d', ('timed', None, 6 * 86400)),
+    ('15:38h', ('timed', None, 15 * 3600 + 38 * 60)),
+    ('100km', ('distance', 100.0, None)),
+    ('50K', ('distance', 50.0, None)),
+    ('100mi', ('distance', 160.934, None)),
+    ('100km/3stages', ('distance', 100.0, None)),
+    ('Backyard', (None, None, None)),
+    ('', (None, None, None)),
+])
+def test_classify_event(fetch, event_type, expected):
+    assert fetch.classify_event(event_type) == expected
+
+
+@pytest.mark.parametrize('text, seconds', [
+    ('7:12:33 h', 7 * 3600 + 12 * 60 + 33),
+    ('2d 10:04:38 h', 2 * 86400 + 10 * 3600 + 4 * 60 + 38),
+    ('15:53 h', 15 * 3600 + 53 * 60),
+    ('245.123 km', None),
+    ('', None),
+])
+def test_parse_duration(fetch, text, seconds):
+    assert fetch.parse_duration(text) == seconds
+
+
+def test_timed_event_result_is_the_distance(fetch):
+    assert fetch.parse_performance('24h', '245.123 km') == (245.123, 245.123, 86400)
+    assert fetch.parse_performance('12h', '130,5 km') == (130.5, 130.5, 43200)
+
+
+def test_distance_event_result_is_the_time(fetch):
+    # distance keeps the legacy value (the leading number), distance_km is the event length
+    assert fetch.parse_performance('100km', '7:12:33 h') == (7.0, 100.0, 25953)
+    assert fetch.parse_performance('100mi', '1d 02:00:00 h') == (1.0, 160.934, 93600)
+
+
+def test_unknown_event_keeps_the_number_only(fetch):
+    assert fetch.parse_performance('Backyard', '40 laps') == (40.0, None, None)
+
+
+@pytest.mark.parametrize('event_type, text', [('24h', 'DNF'), ('100km', 'DNF'), ('100km', '')])
+def test_unparseable_results(fetch, event_type, text):
+    assert fetch.parse_performance(event_type, text) is None
+
+
+@pytest.mark.parametrize('distance, seconds', [
+    (155339.0, 15 * 3600 + 53 * 60 + 39),
+    (5339.0, 53 * 60 + 39),
+    (15.0, None),  # A bare hour count cannot be recovered
+    (156099.0, None),  # 60 seconds
+    (1020000.0, None),  # '1d 02:00:00 h' packed
+    (155339.5, None),
+    (None, None),
+])
+def test_legacy_duration(fetch, distance, seconds):
+    assert fetch.legacy_duration(distance) == seconds
+
+
+def test_backfill_leaves_first_number_rows_unresolved(fetch, conn):
+    rows = [
+        # (distance, performance_text): Python fetcher, web fetcher, and a row with the raw result
+        (7.0, None),
+        (71233.0, None),
+        (7.0, '7:12:33 h'),
+    ]
+    conn.executemany("""
+        INSERT INTO performances (duv_id, event_id, event_name, event_date, distance, event_type, performance_text)
+        VALUES (42, ?, 'Test 100km', '2024-05-01', ?, '100km', ?)
+    """, [(event_id, distance, text) for event_id, (distance, text) in enumerate(rows, 1)])
+
+    assert fetch.backfill_parsed_performances(conn) == (3, 1)
+    assert [tuple(row) for row in conn.execute(
+        "SELECT distance_km, duration_sec FROM performances ORDER BY event_id")] == [
+        (100.0, None),
+        (100.0, 7 * 3600 + 12 * 60 + 33),
+        (100.0, 7 * 3600 + 12 * 60 + 33),
+    ]
@@ -0,0 +1,74 @@
+"""Job cancellation in scripts/pdf-parse-worker.py (Docling replaced by a stub parser)"""
+
+import sys
+
+import pytest
+
+RUNNERS = [{'entry_id': '1', 'firstname': 'Anna', 'lastname': 'Smith', 'nationality': 'SWE', 'gender': 'W'}]
+
+
+@pytest.fixture
+def worker_module(load_script):
+    return load_script('scripts/pdf-parse-worker.py')
+
+
+@pytest.fixture
+def saves(worker_module, monkeypatch):
+    saved = []
+    monkeypatch.setattr(worker_module, 'save_runners', lambda runners, *a, **kw: saved.append(runners))
+    return saved
+
+
+def make_worker(worker_module, monkeypatch, parse):
+    monkeypatch.setattr(worker_module.backend, 'parse_pdf', parse)
+    return worker_module.ParseWorker('unused.db', queue_size=2)
+
+
+def test_job_saves_when_not_cancelled(worker_module, monkeypatch, saves):
+    worker = make_worker(worker_module, monkeypatch, lambda path, **kw: RUNNERS)
+    job = worker_module.Job(b'%PDF-1.7', save=True)
+    worker.run_job(job)
+    assert job.done.is_set() and job.result['count'] == 1
+    assert saves == [RUNNERS]
+    assert (worker.completed, worker.cancelled) == (1, 0)
+
+
+def test_queued_job_cancelled_before_it_starts_is_dropped(worker_module, monkeypatch, saves):
+    parsed = []
+    worker = make_worker(worker_module, monkeypatch, lambda path, **kw: parsed.append(path) or RUNNERS)
+    job = worker_module.Job(b'%PDF-1.7', save=True)
+    assert job.cancel()
+    worker.run_job(job)
+    assert job.done.is_set()
+    assert parsed == [] and saves == []
+    assert worker.cancelled == 1
+
+
+def test_job_cancelled_while_parsing_is_not_saved(worker_module, monkeypatch, saves):
+    job = worker_module.Job(b'%PDF-1.7', save=True)
+
+    def slow_parse(path, **kw):
+        job.cancel()  # The request times out during the conversion
+        return RUNNERS
+
+    worker = make_worker(worker_module, monkeypatch, slow_parse)
+    worker.run_job(job)
+    assert job.result is None and job.error is None
+    assert saves == []
+    assert (worker.completed, worker.failed, worker.cancelled) == (0, 0, 1)
+
+
+def test_save_in_progress_cannot_be_cancelled(worker_module):
+    job = worker_module.Job(b'%PDF-1.7', save=True)
+    assert job.start_save()
+    assert not job.cancel()
+    assert not job.cancelled
+
+
+def test_warm_up_without_docling_raises_instead_of_exiting(worker_module, monkeypatch):
+    import docling_convert
+    monkeypatch.setitem(sys.modules, 'docling.document_converter', None)  # import now fails
+    monkeypatch.setattr(docling_convert, '_converters', {})
+    worker = worker_module.ParseWorker('unused.db', queue_size=2)
+    with pytest.raises(RuntimeError, match='pip install'):
+        worker.warm_up()
@@ -0,0 +1,52 @@
+"""COPY text and CSV encoders and chunk files of the Postgres sync (lib/db/pg_sync.py)"""
+
+import csv
+import gzip
+import io
+import os
+
+from pg_sync import copy_line, csv_line, write_chunks
+
+FLAGS = [False, False, True, False]
+
+
+def test_copy_line_escapes_and_nulls():
+    row = (7, 'tab\there\\ and\nnewline\r', 1, None)
+    assert copy_line(row, FLAGS) == '7\ttab\\there\\\\ and\\nnewline\\r\tt\t\\N\n'
+
+
+def test_copy_line_keeps_empty_strings_and_float_precision():
+    assert copy_line(('', 245.1234567891, 0, 0.0), FLAGS) == '\t245.1234567891\tf\t0.0\n'
+
+
+def test_csv_line_tells_null_from_empty_string():
+    assert csv_line((None, '', 0, None), FLAGS) == ',"","f",\n'
+
+
+def test_csv_line_quotes_text_but_not_numbers():
+    line = csv_line((3, 'say "hi", then\nleave', 1, 1.5), FLAGS)
+    assert line == '3,"say ""hi"", then\nleave","t",1.5\n'
+    assert next(csv.reader(io.StringIO(line))) == ['3', 'say "hi", then\nleave', 't', '1.5']
+
+
+def test_write_chunks_splits_by_rows_and_is_deterministic(tmp_path):
+    rows = [(i, f"name {i}", i % 2, None) for i in range(5)]
+    columns = ['id', 'name', 'dns', 'duv_id']
+
+    first = write_chunks(rows, str(tmp_path), 'runners', columns, ('dns',), 'csv.gz', 2, 1 << 20)
+    assert [(c['file'], c['rows']) for c in first] == [
+        ('runners.0001.csv.gz', 2), ('runners.0002.csv.gz', 2), ('runners.0003.csv.gz', 1)]
+    with gzip.open(os.path.join(tmp_path, first[0]['file']), 'rt') as f:
+        assert f.read() == 'id,name,dns,duv_id\n0,"name 0","f",\n1,"name 1","t",\n'
+
+    # Same rows, same bytes: a rerun's checksums match the loaded chunks
+    (tmp_path / 'again').mkdir()
+    again = write_chunks(rows, str(tmp_path / 'again'), 'runners', columns, ('dns',), 'csv.gz', 2, 1 << 20)
+    assert [c['sha256'] for c in again] == [c['sha256'] for c in first]
+
+
+def test_write_chunks_splits_by_bytes(tmp_path):
+    rows = [(i, 'x' * 100, 0, None) for i in range(4)]
+    chunks = write_chunks(rows, str(tmp_path), 'p', ['id', 'name', 'dns', 'duv_id'], ('dns',), 'copy', 100, 150)
+    assert [c['rows'] for c in chunks] == [2, 2]
+    assert sum(c['bytes'] for c in chunks) == sum(len(copy_line(r, FLAGS)) for r in rows)
@@ -0,0 +1,37 @@
+"""The refresh daemon's queue in scripts/fetch-performances.py"""
+
+import pytest
+
+
+@pytest.fixture
+def fetch(load_script):
+    return load_script('scripts/fetch-performances.py')
+
+
+def test_recently_fetched_runners_are_not_queued(conn, add_runner, fetch):
+    # Seeded and raced recently: weighted x12, so 5h fresh would outrank 40h stale
+    seeded = add_runner(entry_id='1', duv_id=1, match_status='auto-matched', personal_best_last_2_years=250.0,
+                        duv_fetched_at=conn.execute("SELECT datetime('now', '-5 hours')").fetchone()[0])
+    conn.execute("INSERT INTO performances (duv_id, event_id, event_name, event_date, distance, event_type) "
+                 "VALUES (1, 1, 'Race', date('now', '-2 days'), 200, '24h')")
+    stale = add_runner(entry_id='2', duv_id=2, match_status='auto-matched',
+                       duv_fetched_at=conn.execute("SELECT datetime('now', '-40 hours')").fetchone()[0])
+    never = add_runner(entry_id='3', duv_id=3, match_status='manually-matched')
+
+    heap = fetch.build_refresh_queue(conn, 1)
+    assert {entry[1] for entry in heap} == {stale, never}
+    assert seeded not in {entry[1] for entry in heap}
+    assert heap[0][1] == never  # Never fetched goes first
+
+
+def test_backing_off_runners_are_not_queued(conn, add_runner, fetch):
+    add_runner(entry_id='1', duv_id=1, match_status='auto-matched')
+    conn.execute("INSERT INTO fetch_failures (duv_id, runner_id, attempts, last_error, next_attempt_at) "
+                 "VALUES (1, 1, 1, 'timeout', datetime('now', '+1 hour'))")
+    assert fetch.build_refresh_queue(conn, 1) == []
+
+
+@pytest.mark.parametrize('requests_per_hour', [0, -5])
+def test_daemon_rejects_a_non_positive_budget(fetch, requests_per_hour):
+    with pytest.raises(ValueError, match='requests-per-hour'):
+        fetch.run_refresh_daemon('unused.db', requests_per_hour=requests_per_hour)
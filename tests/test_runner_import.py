@@ -0,0 +1,77 @@
+"""Incremental entry list diffs (lib/db/runner_import.py)"""
+
+from runner_import import diff_runners, import_runners
+
+
+def runner(entry_id, firstname, lastname, nationality='SWE', gender='W'):
+    return {'entry_id': entry_id, 'firstname': firstname, 'lastname': lastname,
+            'nationality': nationality, 'gender': gender}
+
+
+def row(id, *args, dns=0, **kwargs):
+    return dict(runner(*args, **kwargs), id=id, dns=dns)
+
+
+def ids(rows):
+    return sorted(r['id'] for r in rows)
+
+
+def test_unchanged_list_has_no_changes():
+    existing = [row(1, '1', 'Anna', 'Smith'), row(2, '2', 'Bo', 'Berg', 'NOR', 'M')]
+    diff = diff_runners(existing, [runner('1', 'Anna', 'Smith'), runner('2', 'Bo', 'Berg', 'NOR', 'M')])
+    assert ids(diff['unchanged']) == [1, 2]
+    assert diff['inserts'] == diff['updates'] == diff['withdrawn'] == []
+
+
+def test_shifted_entry_ids_match_by_name():
+    # Runner 1 withdrew, so everyone after moved up one entry id
+    existing = [row(1, '1', 'Anna', 'Smith'), row(2, '2', 'Cleo', 'Lind'), row(3, '3', 'Dana', 'Ek')]
+    diff = diff_runners(existing, [runner('1', 'Cleo', 'Lind'), runner('2', 'Dana', 'Ek')])
+    assert [(old['id'], new['entry_id']) for old, new in diff['updates']] == [(2, '1'), (3, '2')]
+    assert ids(diff['withdrawn']) == [1]
+    assert diff['inserts'] == []
+
+
+def test_corrected_name_keeps_the_runner():
+    existing = [row(1, '7', 'Ana', 'Smith')]
+    diff = diff_runners(existing, [runner('7', 'Anna', 'Smith')])
+    [(old, new)] = diff['updates']
+    assert old['id'] == 1 and new['firstname'] == 'Anna'
+    assert diff['inserts'] == diff['withdrawn'] == []
+
+
+def test_corrected_firstname_with_moved_entry_id_needs_a_unique_surname():
+    existing = [row(1, '7', 'Ana', 'Smith'), row(2, '8', 'Jo', 'Berg'), row(3, '9', 'Jon', 'Berg')]
+    parsed = [runner('3', 'Anna', 'Smith'), runner('4', 'Joe', 'Berg'), runner('5', 'Jonny', 'Berg')]
+    diff = diff_runners(existing, parsed)
+    assert [(old['id'], new['firstname']) for old, new in diff['updates']] == [(1, 'Anna')]
+    # Two Bergs on each side: no guessing, they are replaced
+    assert [r['firstname'] for r in diff['inserts']] == ['Joe', 'Jonny']
+    assert ids(diff['withdrawn']) == [2, 3]
+
+
+def test_withdrawn_runner_is_reinstated_when_back_on_the_list():
+    existing = [row(1, '1', 'Anna', 'Smith', dns=1)]
+    diff = diff_runners(existing, [runner('1', 'Anna', 'Smith')])
+    assert [old['id'] for old, _ in diff['updates']] == [1]
+    # Already DNS rows are not withdrawn again when they stay missing
+    assert diff_runners(existing, [])['withdrawn'] == []
+
+
+def test_reappearing_name_prefers_the_active_runner():
+    existing = [row(1, '1', 'Anna', 'Smith', dns=1), row(2, '5', 'Anna', 'Smith')]
+    diff = diff_runners(existing, [runner('3', 'Anna', 'Smith')])
+    assert [old['id'] for old, _ in diff['updates']] == [2]
+    assert diff['withdrawn'] == []
+
+
+def test_incremental_import_keeps_matches(conn, add_runner):
+    kept = add_runner(entry_id='1', firstname='Anna', lastname='Smith', duv_id=123, match_status='auto-matched')
+    dropped = add_runner(entry_id='2', firstname='Bo', lastname='Berg', nationality='NOR', gender='M')
+
+    summary = import_runners(conn, [runner('1', 'Anna', 'Smith'), runner('3', 'Cleo', 'Lind')], 1, incremental=True)
+
+    assert summary == {'inserted': 1, 'updated': 0, 'unchanged': 1, 'withdrawn': 1}
+    rows = {r['id']: r for r in conn.execute("SELECT id, duv_id, dns FROM runners")}
+    assert rows[kept]['duv_id'] == 123 and rows[kept]['dns'] == 0
+    assert rows[dropped]['dns'] == 1
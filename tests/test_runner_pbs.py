@@ -0,0 +1,87 @@
+"""materialize_runner_pbs() in scripts/fetch-performances.py"""
+
+import pytest
+
+
+@pytest.fixture
+def fetch(load_script):
+    return load_script('scripts/fetch-performances.py')
+
+
+def add_result(conn, duv_id, event_type, event_date, distance_km=None, duration_sec=None):
+    conn.execute("""
+        INSERT INTO performances (duv_id, event_id, event_name, event_date, distance, event_type,
+                                  distance_km, duration_sec)
+        VALUES (?, 1, 'Race', ?, ?, ?, ?, ?)
+    """, (duv_id, event_date, distance_km or 0, event_type, distance_km, duration_sec))
+
+
+def pbs(conn, runner_id):
+    rows = conn.execute("SELECT * FROM runner_pbs WHERE runner_id = ? ORDER BY event_type", (runner_id,))
+    return {row['event_type']: dict(row) for row in rows}
+
+
+def test_timed_events_rank_by_distance(conn, add_runner, fetch):
+    runner = add_runner(duv_id=7)
+    add_result(conn, 7, '24h', '2019-05-01', distance_km=250.0)
+    add_result(conn, 7, '24h', '2024-05-01', distance_km=230.5)
+    add_result(conn, 7, '24h', '2025-03-01', distance_km=220.0)
+
+    assert fetch.materialize_runner_pbs(conn) == 1
+    pb = pbs(conn, runner)['24h']
+    assert (pb['pb_all_time'], pb['pb_all_time_year']) == (250.0, 2019)
+    # The window counts back from the race date (2025-10-17), so 2019 is outside it
+    assert (pb['pb_last_2_years'], pb['pb_last_2_years_year']) == (230.5, 2024)
+    assert (pb['season_best'], pb['season_best_year']) == (220.0, 2025)
+    assert pb['unit'] == 'km'
+    assert pb['race_count'] == 3
+
+
+def test_distance_events_rank_by_fastest_time(conn, add_runner, fetch):
+    runner = add_runner(duv_id=7)
+    add_result(conn, 7, '100km', '2023-06-01', distance_km=100.0, duration_sec=25000)
+    add_result(conn, 7, '100km', '2024-06-01', distance_km=100.0, duration_sec=24000)
+
+    fetch.materialize_runner_pbs(conn)
+    pb = pbs(conn, runner)['100km']
+    assert (pb['pb_all_time'], pb['pb_all_time_year']) == (24000, 2024)
+    assert pb['unit'] == 's'
+    assert pb['season_best'] is None  # Nothing in 2025
+
+
+def test_results_on_or_after_the_race_date_are_ignored(conn, add_runner, fetch):
+    runner = add_runner(duv_id=7)
+    add_result(conn, 7, '24h', '2024-05-01', distance_km=230.0)
+    add_result(conn, 7, '24h', '2025-10-17', distance_km=260.0)  # The championship itself
+    add_result(conn, 7, '24h', '2025-12-01', distance_km=270.0)
+
+    fetch.materialize_runner_pbs(conn)
+    pb = pbs(conn, runner)['24h']
+    assert pb['pb_all_time'] == 230.0
+    assert pb['race_count'] == 1
+
+
+def test_shared_history_gives_each_race_its_own_pbs(conn, add_runner, fetch):
+    conn.execute("INSERT INTO races (id, name, race_date) VALUES (2, 'Earlier', '2023-09-01')")
+    now = add_runner(duv_id=7)
+    then = add_runner(duv_id=7, race_id=2)
+    add_result(conn, 7, '24h', '2022-05-01', distance_km=200.0)
+    add_result(conn, 7, '24h', '2024-05-01', distance_km=240.0)
+
+    fetch.materialize_runner_pbs(conn)
+    assert pbs(conn, now)['24h']['pb_all_time'] == 240.0
+    assert pbs(conn, then)['24h']['pb_all_time'] == 200.0
+
+
+def test_scoped_rebuild_keeps_other_athletes(conn, add_runner, fetch):
+    first = add_runner(duv_id=7)
+    second = add_runner(entry_id='2', duv_id=8)
+    add_result(conn, 7, '24h', '2024-05-01', distance_km=230.0)
+    add_result(conn, 8, '24h', '2024-05-01', distance_km=210.0)
+    fetch.materialize_runner_pbs(conn)
+
+    conn.execute("UPDATE performances SET distance_km = 235.0 WHERE duv_id = 7")
+    conn.execute("UPDATE performances SET distance_km = 215.0 WHERE duv_id = 8")
+    assert fetch.materialize_runner_pbs(conn, duv_id=7) == 1
+    assert pbs(conn, first)['24h']['pb_all_time'] == 235.0
+    assert pbs(conn, second)['24h']['pb_all_time'] == 210.0
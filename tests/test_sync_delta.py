@@ -0,0 +1,159 @@
+"""Change capture for the Postgres sync (pg_sync.build_delta and advance_watermarks)"""
+
+from pg_sync import SYNC_TABLES, TABLES_BY_NAME, advance_watermarks, build_delta
+
+OLD = '2025-09-01 10:00:00'
+OLDER = '2025-08-01 10:00:00'
+
+
+def table_entry(batch, name):
+    return next((entry for entry in batch['tables'] if entry['name'] == name), None)
+
+
+def upserted_ids(batch, name='runners'):
+    entry = table_entry(batch, name)
+    if entry is None:
+        return []
+    position = entry['columns'].index('id')
+    return sorted(row[position] for row in entry['upserts'])
+
+
+def add_stamped_runner(add_runner, stamp=OLD, **fields):
+    return add_runner(created_at=stamp, updated_at=stamp, **fields)
+
+
+def test_full_delta_holds_the_race_only(conn, add_runner):
+    conn.execute("INSERT INTO races (id, name, race_date) VALUES (2, 'Other Race', '2026-05-01')")
+    ours = add_stamped_runner(add_runner, entry_id='1', dns=1)
+    add_stamped_runner(add_runner, race_id=2, entry_id='1', stamp='2025-09-02 10:00:00')
+    conn.commit()
+
+    batch = build_delta(conn, SYNC_TABLES, 1)
+
+    assert upserted_ids(batch) == [ours]
+    entry = table_entry(batch, 'runners')
+    assert entry['upserts'][0][entry['columns'].index('dns')] is True  # SQLite 0/1 -> BOOLEAN
+    assert batch['until']['runners']['changed_at'] == OLD
+    assert batch['since']['runners'] == {}
+
+
+def test_applied_batch_is_not_sent_again(conn, add_runner):
+    add_stamped_runner(add_runner, entry_id='1')
+    conn.commit()
+    advance_watermarks(conn, build_delta(conn, SYNC_TABLES, 1))
+
+    assert build_delta(conn, SYNC_TABLES, 1)['tables'] == []
+    # full=True ignores the watermarks
+    assert len(upserted_ids(build_delta(conn, SYNC_TABLES, 1, full=True))) == 1
+
+
+def test_recent_changes_are_sent_until_they_settle(conn, add_runner):
+    add_stamped_runner(add_runner, entry_id='1', stamp=OLDER)
+    second = add_stamped_runner(add_runner, entry_id='2', firstname='Bo', stamp=OLDER)
+    conn.commit()
+    advance_watermarks(conn, build_delta(conn, SYNC_TABLES, 1))
+
+    conn.execute("UPDATE runners SET lastname = 'Smythe' WHERE id = ?", (second,))  # Stamped now
+    conn.commit()
+    batch = build_delta(conn, SYNC_TABLES, 1)
+    assert upserted_ids(batch) == [second]
+    # The watermark stops short of rows stamped within the settle window
+    assert batch['until']['runners']['changed_at'] < conn.execute(
+        "SELECT updated_at FROM runners WHERE id = ?", (second,)).fetchone()[0]
+
+    advance_watermarks(conn, batch)
+    assert upserted_ids(build_delta(conn, SYNC_TABLES, 1)) == [second]
+
+
+def test_deleted_rows_become_deletes_and_tombstones_are_pruned(conn, add_runner):
+    gone = add_stamped_runner(add_runner, entry_id='1')
+    add_stamped_runner(add_runner, entry_id='2', firstname='Bo')
+    conn.commit()
+    advance_watermarks(conn, build_delta(conn, SYNC_TABLES, 1))
+
+    conn.execute("DELETE FROM runners WHERE id = ?", (gone,))
+    conn.execute("UPDATE sync_tombstones SET deleted_at = ?", ('2025-09-05 10:00:00',))
+    conn.commit()
+
+    batch = build_delta(conn, [TABLES_BY_NAME['runners']], 1)
+    assert table_entry(batch, 'runners')['deletes'] == [[gone]]
+    assert table_entry(batch, 'runners')['upserts'] == []
+
+    advance_watermarks(conn, batch)
+    assert conn.execute("SELECT COUNT(*) FROM sync_tombstones").fetchone()[0] == 0
+
+
+def test_rebuilt_team_is_an_upsert_not_a_delete(conn, add_runner):
+    runner = add_stamped_runner(add_runner, entry_id='1')
+    insert_team = ("INSERT INTO teams (race_id, nationality, gender, metric, team_total, rank, runner1_id) "
+                   "VALUES (1, 'SWE', 'W', 'all-time', ?, 1, ?)")
+    conn.execute(insert_team, (250.0, runner))
+    conn.commit()
+    advance_watermarks(conn, build_delta(conn, SYNC_TABLES, 1))
+
+    # calculate-teams style rebuild: delete and insert the same (nationality, gender, metric)
+    conn.execute("DELETE FROM teams")
+    conn.execute(insert_team, (251.5, runner))
+    conn.commit()
+
+    entry = table_entry(build_delta(conn, [TABLES_BY_NAME['teams']], 1), 'teams')
+    assert entry['deletes'] == []
+    assert [row[entry['columns'].index('team_total')] for row in entry['upserts']] == [251.5]
+
+
+def test_performances_are_sent_under_the_races_runner(conn, add_runner):
+    conn.execute("INSERT INTO races (id, name, race_date) VALUES (2, 'Other Race', '2026-05-01')")
+    ours = add_stamped_runner(add_runner, entry_id='1', duv_id=42)
+    add_stamped_runner(add_runner, race_id=2, entry_id='9', duv_id=42)
+    conn.execute("""
+        INSERT INTO performances (duv_id, event_id, event_name, event_date, distance, event_type)
+        VALUES (42, 1, 'Some 24h', '2024-05-01', 230.0, '24h')
+    """)
+    conn.commit()
+
+    entry = table_entry(build_delta(conn, [TABLES_BY_NAME['performances']], 1), 'performances')
+    assert [row[entry['columns'].index('runner_id')] for row in entry['upserts']] == [ours]
+
+
+def test_refetch_without_changes_has_an_empty_delta(conn, add_runner, load_script):
+    fetch = load_script('scripts/fetch-performances.py')
+    runner = {'id': add_stamped_runner(add_runner, entry_id='1', duv_id=42, match_status='auto-matched'),
+              'duv_id': 42}
+    race = {'id': 1, 'name': 'Test Championship', 'race_date': '2025-10-17'}
+    profile = {'YOB': 1985, 'results': [
+        {'Event': 'Some 24h', 'Startdate': '2024-05-01', 'Performance': '230.123 km', 'Distance': 230.123,
+         'DistanceKm': 230.123, 'DurationSec': 86400, 'Length': '24h', 'EventID': 1, 'Rank': '4'},
+        {'Event': 'Some 100km', 'Startdate': '2023-09-10', 'Performance': '7:12:33 h', 'Distance': 7.0,
+         'DistanceKm': 100.0, 'DurationSec': 25953, 'Length': '100km', 'EventID': 2, 'Rank': '12'},
+    ]}
+
+    def refresh():
+        # The refresh daemon's steps for one athlete
+        cursor = conn.cursor()
+        fetch.store_profile(cursor, runner, profile, race)
+        fetch.materialize_runner_pbs(conn, duv_id=42)
+        fetch.apply_history_pbs(cursor, [(42, None)])
+        conn.commit()
+
+    refresh()
+    assert conn.execute("SELECT COUNT(*) FROM runner_pbs").fetchone()[0] == 2
+    # Age the first fetch past the settle window, then sync it
+    for table in ('runners', 'performances', 'runner_pbs'):
+        conn.execute(f"UPDATE {table} SET updated_at = ?", (OLD,))
+    conn.commit()
+    advance_watermarks(conn, build_delta(conn, SYNC_TABLES, 1))
+
+    refresh()
+
+    assert build_delta(conn, SYNC_TABLES, 1)['tables'] == []
+    assert conn.execute("SELECT COUNT(*) FROM sync_tombstones").fetchone()[0] == 0
+
+    # A new result is one performance upsert and one changed PB row
+    profile['results'].append(
+        {'Event': 'Another 24h', 'Startdate': '2025-04-01', 'Performance': '241.5 km', 'Distance': 241.5,
+         'DistanceKm': 241.5, 'DurationSec': 86400, 'Length': '24h', 'EventID': 3, 'Rank': '2'})
+    refresh()
+    batch = build_delta(conn, SYNC_TABLES, 1)
+    assert {entry['name']: len(entry['upserts']) for entry in batch['tables']} == {
+        'runners': 1, 'performances': 1, 'runner_pbs': 1}
+    assert all(entry['deletes'] == [] for entry in batch['tables'])